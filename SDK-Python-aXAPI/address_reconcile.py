@@ -0,0 +1,190 @@
+# -*- encoding: utf8 -*-
+"""
+    Address reconcile module:  bulk IPv4/IPv6 address changes of interfaces and ves.
+        AddressPlan         addresses to add and delete on one interface or ve
+        ReconcileResult     plans and failures of one device
+        plan_addresses      diff of the desired addresses with the configured ones
+        reconcile           applies the desired addresses to many devices
+
+        The desired state of a device is {(kind, port_num): addresses}, kind
+        being KIND_INTERFACE or KIND_VE and addresses {"ipv4": [(address,
+        mask)], "ipv6": [(address, prefix length)]}.  A family left out is not
+        changed, an empty list removes all its addresses.  IPv4 masks may be
+        given as 255.255.255.0 or as a prefix length, IPv6 addresses in any
+        notation.
+
+        Every device is read once with Interface.getAll and
+        VirtualInterface.getAll, and only the missing addresses are added and
+        the extra ones deleted, concurrently on all devices.  The additions
+        of a device all run before its deletions, so that an interface moved
+        to a new address stays reachable.
+
+        Usage:
+            desired = {(KIND_VE, 10): {"ipv4": [("10.1.10.1", 24)]},
+                       (KIND_VE, 20): {"ipv4": [("10.1.20.1", "255.255.255.0")], "ipv6": []}}
+            results = reconcile(executor, {"10.0.0.1": desired, "10.0.0.2": desired})
+            for device, result in results.iteritems():
+                print device, result.error, result.changes(), result.failures
+"""
+
+import socket
+import struct
+
+from base import AxError, error_message
+from network import Interface, VirtualInterface
+
+KIND_INTERFACE = "interface"
+KIND_VE = "ve"
+
+# kind: class
+CLASSES = {KIND_INTERFACE: Interface, KIND_VE: VirtualInterface}
+
+FIELDS = ("port_num", "ipv4_addr_list", "ipv6_addr_list")
+
+def ipv4_mask(mask):
+    """
+        Returns the dotted form of a mask given as a prefix length or dotted.
+    """
+    mask = str(mask).lstrip("/")
+    if mask.isdigit():
+        bits = int(mask)
+        return socket.inet_ntoa(struct.pack("!I", (0xffffffff << (32 - bits)) & 0xffffffff))
+    return mask
+
+def ipv6_address(address):
+    """
+        Returns the canonical text form of an IPv6 address.
+    """
+    try:
+        return socket.inet_ntop(socket.AF_INET6, socket.inet_pton(socket.AF_INET6, address))
+    except (socket.error, ValueError, AttributeError):
+        return address.lower()
+
+def _ipv4(entries):
+    return set((str(a), ipv4_mask(m)) for a, m in entries)
+
+def _ipv6(entries):
+    return set((ipv6_address(str(a)), int(p)) for a, p in entries)
+
+class AddressPlan(object):
+    """
+        add and delete hold (family, address, mask or prefix length).
+        missing is True when the interface is not configured on the device.
+    """
+    __slots__ = ("kind", "port_num", "add", "delete", "missing")
+
+    def __init__(self, kind, port_num, add=None, delete=None, missing=False):
+        self.kind = kind
+        self.port_num = port_num
+        self.add = add or []
+        self.delete = delete or []
+        self.missing = missing
+
+    def changes(self):
+        return len(self.add) + len(self.delete)
+
+    def __repr__(self):
+        if self.missing:
+            return "AddressPlan(%s %s missing)"%(self.kind, self.port_num)
+        return "AddressPlan(%s %s add=%d delete=%d)"%(self.kind, self.port_num, len(self.add), len(self.delete))
+
+class ReconcileResult(object):
+    """
+        error       why the device could not be read, None otherwise
+        plans       {(kind, port_num): AddressPlan}
+        failures    list of (kind, port_num, operation, address, error code or message)
+    """
+
+    def __init__(self, device, plans=None, error=None):
+        self.device = device
+        self.plans = plans or {}
+        self.error = error
+        self.failures = []
+
+    def changes(self):
+        return sum(plan.changes() for plan in self.plans.itervalues())
+
+def plan_addresses(kind, port_num, desired, configured):
+    """
+        Returns the AddressPlan turning the configured object dictionary of
+        an interface or ve, None when it is missing, into the desired
+        addresses.
+    """
+    if configured is None:
+        return AddressPlan(kind, port_num, missing=True)
+    plan = AddressPlan(kind, port_num)
+    if "ipv4" in desired:
+        want = _ipv4(desired["ipv4"])
+        have = _ipv4((a.get("ipv4_addr"), a.get("ipv4_mask")) for a in configured.get("ipv4_addr_list") or ())
+        plan.add.extend(("ipv4",) + a for a in sorted(want - have))
+        plan.delete.extend(("ipv4",) + a for a in sorted(have - want))
+    if "ipv6" in desired:
+        want = _ipv6(desired["ipv6"])
+        have = _ipv6((a.get("ipv6_addr"), a.get("ipv6_prefix_len")) for a in configured.get("ipv6_addr_list") or ())
+        plan.add.extend(("ipv6",) + a for a in sorted(want - have))
+        plan.delete.extend(("ipv6",) + a for a in sorted(have - want))
+    return plan
+
+def fetch_addresses():
+    """
+        Returns {(kind, port_num): object dictionary} of the interfaces and
+        ves of the device bound to the calling thread.  Raises AxError when
+        a getAll fails.
+    """
+    result = {}
+    for kind, cls in CLASSES.iteritems():
+        objects = cls.getAll(FIELDS)
+        if objects is None:
+            raise AxError("%s.getAll failed"%cls.__name__)
+        for obj in objects:
+            obj_dict = obj.getObjectDict()
+            try:
+                port_num = int(obj_dict.get("port_num"))
+            except (TypeError, ValueError):
+                # an entry without port number cannot be matched
+                continue
+            result[(kind, port_num)] = obj_dict
+    return result
+
+def _call(kind, port_num, operation, family, address, mask):
+    obj = CLASSES[kind](port_num=port_num)
+    method = "%sIpv%sAddress"%(operation, family[-1])
+    return getattr(obj, method)(address, mask)
+
+def reconcile(executor, desired, dry_run=False):
+    """
+        Applies {device: {(kind, port_num): addresses}} with an
+        executor.Executor holding the devices.  Returns {device:
+        ReconcileResult}; with dry_run only the plans are computed.
+    """
+    reads = [executor.submit(device, fetch_addresses) for device in desired]
+    results = {}
+    for future in reads:
+        device = future.device
+        # any failure stays with its device, the others are still reconciled
+        try:
+            configured = future.result()
+            plans = dict(((kind, int(port_num)), plan_addresses(kind, int(port_num), addresses,
+                                                                configured.get((kind, int(port_num)))))
+                         for (kind, port_num), addresses in desired[device].iteritems())
+        except Exception, e:
+            results[device] = ReconcileResult(device, error=error_message(e))
+            continue
+        results[device] = ReconcileResult(device, plans)
+    if dry_run:
+        return results
+    for operation in ("add", "delete"):
+        calls = []
+        for device, result in results.iteritems():
+            for plan in result.plans.itervalues():
+                for family, address, mask in getattr(plan, operation):
+                    calls.append((result, plan, family, address, executor.submit(
+                        device, _call, plan.kind, plan.port_num, operation, family, address, mask)))
+        for result, plan, family, address, future in calls:
+            try:
+                code = future.result()
+            except Exception, e:
+                code = error_message(e)
+            if code:
+                result.failures.append((plan.kind, plan.port_num, operation, address, code))
+    return results
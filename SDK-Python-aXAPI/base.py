@@ -8,8 +8,11 @@
 
 """
 
-from cStringIO import StringIO
 import json
+from itertools import izip
+
+# print the aXAPI requests and responses, see method_call.call_api
+DEBUG = False
 
 class AxAPI:
     """ Status:
@@ -68,22 +71,227 @@ class AxAPIError(AxError):
         self.code = code
         self.message = message
 
+class AxHttpError(AxError):
+    """
+        The device answered with a non-2xx HTTP status.
+    """
+    def __init__(self,status,message):
+        AxError.__init__(self,message)
+        self.status = status
+
+class AxTransportError(AxError):
+    """
+        The request could not be completed at the network level.
+        'sent' is False when the failure happened before the request
+        reached the device, which makes it safe to retry any method.
+    """
+    def __init__(self,message,sent=True):
+        AxError.__init__(self,message)
+        self.sent = sent
+
+class AxTimeoutError(AxTransportError):
+    pass
+
+class AxCertificateError(AxError):
+    """
+        The TLS certificate of the device could not be verified.  The
+        request was not sent, and retrying cannot succeed until the
+        certificate or the trusted CAs change.
+    """
+    pass
+
+class AxCircuitOpenError(AxError):
+    """
+        The device is skipped because its circuit breaker is open.
+    """
+    def __init__(self,device):
+        AxError.__init__(self,"circuit open for device %s"%device)
+        self.device = device
+
+def error_message(exc):
+    """
+        Returns the text of an exception: the message of an AxError, prefixed
+        with the exception class otherwise, so that a bug or a malformed
+        response is not mistaken for an aXAPI error.
+    """
+    if isinstance(exc, AxError):
+        return str(exc)
+    return "%s: %s"%(exc.__class__.__name__, exc)
+
+URL_ITEM_SEP = chr(2)
+URL_KEY_SEP = chr(3)
+
+class UrlEncoder(object):
+    """
+        Encoder of the url format POST data, compiled once per AxObject class
+        from its __xml_convrt__:
+            key=value                                   scalar
+            key=k1\\x03v1\\x02k2\\x03v2                   dictionary
+            key=item1\\x02item2&item1=...&item2=...      list of dictionaries
+        A list inside a list item is encoded the same way, the item holds
+        k\\x03ref1\\x02ref2 and the entries ref1=... follow the item, with
+        references prefixed by the name of the parent item (vport1_member1).
+        List items are named from __xml_convrt__, or from the key without
+        its _list suffix.
+    """
+
+    def __init__(self, xml_convrt):
+        self.item_names = dict(xml_convrt) if isinstance(xml_convrt, dict) else {}
+
+    def itemName(self, key):
+        name = self.item_names.get(key)
+        if name is None:
+            name = key[:-5] if key.endswith("_list") else key
+            self.item_names[key] = name
+        return name
+
+    def encode(self, obj_dict):
+        out = []
+        append = out.append
+        for k, v in obj_dict.iteritems():
+            if isinstance(v, list):
+                if v:
+                    append(k)
+                    append("=")
+                    self._list(out, k, v, "")
+                    append("&")
+            elif isinstance(v, dict):
+                if v:
+                    append(k)
+                    append("=")
+                    append(self._fields(v, None, None))
+                    append("&")
+            else:
+                v = _url_scalar(v)
+                if v:
+                    append(k)
+                    append("=")
+                    append(v)
+                    append("&")
+        if out:
+            out.pop()
+        return "".join(out)
+
+    def _refs(self, key, count, prefix):
+        name = prefix + self.itemName(key)
+        return [name + str(i) for i in xrange(1, count + 1)]
+
+    def _list(self, out, key, items, prefix):
+        """
+            Writes the references of the items, then the items.
+        """
+        refs = self._refs(key, len(items), prefix)
+        out.append(URL_ITEM_SEP.join(refs))
+        self._items(out, refs, items)
+
+    def _items(self, out, refs, items):
+        fields = self._fields
+        for ref, item in izip(refs, items):
+            if not isinstance(item, dict):
+                raise AxAPIError(code=99, message="invalid dictionary object")
+            nested = []
+            out.append("&%s=%s"%(ref, fields(item, ref, nested)))
+            for k, v in nested:
+                self._items(out, self._refs(k, len(v), ref + "_"), v)
+
+    def _fields(self, obj_dict, ref, nested):
+        """
+            Returns the fields of a dictionary as k\\x03v\\x02...  Lists are
+            only allowed in list items and are collected in nested to be
+            written after the item.
+        """
+        parts = []
+        for k, v in obj_dict.iteritems():
+            t = type(v)
+            if t is str:
+                if not v:
+                    continue
+            elif t is int:
+                v = str(v)
+            elif t is list:
+                if not v:
+                    continue
+                if nested is None:
+                    raise AxAPIError(code=99, message="invalid dictionary object")
+                nested.append((k, v))
+                v = URL_ITEM_SEP.join(self._refs(k, len(v), ref + "_"))
+            elif isinstance(v, dict):
+                raise AxAPIError(code=99, message="invalid dictionary object")
+            else:
+                v = _url_scalar(v)
+                if not v:
+                    continue
+            parts.append(k + URL_KEY_SEP + v)
+        return URL_ITEM_SEP.join(parts)
+
+def _url_scalar(v):
+    if isinstance(v, unicode):
+        return v.encode("utf8")
+    if isinstance(v, bool):
+        return str(int(v))
+    if isinstance(v, (int, long, float)):
+        return str(v)
+    return v or ""
+
+_url_encoders = {}
+
+def url_encoder(cls):
+    """
+        Returns the UrlEncoder of an AxObject class.
+    """
+    encoder = _url_encoders.get(cls)
+    if encoder is None:
+        encoder = _url_encoders[cls] = UrlEncoder(cls.__xml_convrt__)
+    return encoder
+
+class LazyValue(object):
+    """
+        A field value that is only decoded when it is first read, see
+        AxObject and method_call.call_api(_lazy=True).
+    """
+    __slots__ = ("load",)
+
+    def __init__(self,load):
+        self.load = load
+
 class AxDictObject(object):
     """
-        Transform recursively JSON dictionaries into objects
+        Transform recursively JSON dictionaries into objects.  The nested
+        dictionaries and lists are only wrapped when first accessed.
     """
     def __init__(self,name,obj_dict):
-        self.__name__ = name
-        for k,v in obj_dict.iteritems() :
-            if isinstance(v,dict) :
-                v = AxDictObject(k,v)
-            if isinstance(v,list) :
-                v = [ AxDictObject(k,vi) for vi in v ]
-            self.__dict__[k] = v
+        self.__dict__["__name__"] = name
+        self.__dict__["_obj_dict"] = obj_dict
+
+    def __getattr__(self,name):
+        obj_dict = self.__dict__["_obj_dict"]
+        if name not in obj_dict :
+            raise AttributeError("'%s' object has no attribute '%s'"%(self.__name__,name))
+        v = obj_dict[name]
+        if isinstance(v,LazyValue) :
+            v = v.load()
+        if isinstance(v,dict) :
+            v = AxDictObject(name,v)
+        elif isinstance(v,list) :
+            v = [ AxDictObject(name,vi) if isinstance(vi,dict) else vi for vi in v ]
+        self.__dict__[name] = v
+        return v
+
+    def __dir__(self):
+        return sorted(set(self.__dict__["_obj_dict"]) | set(self.__dict__))
 
 class AxObject(object):
     """
         Base Object for aXAPI Objects
+
+        LazyValue parameters are kept aside and only decoded when the field
+        is first read, so scanning a getAll result for a few fields does not
+        pay for the nested lists.  Everything that serialises or exposes
+        the whole object decodes the pending fields first.
+
+        The getAll methods of the subclasses take fields, the names of the
+        only fields to decode and set in the returned objects, for example
+        ("name", "status"); see method_call.call_api(_fields=...).
     """
     __display__ = []
     __obj_name__ = ""
@@ -95,9 +303,32 @@ class AxObject(object):
 
     def _set_properties(self,**params):
         self.__dict__.update(params)
+        lazy = [ k for k,v in params.iteritems() if isinstance(v,LazyValue) ]
+        if lazy :
+            pending = self.__dict__.setdefault("_lazy_fields",{})
+            for k in lazy :
+                pending[k] = self.__dict__.pop(k)
+
+    def _materialise(self,name=None):
+        """
+            Decodes the pending lazy field name, or all of them.
+        """
+        pending = self.__dict__.get("_lazy_fields")
+        if pending is None :
+            return
+        names = pending.keys() if name is None else [name]
+        for k in names :
+            if k in pending :
+                self.__dict__[k] = pending.pop(k).load()
+        if not pending :
+            del self.__dict__["_lazy_fields"]
     
     def __getattr__(self,name):
         if name not in self.__dict__ :
+            pending = self.__dict__.get("_lazy_fields")
+            if pending and name in pending :
+                self._materialise(name)
+                return self.__dict__[name]
             #if not self.loaded :
             #    self.load()
             return "UNKONWN"
@@ -110,18 +341,22 @@ class AxObject(object):
         if self.__obj_readonly__:
             raise AxError("Read-only instance")
         else:
+            self.__dict__.get("_lazy_fields",{}).pop(name,None)
             self.__dict__[name] = values
     
     def get(self,key,*args,**kwargs):
+        self._materialise(key)
         return self.__dict__.get(key,*args,**kwargs)
     
     def __getitem__(self,key):
+        self._materialise(key)
         return self.__dict__[key]
     
     def __setitem__(self,key,value):
         if self.__obj_readonly__:
             raise AxError("Read-only instance")
         else:
+            self.__dict__.get("_lazy_fields",{}).pop(key,None)
             self.__dict__[key] = value
 
     def __str__(self):
@@ -132,7 +367,7 @@ class AxObject(object):
                 value = self.__dict__[k]
                 val_found = True
             except KeyError :
-                #self.load()
+                self._materialise(k)
                 try :
                     value = self.__dict__[k]
                     val_found = True
@@ -150,6 +385,7 @@ class AxObject(object):
     def __repr__(self): return str(self)
 
     def getRequestPostDataJson(self):
+        self._materialise()
         if len(self.__obj_name__) > 0 :
             data = dict()
             data[self.__obj_name__] = self.__dict__
@@ -157,80 +393,22 @@ class AxObject(object):
             data = self.__dict__
         return json.dumps(data)
 
-    def _generateListInUrl(self, key_name_str, val_name, aList):
-        count = 1
-        resp_key = key_name_str+"="
-        resp = ""
-        is_first = True
-        for e in aList:
-            if isinstance(e, dict):
-                # it has to be a Dictionary!
-                if not is_first:
-                    resp_key += chr(2)
-                    resp += "&"
-                resp_key += val_name+str(count)
-                resp += self._generateDictInUrl(val_name+str(count), e)
-            else:
-                # otherwise, don't know to handle
-                raise AxAPIError(code=99, message="invalid dictionary object")
-            count += 1
-            is_first = False
-        return resp_key+"&"+resp
-    
-    def _generateDictInUrl(self, key_name_str, aDict):
-        resp = key_name_str+"="
-        is_first = True
-        for k, v in aDict.iteritems():
-            if type(v) == int:
-                if not is_first:
-                    resp += chr(2)
-                resp += k+chr(3)+str(v)
-                is_first = False
-            elif len(v) > 0:
-                if not is_first:
-                    resp += chr(2)
-                resp += k+chr(3)+v
-                is_first = False
-        return resp
-    
-    def _appendString(self, file_str, is_first, string):
-        if is_first:
-            file_str.write(string)
-        else:
-            file_str.write("&"+string)
-            
     def getObjectDict(self):
+        self._materialise()
         return self.__dict__
     
     def getRequestPostDataXml(self):
-        file_str = StringIO()
-        is_first = True
-        for k, v in self.__dict__.iteritems():
-            if self.__xml_convrt__.has_key(k):
-                # a list value, v
-                if len(v) > 0:
-                    self._appendString(file_str, is_first, self._generateListInUrl(k, self.__xml_convrt__[k], v))
-                    is_first = False
-            elif isinstance(v, dict):
-                #  key_name: { k1: v1, k2: v2, ..., }
-                if len(v) > 0:
-                    self._appendString(file_str, is_first, self._generateDictInUrl(k, v))
-                    is_first = False
-            elif type(v) == int:
-                #  key_name: value
-                self._appendString(file_str, is_first, k+"="+str(v))
-                is_first = False
-            elif len(v) > 0:
-                #  key_name: value
-                self._appendString(file_str, is_first, k+"="+v)
-                is_first = False
-        print file_str.getvalue()
-        return file_str.getvalue()
+        self._materialise()
+        data = url_encoder(self.__class__).encode(self.__dict__)
+        if DEBUG:
+            print data
+        return data
     
     def dump(self):
         """
             Debug purpose to print out the AX object internal data.
         """
+        self._materialise()
         print (self.__dict__)
         
     def getInfo(self):
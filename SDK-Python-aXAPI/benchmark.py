@@ -0,0 +1,452 @@
+# -*- encoding: utf8 -*-
+"""
+    Benchmark module:  end-to-end and micro benchmarks of the SDK hot paths.
+
+        Micro benchmarks run on synthetic payloads, without network:
+            xmldict_<n>         XML() + _XmlDict of a url format getAll response
+            xmldict_lazy_<n>    the same leaving nested lists undecoded, then
+                                VirtualServer construction and reading name/status
+            retain_<n>          VirtualServer objects of an url format getAll
+                                response kept after reading name/status
+            retain_lazy_<n>     the same with the nested lists left undecoded
+            json_<n>            json.loads of a json getAll response
+            axobject_<n>        VirtualServer construction from decoded items
+            post_xml_<n>        getRequestPostDataXml of a TemplateCache with n policies
+            post_xml_legacy_<n> the same with the string concatenating encoder it replaced
+
+        End-to-end benchmarks run against mock_server devices started in
+        their own processes:
+            getall_json_<n>     VirtualServer.getAll on a device with n virtual servers
+            getall_url_<n>      the same call in url (XML) format
+            getall_url_lazy_<n> the url format call with _lazy=True
+            getall_*_slim_<n>   the json and url calls keeping only name, address and status
+            stats_poll          VirtualServerStats.getAll polling
+            bulk_write          RealServer create/update/delete, json format
+            bulk_write_url      TemplateCache create/update/delete, url format
+            fanout_<d>          concurrent getAll on d devices
+
+        Each case runs in a child process, so its peak memory is measured in
+        isolation.  The report gives throughput (items/s and ops/s), latency
+        percentiles of single operations, the peak memory growth and the
+        memory still held at the end while the case keeps its last result
+        (Linux only).
+
+        Usage:
+            python benchmark.py --label v1 --output bench_results
+            python benchmark.py --label v2 --output bench_results --compare bench_results/v1.json
+            python benchmark.py --sizes 1000,10000 --cases getall,xmldict
+"""
+
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import threading
+import time
+from cStringIO import StringIO
+
+import base
+import method_call
+from method_call import XML
+import mock_server
+import session
+from slb import VirtualServer, VirtualServerStats, RealServer
+from slb_template import TemplateCache
+
+class BenchEnv(object):
+    """
+        What a case may use: the addresses of the mock devices by size, the
+        devices of the fan-out case and the number of repetitions.
+    """
+    def __init__(self, devices, fanout, repeat):
+        self.devices = devices
+        self.fanout = fanout
+        self.repeat = repeat
+
+    def login(self, address):
+        method_call.AXAPI_SCHEME = "http"
+        return method_call.AxApiContext(address, "admin", "a10").authentication()
+
+def timed(fn, *args):
+    started = time.time()
+    result = fn(*args)
+    return time.time() - started, result
+
+# ---- micro benchmarks ----
+
+def _vip_items(n):
+    store = mock_server.seed(mock_server.MockStore(), virtual_servers=n, servers=1, service_groups=1,
+                             templates=1, zones=1, sites=1, interfaces=0, ves=0)
+    return store.objects("slb.virtual_server").values()
+
+def case_xmldict(n):
+    def setup(env):
+        return mock_server.render_xml({"virtual_server_list": _vip_items(n)})
+    def run(payload):
+        elapsed, _ = timed(lambda: method_call._XmlDict(XML(payload), VirtualServer.__xml_convrt__))
+        return n, [elapsed]
+    return setup, run
+
+def case_xmldict_lazy(n):
+    def setup(env):
+        return mock_server.render_xml({"virtual_server_list": _vip_items(n)})
+    def run(payload):
+        def scan():
+            res = method_call._XmlDict(XML(payload), VirtualServer.__xml_convrt__, lazy=True)
+            return [(vip.name, vip.status) for vip in [VirtualServer(**item) for item in res["virtual_server_list"]]]
+        elapsed, _ = timed(scan)
+        return n, [elapsed]
+    return setup, run
+
+def case_retain(n, lazy=False):
+    def setup(env):
+        return dict(payload=mock_server.render_xml({"virtual_server_list": _vip_items(n)}), kept=None)
+    def run(state):
+        def scan():
+            # the previous result is released first, so only one is held at a time
+            state["kept"] = None
+            res = method_call._XmlDict(XML(state["payload"]), VirtualServer.__xml_convrt__, lazy=lazy)
+            vips = [VirtualServer(**item) for item in res["virtual_server_list"]]
+            [(vip.name, vip.status) for vip in vips]
+            return vips
+        elapsed, state["kept"] = timed(scan)
+        return n, [elapsed]
+    return setup, run
+
+def case_json(n):
+    def setup(env):
+        return mock_server.render_json({"virtual_server_list": _vip_items(n)})
+    def run(payload):
+        elapsed, _ = timed(json.loads, payload)
+        return n, [elapsed]
+    return setup, run
+
+def case_axobject(n):
+    def setup(env):
+        return json.loads(mock_server.render_json({"virtual_server_list": _vip_items(n)}))["virtual_server_list"]
+    def run(items):
+        elapsed, _ = timed(lambda: [VirtualServer(**item) for item in items])
+        return n, [elapsed]
+    return setup, run
+
+def legacy_post_data_xml(obj):
+    """
+        The url format encoder of AxObject before base.UrlEncoder, kept as the
+        baseline of the post_xml cases.
+    """
+    def generate_list(key_name_str, val_name, aList):
+        resp_key = key_name_str + "="
+        resp = ""
+        for count, e in enumerate(aList, 1):
+            if count > 1:
+                resp_key += chr(2)
+                resp += "&"
+            resp_key += val_name + str(count)
+            resp += generate_dict(val_name + str(count), e)
+        return resp_key + "&" + resp
+    def generate_dict(key_name_str, aDict):
+        resp = key_name_str + "="
+        is_first = True
+        for k, v in aDict.iteritems():
+            if type(v) == int:
+                if not is_first:
+                    resp += chr(2)
+                resp += k + chr(3) + str(v)
+                is_first = False
+            elif len(v) > 0:
+                if not is_first:
+                    resp += chr(2)
+                resp += k + chr(3) + v
+                is_first = False
+        return resp
+    file_str = StringIO()
+    is_first = True
+    for k, v in obj.__dict__.iteritems():
+        if obj.__xml_convrt__.has_key(k):
+            if len(v) > 0:
+                string = generate_list(k, obj.__xml_convrt__[k], v)
+            else:
+                continue
+        elif isinstance(v, dict):
+            if len(v) > 0:
+                string = generate_dict(k, v)
+            else:
+                continue
+        elif type(v) == int:
+            string = k + "=" + str(v)
+        elif len(v) > 0:
+            string = k + "=" + v
+        else:
+            continue
+        file_str.write(string if is_first else "&" + string)
+        is_first = False
+    return file_str.getvalue()
+
+def case_post_xml(n, encode=None):
+    def setup(env):
+        template = TemplateCache(name="bench_cache")
+        template.policy_list = [{"uri": "/path/%d"%i, "action": i % 3} for i in xrange(n)]
+        return template
+    def run(template):
+        if encode is None:
+            elapsed, _ = timed(template.getRequestPostDataXml)
+        else:
+            elapsed, _ = timed(encode, template)
+        return n, [elapsed]
+    return setup, run
+
+# ---- end-to-end benchmarks ----
+
+SLIM_FIELDS = ("name", "address", "status")
+
+def case_getall(n, fmt, lazy=False, fields=None):
+    def setup(env):
+        env.login(env.devices[n])
+        return env
+    def run(env):
+        if fmt == "json":
+            elapsed, vips = timed(VirtualServer.getAll, fields)
+        else:
+            def get_all():
+                res = method_call.call_api(VirtualServer(), method="slb.virtual_server.getAll", format="url", _lazy=lazy,
+                                           _fields=fields)
+                return [VirtualServer(**item) for item in res["virtual_server_list"]]
+            elapsed, vips = timed(get_all)
+        return len(vips), [elapsed]
+    return setup, run
+
+def case_stats_poll(polls=10):
+    def setup(env):
+        env.login(env.devices[min(env.devices)])
+        return env
+    def run(env):
+        items, latencies = 0, []
+        for i in xrange(polls):
+            elapsed, stats = timed(VirtualServerStats.getAll)
+            items += len(stats)
+            latencies.append(elapsed)
+        return items, latencies
+    return setup, run
+
+def case_bulk_write(count=200, fmt="json"):
+    def setup(env):
+        env.login(env.devices[min(env.devices)])
+        return {"run": 0}
+    def run(state):
+        state["run"] += 1
+        prefix = "bench%d_%d_"%(os.getpid(), state["run"])
+        latencies = []
+        if fmt == "json":
+            objects = [RealServer(name=prefix + str(i), host="10.200.%d.%d"%(i // 250, i % 250 + 1),
+                                  port_list=[{"port_num": 80, "protocol": 2}]) for i in xrange(count)]
+        else:
+            objects = [TemplateCache(name=prefix + str(i), policy_list=[{"uri": "/a", "action": 1}])
+                       for i in xrange(count)]
+        for op in ("create", "update", "delete"):
+            for obj in objects:
+                elapsed, code = timed(getattr(obj, op))
+                latencies.append(elapsed)
+        return len(latencies), latencies
+    return setup, run
+
+def case_fanout(devices):
+    def setup(env):
+        method_call.AXAPI_SCHEME = "http"
+        return [session.SessionPool(address, "admin", "a10", max_sessions=1) for address in env.fanout[:devices]]
+    def run(pools):
+        results = [None] * len(pools)
+        def worker(i):
+            with pools[i].session():
+                results[i] = timed(VirtualServer.getAll)
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(pools))]
+        started = time.time()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.time() - started
+        return sum(len(r[1]) for r in results), [elapsed]
+    return setup, run
+
+# ---- runner ----
+
+def _rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024.0 * 1024.0) if sys.platform == "darwin" else rss / 1024.0
+
+def _current_rss_mb():
+    """
+        Resident memory now, None where /proc is not available.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / (1024.0 * 1024.0)
+    except (IOError, ValueError, IndexError):
+        return None
+
+def _mb(value):
+    return "-" if value is None else "%.1f"%value
+
+def _percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(q / 100.0 * (len(values) - 1))))]
+
+def _run_child(factory, env, queue):
+    try:
+        setup, run = factory()
+        state = setup(env)
+        gc.collect()
+        baseline = _rss_mb()
+        current = _current_rss_mb()
+        items, ops, latencies = 0, 0, []
+        started = time.time()
+        for i in xrange(env.repeat):
+            n, op_latencies = run(state)
+            items += n
+            ops += len(op_latencies)
+            latencies.extend(op_latencies)
+        elapsed = time.time() - started
+        gc.collect()
+        retained = _current_rss_mb() - current if current is not None else None
+        queue.put(dict(items=items, ops=ops, seconds=elapsed,
+                       items_per_sec=items / elapsed if elapsed else 0.0,
+                       ops_per_sec=ops / elapsed if elapsed else 0.0,
+                       p50_ms=_percentile(latencies, 50) * 1000, p95_ms=_percentile(latencies, 95) * 1000,
+                       p99_ms=_percentile(latencies, 99) * 1000, max_ms=max(latencies) * 1000,
+                       peak_mem_mb=max(0.0, _rss_mb() - baseline),
+                       retained_mem_mb=max(0.0, retained) if retained is not None else None))
+    except Exception, e:
+        queue.put(dict(error="%s: %s"%(e.__class__.__name__, e)))
+
+def run_case(name, factory, env):
+    queue = multiprocessing.Queue()
+    child = multiprocessing.Process(target=_run_child, args=(factory, env, queue))
+    child.start()
+    result = queue.get()
+    child.join()
+    result["case"] = name
+    return result
+
+def _serve(size, latency, conn):
+    store = mock_server.seed(mock_server.MockStore(), virtual_servers=size, servers=min(size, 10000))
+    device = mock_server.MockDevice(port=0, store=store, latency=latency)
+    conn.send(device.address)
+    device.server.serve_forever()
+
+def start_device(size, latency=0.0):
+    """
+        Starts a seeded mock device in its own process, returns (process, address).
+    """
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_serve, args=(size, latency, child))
+    process.daemon = True
+    process.start()
+    return process, parent.recv()
+
+def build_cases(sizes, fanout):
+    cases = []
+    for n in sizes:
+        cases.append(("xmldict_%d"%n, lambda n=n: case_xmldict(n)))
+        cases.append(("xmldict_lazy_%d"%n, lambda n=n: case_xmldict_lazy(n)))
+        cases.append(("retain_%d"%n, lambda n=n: case_retain(n)))
+        cases.append(("retain_lazy_%d"%n, lambda n=n: case_retain(n, lazy=True)))
+        cases.append(("json_%d"%n, lambda n=n: case_json(n)))
+        cases.append(("axobject_%d"%n, lambda n=n: case_axobject(n)))
+        cases.append(("post_xml_%d"%n, lambda n=n: case_post_xml(n)))
+        cases.append(("post_xml_legacy_%d"%n, lambda n=n: case_post_xml(n, legacy_post_data_xml)))
+    for n in sizes:
+        cases.append(("getall_json_%d"%n, lambda n=n: case_getall(n, "json")))
+        cases.append(("getall_url_%d"%n, lambda n=n: case_getall(n, "url")))
+        cases.append(("getall_url_lazy_%d"%n, lambda n=n: case_getall(n, "url", lazy=True)))
+        cases.append(("getall_json_slim_%d"%n, lambda n=n: case_getall(n, "json", fields=SLIM_FIELDS)))
+        cases.append(("getall_url_slim_%d"%n, lambda n=n: case_getall(n, "url", fields=SLIM_FIELDS)))
+    cases.append(("stats_poll", case_stats_poll))
+    cases.append(("bulk_write", lambda: case_bulk_write(fmt="json")))
+    cases.append(("bulk_write_url", lambda: case_bulk_write(fmt="url")))
+    cases.append(("fanout_%d"%fanout, lambda: case_fanout(fanout)))
+    return cases
+
+def compare(results, baseline):
+    """
+        Returns report lines with the change of each case against a baseline run.
+    """
+    old = dict((r["case"], r) for r in baseline["cases"] if "error" not in r)
+    lines = ["%-22s %14s %14s %9s %9s"%("case", "items/s", "baseline", "speedup", "mem MB")]
+    for r in results["cases"]:
+        if "error" in r or r["case"] not in old:
+            continue
+        before = old[r["case"]]
+        speedup = r["items_per_sec"] / before["items_per_sec"] if before["items_per_sec"] else 0.0
+        lines.append("%-22s %14.0f %14.0f %8.2fx %9.1f"%(r["case"], r["items_per_sec"], before["items_per_sec"],
+                                                       speedup, r["peak_mem_mb"]))
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description="aXAPI SDK benchmarks")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma separated object counts")
+    parser.add_argument("--cases", default="", help="comma separated case name prefixes, all by default")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=4, help="devices in the fan-out case")
+    parser.add_argument("--latency", type=float, default=0.0, help="latency of the mock devices")
+    parser.add_argument("--label", default=time.strftime("%Y%m%d-%H%M%S"))
+    parser.add_argument("--output", help="directory where <label>.json is written")
+    parser.add_argument("--compare", help="results file of a previous run")
+    options = parser.parse_args()
+
+    base.DEBUG = False
+    sizes = [int(s) for s in options.sizes.split(",") if s]
+    prefixes = [p for p in options.cases.split(",") if p]
+    cases = [(name, factory) for name, factory in build_cases(sizes, options.fanout)
+             if not prefixes or any(name.startswith(p) for p in prefixes)]
+
+    processes = []
+    devices = {}
+    fanout = []
+    needs_device = any(not name.split("_")[0] in ("xmldict", "retain", "json", "axobject", "post") for name, f in cases)
+    if needs_device:
+        for n in sizes:
+            process, devices[n] = start_device(n, options.latency)
+            processes.append(process)
+        for i in range(options.fanout):
+            process, address = start_device(min(sizes), options.latency)
+            processes.append(process)
+            fanout.append(address)
+    env = BenchEnv(devices, fanout, options.repeat)
+
+    results = dict(label=options.label, timestamp=time.time(), python=platform.python_version(),
+                   platform=platform.platform(), sizes=sizes, repeat=options.repeat, cases=[])
+    try:
+        print "%-22s %12s %10s %10s %10s %10s %9s %9s"%("case", "items/s", "ops/s", "p50 ms", "p95 ms", "p99 ms",
+                                                       "mem MB", "kept MB")
+        for name, factory in cases:
+            r = run_case(name, factory, env)
+            results["cases"].append(r)
+            if "error" in r:
+                print "%-22s %s"%(name, r["error"])
+            else:
+                print "%-22s %12.0f %10.1f %10.2f %10.2f %10.2f %9.1f %9s"%(name, r["items_per_sec"], r["ops_per_sec"],
+                                                                          r["p50_ms"], r["p95_ms"], r["p99_ms"],
+                                                                          r["peak_mem_mb"], _mb(r["retained_mem_mb"]))
+    finally:
+        for process in processes:
+            process.terminate()
+
+    if options.output:
+        if not os.path.isdir(options.output):
+            os.makedirs(options.output)
+        path = os.path.join(options.output, "%s.json"%options.label)
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+        print "results written to %s"%path
+    if options.compare:
+        with open(options.compare) as f:
+            print "\n".join(compare(results, json.load(f)))
+
+if __name__ == "__main__":
+    main()
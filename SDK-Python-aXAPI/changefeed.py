@@ -0,0 +1,178 @@
+# -*- encoding: utf8 -*-
+"""
+    Change feed module:  add/change/remove events between two getAll cycles.
+        ChangeEvent     one object added, changed or removed on a device
+        ChangeFeed      per-object content hashes of the previous cycle
+
+        Each poll fetches the configured classes with getAll, hashes every
+        object on its canonical JSON form and compares the hashes with the
+        previous cycle of the same device.  Only the differences are returned
+        and passed to the subscribers, so the consumers work in proportion
+        to the changes instead of the fleet size.  Only the hashes are kept
+        between cycles; with a path they are also saved to disk so that
+        cron jobs compare with their previous run.
+
+        A class whose getAll fails in a cycle produces no events, its objects
+        are not reported as removed.
+
+        Usage:
+            feed = ChangeFeed(path="/var/tmp/axapi_feed.json")
+            feed.subscribe(lambda event: print_event(event))
+            for device in devices:
+                feed.pollDevice(device, "admin", "a10")
+            feed.save()
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+import session
+from base import AxError
+from gslb import GslbServiceIP, GslbZone
+from slb import RealServer, ServiceGroup, VirtualServer
+
+EVENT_ADD = "add"
+EVENT_CHANGE = "change"
+EVENT_REMOVE = "remove"
+
+# (class, key field) polled by default
+DEFAULT_SOURCES = (
+    (RealServer, "name"),
+    (ServiceGroup, "name"),
+    (VirtualServer, "name"),
+    (GslbServiceIP, "name"),
+    (GslbZone, "name"),
+)
+
+class ChangeEvent(object):
+    """
+        obj is the current AxObject, None for a removal.
+    """
+    __slots__ = ("event", "device", "kind", "key", "obj", "hash")
+
+    def __init__(self, event, device, kind, key, obj, hash):
+        self.event = event
+        self.device = device
+        self.kind = kind
+        self.key = key
+        self.obj = obj
+        self.hash = hash
+
+    def __repr__(self):
+        return "ChangeEvent(%s %s %s %r)"%(self.event, self.device, self.kind, self.key)
+
+def content_hash(obj_dict):
+    """
+        Returns a hash of the object that does not depend on the key order.
+    """
+    return hashlib.sha1(json.dumps(obj_dict, sort_keys=True, separators=(",", ":"))).hexdigest()
+
+class ChangeFeed(object):
+    """
+        sources     (AxObject class, key field) pairs to poll
+        path        optional file where the hashes are saved and loaded
+    """
+
+    def __init__(self, sources=DEFAULT_SOURCES, path=None):
+        self.sources = sources
+        self.path = path
+        self._hashes = {}
+        self._subscribers = []
+        self._lock = threading.Lock()
+        if path:
+            self.load()
+
+    def subscribe(self, callback):
+        """
+            callback(event) is called for each event of every poll.
+        """
+        self._subscribers.append(callback)
+
+    def poll(self, device):
+        """
+            Fetches the sources from the device bound to the calling thread
+            and returns the list of ChangeEvent since its previous poll.
+        """
+        events = []
+        for cls, key_field in self.sources:
+            try:
+                objects = cls.getAll()
+            except AxError:
+                objects = None
+            if objects is None:
+                continue
+            events.extend(self.diff(device, cls.__name__, key_field, objects))
+        for event in events:
+            for callback in self._subscribers:
+                callback(event)
+        return events
+
+    def pollDevice(self, device_ip, username, password, policy=None):
+        """
+            Same as poll() through a session of the device pool.
+        """
+        with session.get_pool(device_ip, username, password, policy=policy).session():
+            return self.poll(device_ip)
+
+    def diff(self, device, kind, key_field, objects):
+        """
+            Returns the events between the objects and the previous hashes of
+            (device, kind), and records the new hashes.
+        """
+        current = {}
+        by_key = {}
+        for obj in objects:
+            obj_dict = obj.getObjectDict()
+            key = obj_dict.get(key_field)
+            if key is None:
+                continue
+            current[key] = content_hash(obj_dict)
+            by_key[key] = obj
+        with self._lock:
+            previous = self._hashes.get((device, kind), {})
+            self._hashes[(device, kind)] = current
+        events = []
+        for key, h in current.iteritems():
+            old = previous.get(key)
+            if old is None:
+                events.append(ChangeEvent(EVENT_ADD, device, kind, key, by_key[key], h))
+            elif old != h:
+                events.append(ChangeEvent(EVENT_CHANGE, device, kind, key, by_key[key], h))
+        for key in previous:
+            if key not in current:
+                events.append(ChangeEvent(EVENT_REMOVE, device, kind, key, None, None))
+        return events
+
+    def forget(self, device):
+        """
+            Drops the hashes of a device, its next poll reports every object as added.
+        """
+        with self._lock:
+            for k in [k for k in self._hashes if k[0] == device]:
+                del self._hashes[k]
+
+    def save(self):
+        if not self.path:
+            raise AxError("no path to save the change feed to")
+        with self._lock:
+            # pairs rather than a dict, keys are not always strings
+            data = [[device, kind, hashes.items()] for (device, kind), hashes in self._hashes.iteritems()]
+        tmp_path = "%s.%d.tmp"%(self.path, os.getpid())
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.rename(tmp_path, self.path)
+
+    def load(self):
+        """
+            Loads the hashes saved by save(), a missing or unreadable file is
+            an empty feed.
+        """
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return
+        with self._lock:
+            self._hashes = dict(((device, kind), dict(hashes)) for device, kind, hashes in data)
@@ -0,0 +1,262 @@
+# -*- encoding: utf8 -*-
+"""
+    Executor module:  concurrent execution of synchronous SDK calls.
+        Future          result or error of a submitted call
+        Executor        worker threads running calls against many devices
+        wait            waits for a set of futures
+        as_completed    iterates over futures as they finish
+        error_message   text of an exception held by a future
+
+        Every call runs in a worker thread with a session of its device
+        bound to the thread (see session.SessionPool), so the usual static
+        and instance methods (VirtualServer.getAll(), group.update(), ...)
+        are simply submitted.  At most per_device calls run at the same time
+        on one device; calls waiting for a busy device do not hold a worker,
+        the workers pick the next call of another device instead.
+
+        The SDK methods report aXAPI errors as their return value (None or
+        an error code), the future holds that value.  Exceptions, such as
+        transport errors or a failed login, are held by the future and
+        raised by result().
+
+        Usage:
+            executor = Executor(workers=16, per_device=4)
+            executor.addDevice("10.0.0.1", "admin", "a10")
+            executor.addDevice("10.0.0.2", "admin", "a10")
+            futures = [executor.submit("10.0.0.1", group.update) for group in groups]
+            futures += [executor.submit(d, VirtualServer.getAll) for d in ("10.0.0.1", "10.0.0.2")]
+            for future in as_completed(futures):
+                print future.device, future.result()
+            executor.shutdown()
+"""
+
+import sys
+import threading
+import time
+from collections import deque
+
+import session
+from base import AxError, error_message
+
+class Future(object):
+    """
+        The pending result of a call submitted to an Executor.
+    """
+
+    def __init__(self, device):
+        self.device = device
+        self._done = threading.Event()
+        self._result = None
+        self._exc_info = None
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def done(self):
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """
+            Returns the value returned by the call, raises its exception, or
+            raises AxError when not done within timeout seconds.
+        """
+        if not self._done.wait(timeout):
+            raise AxError("call on %s not done within %s seconds"%(self.device, timeout))
+        if self._exc_info is not None:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+        return self._result
+
+    def exception(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise AxError("call on %s not done within %s seconds"%(self.device, timeout))
+        return self._exc_info[1] if self._exc_info is not None else None
+
+    def addDoneCallback(self, callback):
+        """
+            callback(future) is called when the call is done, at once if it
+            already is.
+        """
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _set(self, result=None, exc_info=None):
+        with self._lock:
+            self._result = result
+            self._exc_info = exc_info
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+class _Device(object):
+
+    def __init__(self, pool, limit):
+        self.pool = pool
+        self.limit = limit
+        self.active = 0
+        self.pending = deque()
+
+class Executor(object):
+    """
+        workers     worker threads shared by all devices
+        per_device  maximum concurrent calls, and sessions, on one device
+    """
+
+    def __init__(self, workers=8, per_device=4, policy=None):
+        self.per_device = per_device
+        self.policy = policy
+        self._devices = {}
+        self._ready = deque()
+        self._cond = threading.Condition()
+        self._shutdown = False
+        self._threads = []
+        for i in range(workers):
+            t = threading.Thread(target=self._worker, name="axapi-executor-%d"%i)
+            t.daemon = True
+            t.start()
+            self._threads.append(t)
+
+    def addDevice(self, device_ip, username, password, limit=None):
+        """
+            Registers the credentials of a device, limit overrides per_device.
+        """
+        limit = limit or self.per_device
+        pool = session.get_pool(device_ip, username, password, max_sessions=limit, policy=self.policy)
+        with self._cond:
+            previous = self._devices.get(device_ip)
+            self._devices[device_ip] = _Device(pool, limit)
+        if previous is not None:
+            session.release_pool(previous.pool)
+
+    def submit(self, device_ip, fn, *args, **kwargs):
+        """
+            Schedules fn(*args, **kwargs) on the device, returns its Future.
+        """
+        future = Future(device_ip)
+        with self._cond:
+            if self._shutdown:
+                raise AxError("executor is shut down")
+            device = self._devices.get(device_ip)
+            if device is None:
+                raise AxError("unknown device %s, see addDevice"%device_ip)
+            device.pending.append((future, fn, args, kwargs))
+            if device.active < device.limit and len(device.pending) == 1:
+                self._ready.append(device_ip)
+            self._cond.notify()
+        return future
+
+    def map(self, device_ip, fn, iterable):
+        """
+            Submits fn(item) for each item, returns the futures in order.
+        """
+        return [self.submit(device_ip, fn, item) for item in iterable]
+
+    def broadcast(self, fn, *args, **kwargs):
+        """
+            Submits the call to every device, returns {device_ip: future}.
+        """
+        with self._cond:
+            devices = self._devices.keys()
+        return dict((d, self.submit(d, fn, *args, **kwargs)) for d in devices)
+
+    def shutdown(self, wait=True):
+        """
+            Stops the workers once the submitted calls are done, and gives
+            back the session pools of the devices: their sessions are logged
+            out unless another user of the pools still holds them.
+        """
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+        if wait:
+            for t in self._threads:
+                t.join()
+            with self._cond:
+                devices = self._devices.values()
+            for device in devices:
+                session.release_pool(device.pool)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def _next(self):
+        """
+            Returns the next (device, task) with a free slot, None at shutdown.
+        """
+        with self._cond:
+            while not self._ready:
+                if self._shutdown and not any(d.pending or d.active for d in self._devices.itervalues()):
+                    return None
+                self._cond.wait(1.0)
+            device_ip = self._ready.popleft()
+            device = self._devices[device_ip]
+            task = device.pending.popleft()
+            device.active += 1
+            # round robin: the device goes back to the end of the queue
+            if device.pending and device.active < device.limit:
+                self._ready.append(device_ip)
+            return device, device_ip, task
+
+    def _finished(self, device, device_ip):
+        with self._cond:
+            device.active -= 1
+            if device.pending and device.active == device.limit - 1:
+                self._ready.append(device_ip)
+            self._cond.notify_all()
+
+    def _worker(self):
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            device, device_ip, (future, fn, args, kwargs) = item
+            try:
+                with device.pool.session():
+                    result = fn(*args, **kwargs)
+            except Exception:
+                future._set(exc_info=sys.exc_info())
+            else:
+                future._set(result)
+            finally:
+                self._finished(device, device_ip)
+
+def wait(futures, timeout=None):
+    """
+        Waits until all futures are done or timeout expires, returns the
+        (done, not_done) lists.
+    """
+    deadline = None if timeout is None else time.time() + timeout
+    for future in futures:
+        remaining = None if deadline is None else max(0, deadline - time.time())
+        if not future._done.wait(remaining):
+            break
+    done = [f for f in futures if f.done()]
+    return done, [f for f in futures if not f.done()]
+
+def as_completed(futures, timeout=None):
+    """
+        Yields the futures as they finish, raises AxError on timeout.
+    """
+    finished = deque()
+    cond = threading.Condition()
+    def on_done(future):
+        with cond:
+            finished.append(future)
+            cond.notify()
+    for future in futures:
+        future.addDoneCallback(on_done)
+    deadline = None if timeout is None else time.time() + timeout
+    for i in range(len(futures)):
+        with cond:
+            while not finished:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    raise AxError("%d calls not done within %s seconds"%(len(futures) - i, timeout))
+                cond.wait(remaining)
+            future = finished.popleft()
+        yield future
@@ -15,6 +15,8 @@
     Date   : 03/06/2012
 """
 
+import json
+
 import method_call
 from  base import AxObject, AxAPIError
 
@@ -91,12 +93,12 @@ class GslbSite(AxObject):
         AxObject._set_properties(self, **params)
 
     @staticmethod
-    def getAll():
+    def getAll(fields = None):
         """ method : gslb.site.getAll
             Returns a list of GSLB sites in GslbSite instance.
         """
         try:
-            res = method_call.call_api(GslbSite(), method = "gslb.site.getAll", format = "json")
+            res = method_call.call_api(GslbSite(), method = "gslb.site.getAll", format = "json", _fields = fields)
             site_list = []
             for item in res["gslb_site_list"]:
                 site_list.append( GslbSite(**item) )
@@ -209,12 +211,12 @@ class GslbZone(AxObject):
     __xml_convrt__ = {"zone_list": "zone", "dns_mx_record_list": "dns_mx_record", "dns_ns_record_list": "dns_ns_record", "service_list": "service"}
 
     @staticmethod
-    def getAll():
+    def getAll(fields = None):
         """ method : gslb.zone.getAll
             Returns a list of GSLB zones in GslbZone instance.
         """
         try:
-            res = method_call.call_api(GslbZone(), method = "gslb.zone.getAll", format = "json")
+            res = method_call.call_api(GslbZone(), method = "gslb.zone.getAll", format = "json", _fields = fields)
             zone_list = []
             for item in res["zone_list"]:
                 zone_list.append( GslbZone(**item) )
@@ -249,6 +251,7 @@ class GslbZone(AxObject):
         """
         try:
             method_call.call_api(self, method = "gslb.zone.delete", format = "json", name = self.name) 
+            return 0
         except AxAPIError, e:
             return e.code
 
@@ -261,7 +264,31 @@ class GslbZone(AxObject):
             return 0
         except AxAPIError, e:
             return e.code 
-# gslb.zone.service.create/update/delete
+
+    def createService(self, service):
+        """ method: gslb.zone.service.create
+            Add a service, a dictionary as in service_list, to the GSLB zone.
+        """
+        return self._callService("gslb.zone.service.create", service)
+
+    def updateService(self, service):
+        """ method: gslb.zone.service.update
+            Replace the service of the GSLB zone with the same name and port.
+        """
+        return self._callService("gslb.zone.service.update", service)
+
+    def deleteService(self, service):
+        """ method: gslb.zone.service.delete
+            Delete the service of the GSLB zone with the name and port of service.
+        """
+        return self._callService("gslb.zone.service.delete", {"name": service["name"], "port": service["port"]})
+
+    def _callService(self, method, service):
+        try:
+            method_call.call_api(self, method = method, format = "json", post_data = json.dumps({"name": self.name, "service": service}))
+            return 0
+        except AxAPIError, e:
+            return e.code
 
 class GslbDnsProxy(AxObject):
     """
@@ -322,12 +349,12 @@ class GslbDnsProxy(AxObject):
     __xml_convrt__ = {"gslb_vserver_list": "gslb_vserver", "vport_list": "vport"}
 
     @staticmethod
-    def getAll():
+    def getAll(fields = None):
         """ method : gslb.dns_proxy.getAll
             Returns a list of GSLB DNS-proxy in GslbDnsProxy instance.
         """
         try:
-            res = method_call.call_api(GslbDnsProxy(), method = "gslb.dns_proxy.getAll", format = "json")
+            res = method_call.call_api(GslbDnsProxy(), method = "gslb.dns_proxy.getAll", format = "json", _fields = fields)
             dns_proxy_list = []
             for item in res["gslb_vserver_list"]:
                 dns_proxy_list.append( GslbDnsProxy(**item) )
@@ -515,12 +542,12 @@ class GslbPolicy(AxObject):
         AxObject._set_properties(self, **params)
 
     @staticmethod
-    def getAll():
+    def getAll(fields = None):
         """ method : gslb.policy.getAll
             Returns a list of GSLB policy in GslbPolicy instance.
         """
         try:
-            res = method_call.call_api(GslbPolicy(), method = "gslb.policy.getAll", format = "json")
+            res = method_call.call_api(GslbPolicy(), method = "gslb.policy.getAll", format = "json", _fields = fields)
             policy_list = []
             for item in res["policy_list"]:
                 policy_list.append( GslbPolicy(**item) )
@@ -612,12 +639,12 @@ class GslbServiceIP(AxObject):
     __xml_convrt__ = {"service_ip_list": "service_ip", "port_list": "port"}
 
     @staticmethod
-    def getAll():
+    def getAll(fields = None):
         """ method : gslb.service_ip.getAll
             Returns a list of GSLB service_ip in GslbServiceIP instance.
         """
         try:
-            res = method_call.call_api(GslbServiceIP(), method = "gslb.service_ip.getAll", format = "json")
+            res = method_call.call_api(GslbServiceIP(), method = "gslb.service_ip.getAll", format = "json", _fields = fields)
             policy_list = []
             for item in res["service_ip_list"]:
                 policy_list.append( GslbServiceIP(**item) )
@@ -715,12 +742,12 @@ class GslbSnmpTemplate(AxObject):
     __xml_convrt__ = {"snmp_template_list": "snmp_template"}
 
     @staticmethod
-    def getAll():
+    def getAll(fields = None):
         """ method : gslb.snmp_template.getAll
             Returns a list of GSLB service_ip in GslbSnmpTemplate instance.
         """
         try:
-            res = method_call.call_api(GslbSnmpTemplate(), method = "gslb.snmp_template.getAll", format = "json")
+            res = method_call.call_api(GslbSnmpTemplate(), method = "gslb.snmp_template.getAll", format = "json", _fields = fields)
             temp_list = []
             for item in res["snmp_template_list"]:
                 temp_list.append( GslbSnmpTemplate(**item) )
@@ -0,0 +1,344 @@
+# -*- encoding: utf8 -*-
+"""
+    GSLB health module:  health of the GSLB service IPs aggregated across sites.
+        ServiceHealth   state of a service IP behind one SLB device of a site
+        HealthEvent     a state change seen by a refresh
+        HealthMap       periodic, incremental refresh of the global map
+
+        The GSLB service IPs and sites are read from the controllers, the
+        first controller answering being used, and give the SLB devices of
+        every site (slb_device_list) with the service IPs they serve
+        (vip_server_list).  The virtual server statistics of those SLB
+        devices are fetched concurrently and joined in memory with the
+        service IPs, on the address, or on the name when no virtual server
+        has the address.
+
+        Each refresh only fetches the statistics, the configuration is read
+        again every config_interval seconds.  The entries of a device are
+        only replaced when its statistics are received, a device that fails
+        keeps its previous entries with stale set.  Subscribers get one
+        HealthEvent per entry whose state changed.
+
+        Usage:
+            health = HealthMap([("10.0.0.1", "admin", "a10")], slb_credentials={"default": ("admin", "a10")},
+                               interval=10)
+            health.subscribe(lambda event: alert(event))
+            health.start()
+            for name, entries in health.snapshot().iteritems():
+                print name, [(e.site, e.state) for e in entries]
+            health.close()
+"""
+
+import threading
+import time
+
+import executor
+from base import AxError
+from gslb import GslbServiceIP, GslbSite
+from slb import VirtualServerStats
+
+STATE_UP = "up"
+STATE_PARTIAL = "partial"
+STATE_DOWN = "down"
+STATE_DISABLED = "disabled"
+STATE_UNKNOWN = "unknown"
+
+# virtual server and virtual port status codes of the statistics
+_STATUS_STATES = {0: STATE_DISABLED, 1: STATE_UP, 2: STATE_PARTIAL, 3: STATE_PARTIAL, 4: STATE_DOWN, 5: STATE_UNKNOWN}
+
+STATS_FIELDS = ("name", "address", "status", "cur_conns", "vport_stat_list")
+
+class ServiceHealth(object):
+    """
+        ports maps the port numbers of the service IP to their state.
+    """
+    __slots__ = ("name", "address", "site", "slb_device", "slb_address", "virtual_server",
+                 "state", "ports", "cur_conns", "updated", "stale")
+
+    def __init__(self, name, address, site, slb_device, slb_address, virtual_server=None,
+                 state=STATE_UNKNOWN, ports=None, cur_conns=None, updated=None):
+        self.name = name
+        self.address = address
+        self.site = site
+        self.slb_device = slb_device
+        self.slb_address = slb_address
+        self.virtual_server = virtual_server
+        self.state = state
+        self.ports = ports or {}
+        self.cur_conns = cur_conns
+        self.updated = updated
+        self.stale = False
+
+    def key(self):
+        return (self.name, self.site, self.slb_device)
+
+    def toDict(self):
+        return dict((k, getattr(self, k)) for k in self.__slots__)
+
+    def __repr__(self):
+        return "ServiceHealth(%s %s/%s %s)"%(self.name, self.site, self.slb_device, self.state)
+
+class HealthEvent(object):
+    __slots__ = ("entry", "previous")
+
+    def __init__(self, entry, previous):
+        self.entry = entry
+        self.previous = previous
+
+    def __repr__(self):
+        return "HealthEvent(%s %s -> %s)"%(self.entry.name, self.previous, self.entry.state)
+
+def _state(status):
+    try:
+        return _STATUS_STATES.get(int(status), STATE_UNKNOWN)
+    except (TypeError, ValueError):
+        return STATE_UNKNOWN
+
+def _enabled(obj_dict):
+    return str(obj_dict.get("status", 1)) != "0"
+
+def fetch_config():
+    """
+        Returns the (service IPs, sites) dictionaries of the controller bound
+        to the calling thread.  Raises AxError when a getAll fails.
+    """
+    service_ips = GslbServiceIP.getAll(("name", "ip_address", "status", "port_list"))
+    sites = GslbSite.getAll(("name", "status", "slb_device_list"))
+    if service_ips is None or sites is None:
+        raise AxError("GSLB configuration could not be read")
+    return [s.getObjectDict() for s in service_ips], [s.getObjectDict() for s in sites]
+
+def fetch_stats():
+    """
+        Returns the virtual server statistics of the SLB device bound to the
+        calling thread.  Raises AxError when they cannot be read.
+    """
+    stats = VirtualServerStats.getAll(STATS_FIELDS)
+    if stats is None:
+        raise AxError("virtual server statistics could not be read")
+    return [s.getObjectDict() for s in stats]
+
+def join(service_ips, site, slb_device, stats, now=None):
+    """
+        Returns the ServiceHealth of the service IPs listed by an SLB device
+        of a site, from the virtual server statistics of the device.
+    """
+    by_address = dict((vs.get("address"), vs) for vs in stats)
+    by_name = dict((vs.get("name"), vs) for vs in stats)
+    entries = []
+    for vip in slb_device.get("vip_server_list") or ():
+        service_ip = service_ips.get(vip.get("name")) or {}
+        entry = ServiceHealth(vip.get("name"), service_ip.get("ip_address"), site.get("name"),
+                              slb_device.get("name"), slb_device.get("ip_addr"), updated=now)
+        vs = by_address.get(entry.address) or by_name.get(entry.name)
+        if not _enabled(site) or (service_ip and not _enabled(service_ip)):
+            entry.state = STATE_DISABLED
+        elif vs is not None:
+            entry.virtual_server = vs.get("name")
+            entry.state = _state(vs.get("status"))
+            entry.cur_conns = vs.get("cur_conns")
+            vports = dict((str(p.get("port")), p) for p in vs.get("vport_stat_list") or ())
+            for port in service_ip.get("port_list") or ():
+                vport = vports.get(str(port.get("port_num")))
+                if not _enabled(port):
+                    entry.ports[port.get("port_num")] = STATE_DISABLED
+                else:
+                    entry.ports[port.get("port_num")] = _state(vport.get("status")) if vport else STATE_DOWN
+        entries.append(entry)
+    return entries
+
+class HealthMap(object):
+    """
+        controllers     list of (device_ip, username, password) of the GSLB controllers
+        slb_credentials {device_ip: (username, password)} of the SLB devices,
+                        "default" for the others; the credentials of the
+                        first controller without it
+        interval        seconds between two refreshes of the statistics
+        config_interval seconds between two reads of the GSLB configuration
+    """
+
+    def __init__(self, controllers, slb_credentials=None, interval=10, config_interval=300,
+                 workers=8, policy=None):
+        self.controllers = list(controllers)
+        self.slb_credentials = dict(slb_credentials or {})
+        self.slb_credentials.setdefault("default", tuple(self.controllers[0][1:]))
+        self.interval = interval
+        self.config_interval = config_interval
+        self._executor = executor.Executor(workers, per_device=1, policy=policy)
+        for device_ip, username, password in self.controllers:
+            self._executor.addDevice(device_ip, username, password)
+        self._devices = set(d[0] for d in self.controllers)
+        self._service_ips = {}
+        self._sites = []
+        self._config_read = None
+        self._entries = {}
+        self._errors = {}
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback):
+        """
+            callback(event) is called for each HealthEvent of every refresh.
+        """
+        self._subscribers.append(callback)
+
+    def refreshConfig(self):
+        """
+            Reads the service IPs and sites from the first controller that
+            answers.  Returns True on success, the previous configuration is
+            kept otherwise.
+        """
+        for device_ip, username, password in self.controllers:
+            try:
+                service_ips, sites = self._executor.submit(device_ip, fetch_config).result()
+            except Exception, e:
+                self._setError(device_ip, executor.error_message(e))
+                continue
+            with self._lock:
+                self._errors.pop(device_ip, None)
+                self._service_ips = dict((s.get("name"), s) for s in service_ips)
+                self._sites = sites
+                self._config_read = time.time()
+            return True
+        return False
+
+    def refresh(self):
+        """
+            Fetches the statistics of all SLB devices concurrently, rereading
+            the configuration first when it is older than config_interval.
+            Returns the list of HealthEvent.
+        """
+        if self._config_read is None or time.time() - self._config_read >= self.config_interval:
+            self.refreshConfig()
+        with self._lock:
+            service_ips, sites = self._service_ips, self._sites
+        targets = {}
+        for site in sites:
+            for slb_device in site.get("slb_device_list") or ():
+                if slb_device.get("ip_addr"):
+                    targets.setdefault(slb_device["ip_addr"], []).append((site, slb_device))
+        futures = [self._executor.submit(self._device(address), fetch_stats) for address in targets]
+        events = []
+        for future in executor.as_completed(futures):
+            address = future.device
+            try:
+                stats = future.result()
+                now = time.time()
+                entries = []
+                for site, slb_device in targets[address]:
+                    entries.extend(join(service_ips, site, slb_device, stats, now))
+            except Exception, e:
+                self._setError(address, executor.error_message(e))
+                self._markStale(address)
+                continue
+            self._setError(address, None)
+            events.extend(self._store(address, entries))
+        with self._lock:
+            # devices no longer listed by any site
+            for address in [a for a in self._entries if a not in targets]:
+                del self._entries[address]
+        for event in events:
+            for callback in self._subscribers:
+                try:
+                    callback(event)
+                except Exception, e:
+                    self._setError("subscriber", executor.error_message(e))
+        return events
+
+    def _device(self, address):
+        if address not in self._devices:
+            username, password = self.slb_credentials.get(address, self.slb_credentials["default"])
+            self._executor.addDevice(address, username, password)
+            self._devices.add(address)
+        return address
+
+    def _store(self, address, entries):
+        with self._lock:
+            previous = dict((e.key(), e) for e in self._entries.get(address, ()))
+            self._entries[address] = entries
+        events = []
+        for entry in entries:
+            old = previous.get(entry.key())
+            if old is None or old.state != entry.state:
+                events.append(HealthEvent(entry, old.state if old is not None else None))
+        return events
+
+    def _setError(self, key, message):
+        # message None clears the error
+        with self._lock:
+            if message is None:
+                self._errors.pop(key, None)
+            else:
+                self._errors[key] = message
+
+    def _markStale(self, address):
+        with self._lock:
+            for entry in self._entries.get(address, ()):
+                entry.stale = True
+
+    def start(self):
+        """
+            Refreshes now, then every interval seconds in a background thread.
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="gslb-health")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """
+            Stops the refreshes and logs out of the devices.
+        """
+        self.stop()
+        self._executor.shutdown()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+                self._setError("refresh", None)
+            except Exception, e:
+                self._setError("refresh", executor.error_message(e))
+            self._stop.wait(self.interval)
+
+    def entries(self):
+        with self._lock:
+            return [e for entries in self._entries.itervalues() for e in entries]
+
+    def snapshot(self):
+        """
+            Returns {service IP name: [ServiceHealth]}, one per SLB device
+            serving it.
+        """
+        result = {}
+        for entry in self.entries():
+            result.setdefault(entry.name, []).append(entry)
+        return result
+
+    def summary(self):
+        """
+            Returns {state: number of service IPs}, a service IP being up when
+            one of its SLB devices is up.
+        """
+        order = (STATE_UP, STATE_PARTIAL, STATE_DOWN, STATE_UNKNOWN, STATE_DISABLED)
+        result = dict.fromkeys(order, 0)
+        for name, entries in self.snapshot().iteritems():
+            result[min((e.state for e in entries), key=order.index)] += 1
+        return result
+
+    def errors(self):
+        """
+            Returns {device: error} of the devices that failed their last read,
+            with the last error of a subscriber under "subscriber" and of a
+            refresh that failed as a whole under "refresh".
+        """
+        with self._lock:
+            return dict(self._errors)
@@ -0,0 +1,204 @@
+# -*- encoding: utf8 -*-
+"""
+    GSLB propagation module:  one GSLB configuration pushed to many controllers.
+        KINDS               the propagated classes, in the order they are written
+        ControllerResult    changes, failures and drift of one controller
+        plan_kind           diff of the desired objects of a class with a controller
+        Propagator          pushes a desired GslbState and verifies convergence
+
+        The desired state is a gslb_sim.GslbState, fetched from a reference
+        controller or built from dictionaries.  Every controller is read
+        concurrently, only the objects that differ from the desired ones are
+        created or updated, then every controller is read back with getAll
+        and the objects still differing are reported as its drift.  An
+        object differs when one of the fields of the desired object has
+        another value on the controller, the fields the desired object
+        leaves out are not compared.
+
+        Service IPs are written before the sites that list them and policies
+        before the zones that use them: the controllers are written in one
+        stage per class, each stage running on all controllers at once.
+        With prune, the objects that are not desired are deleted, in the
+        reverse order.
+
+        Usage:
+            with session.get_pool("10.0.0.1", "admin", "a10").session():
+                desired = GslbState.fetch()
+            propagator = Propagator([("10.0.0.2", "admin", "a10"), ("10.0.0.3", "admin", "a10")])
+            for device, result in propagator.push(desired).iteritems():
+                print device, result.error, result.changes, result.failures, result.drift
+            propagator.close()
+"""
+
+import executor
+from base import AxError
+from changefeed import content_hash
+from gslb import GslbPolicy, GslbServiceIP, GslbSite, GslbZone
+from gslb_sim import GslbState
+
+# (GslbState attribute, class)
+KINDS = (
+    ("service_ips", GslbServiceIP),
+    ("sites", GslbSite),
+    ("policies", GslbPolicy),
+    ("zones", GslbZone),
+)
+
+class ControllerResult(object):
+    """
+        error       why the controller could not be read, None otherwise
+        changes     {kind: [(operation, name)]} sent to the controller
+        failures    list of (kind, operation, name, error code or message)
+        drift       {kind: [name]} still differing after the push, None when
+                    the controller could not be read back
+    """
+
+    def __init__(self, device, error=None):
+        self.device = device
+        self.error = error
+        self.changes = {}
+        self.failures = []
+        self.drift = None
+
+    def converged(self):
+        return self.error is None and not self.failures and self.drift is not None \
+            and not any(self.drift.itervalues())
+
+def _canonical(value):
+    # the controllers return empty lists and dictionaries for unset fields
+    if value in ([], {}, None, ""):
+        return None
+    return value
+
+def differs(desired, current):
+    """
+        True when a field of the desired object has another value in the
+        current one.
+    """
+    want = dict((k, _canonical(v)) for k, v in desired.iteritems())
+    have = dict((k, _canonical(current.get(k))) for k in desired)
+    return content_hash(want) != content_hash(have)
+
+def plan_kind(desired, current, prune=False):
+    """
+        Returns the (create, update, delete) names turning the current
+        {name: dictionary} of a class into the desired one.
+    """
+    create = sorted(name for name in desired if name not in current)
+    update = sorted(name for name in desired if name in current and differs(desired[name], current[name]))
+    delete = sorted(name for name in current if name not in desired) if prune else []
+    return create, update, delete
+
+def fetch_state():
+    """
+        Returns the GslbState of the controller bound to the calling thread.
+    """
+    return GslbState.fetch()
+
+class Propagator(object):
+    """
+        controllers list of (device_ip, username, password)
+        workers     calls running at the same time on all controllers
+        per_device  calls running at the same time on one controller
+    """
+
+    def __init__(self, controllers, workers=8, per_device=4, policy=None):
+        self.devices = [c[0] for c in controllers]
+        self._executor = executor.Executor(workers, per_device=per_device, policy=policy)
+        for device_ip, username, password in controllers:
+            self._executor.addDevice(device_ip, username, password)
+
+    def drift(self, desired, prune=False):
+        """
+            Reads every controller and returns {device: ControllerResult}
+            with the objects differing from the desired state, and with
+            prune the objects that are not desired, without changing
+            anything.
+        """
+        results = dict((d, ControllerResult(d)) for d in self.devices)
+        self._verify(desired, results, self.devices, prune)
+        return results
+
+    def push(self, desired, prune=False):
+        """
+            Writes the desired state to every controller, reads them back and
+            returns {device: ControllerResult}.
+        """
+        results = {}
+        plans = {}
+        for device, state in self._read(self.devices):
+            if isinstance(state, Exception):
+                results[device] = ControllerResult(device, executor.error_message(state))
+                continue
+            try:
+                plans[device] = dict((kind, plan_kind(getattr(desired, kind), getattr(state, kind), prune))
+                                     for kind, cls in KINDS)
+            except Exception, e:
+                results[device] = ControllerResult(device, executor.error_message(e))
+                continue
+            results[device] = ControllerResult(device)
+        for kind, cls in KINDS:
+            self._stage(desired, results, plans, kind, cls, ("create", "update"))
+        if prune:
+            for kind, cls in reversed(KINDS):
+                self._stage(desired, results, plans, kind, cls, ("delete",))
+        self._verify(desired, results, plans.keys(), prune)
+        return results
+
+    def close(self):
+        """
+            Logs out of the controllers.
+        """
+        self._executor.shutdown()
+
+    def _read(self, devices):
+        """
+            Yields (device, GslbState or the exception raised by the read) as
+            the controllers are read.
+        """
+        for future in executor.as_completed([self._executor.submit(d, fetch_state) for d in devices]):
+            try:
+                yield future.device, future.result()
+            except Exception, e:
+                yield future.device, e
+
+    def _stage(self, desired, results, plans, kind, cls, operations):
+        calls = []
+        for device, plan in plans.iteritems():
+            create, update, delete = plan[kind]
+            names = {"create": create, "update": update, "delete": delete}
+            for op in operations:
+                for name in names[op]:
+                    results[device].changes.setdefault(kind, []).append((op, name))
+                    try:
+                        obj = cls(name=name) if op == "delete" else cls(**_params(getattr(desired, kind)[name]))
+                    except Exception, e:
+                        results[device].failures.append((kind, op, name, executor.error_message(e)))
+                        continue
+                    calls.append((device, op, name, self._executor.submit(device, getattr(obj, op))))
+        for device, op, name, future in calls:
+            try:
+                code = future.result()
+            except Exception, e:
+                code = executor.error_message(e)
+            if code:
+                results[device].failures.append((kind, op, name, code))
+
+    def _verify(self, desired, results, devices, prune=False):
+        for device, state in self._read(devices):
+            if isinstance(state, Exception):
+                results[device].error = results[device].error or executor.error_message(state)
+                continue
+            try:
+                drift = {}
+                for kind, cls in KINDS:
+                    create, update, delete = plan_kind(getattr(desired, kind), getattr(state, kind), prune)
+                    drift[kind] = create + update + delete
+            except Exception, e:
+                results[device].error = results[device].error or executor.error_message(e)
+                continue
+            results[device].drift = drift
+
+def _params(obj_dict):
+    # keyword arguments must be str in Python 2
+    return dict((str(k), v) for k, v in obj_dict.iteritems())
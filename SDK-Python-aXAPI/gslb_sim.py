@@ -0,0 +1,428 @@
+# -*- encoding: utf8 -*-
+"""
+    GSLB simulation module:  offline prediction of the GSLB answers of a policy.
+        GslbState       zones, policies, sites and service IPs of a controller
+        QuerySet        recorded or synthetic client queries
+        Simulator       answer probabilities of the queries under the policies
+        Prediction      answers per query and per service IP
+
+        The state is fetched once with getAll, or built from dictionaries, and
+        edited locally, e.g. state.policies["default"]["metric"]["weighted_site"]
+        = {"enabled": 1}, to see the effect of a change before pushing it.
+
+        A query is the queried name and the region of the client, e.g.
+        ("www.example.com", "eu").  The name selects the zone, the longest
+        matching suffix, and the service of the zone with the remaining
+        label.  The answer only depends on (name, region), so the selection
+        runs once per distinct pair and the queries are only counted and
+        sampled, with numpy when it is installed and with the array module
+        otherwise.
+
+        The metrics are applied in METRIC_ORDER, or in the order of the
+        "metric_order" list of the policy.  The filtering metrics narrow the
+        candidates, the first enabled weighted metric draws the answer in
+        proportion to the weights, the remaining candidates are answered in
+        round robin otherwise.  Metrics depending on live measures use the
+        measures given to the Simulator and are skipped without them:
+            health_check        status of the service IP, its port and its site,
+                                and the service IPs given as down
+            geo_graphic         regions of the sites
+            session_capacity    current sessions of the service IPs against
+                                max_client of their SLB device
+            num_sessions        current sessions of the service IPs
+            active_rrt          round trip times from a region to a site
+            admin_preference    admin_preference of the SLB device
+            orderid_ip          first address record
+            weighted_ip         weight of the address record
+            weighted_site       weight of the site
+            round_robin         the default, nothing to apply
+        num_session and ordered_ip are accepted for num_sessions and
+        orderid_ip.  Other enabled metrics, in the order or not, are not
+        simulated and are listed in Simulator.ignored.
+
+        Usage:
+            state = GslbState.fetch()               # device bound to the thread
+            state.policies["default"]["metric"]["geo_graphic"] = {"enabled": 1}
+            sim = Simulator(state, site_regions={"site1": "eu", "site2": "us"})
+            queries = QuerySet.synthetic([("www.example.com", "eu"), ("www.example.com", "us")], 1000000)
+            prediction = sim.run(queries)
+            print prediction.shares()
+"""
+
+import random
+from array import array
+from bisect import bisect
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from base import AxError
+from gslb import GslbPolicy, GslbServiceIP, GslbSite, GslbZone
+
+METRIC_ORDER = ("health_check", "geo_graphic", "weighted_ip", "active_servers", "weighted_site",
+                "session_capacity", "active_rrt", "num_sessions", "connection_load", "admin_preference",
+                "bandwidth_cost", "least_response", "orderid_ip")
+
+# other spellings of the metric names
+METRIC_ALIASES = {"num_session": "num_sessions", "ordered_ip": "orderid_ip"}
+
+def _dicts(objects, key="name"):
+    result = {}
+    for obj in objects or ():
+        obj_dict = obj if isinstance(obj, dict) else obj.getObjectDict()
+        result[obj_dict.get(key)] = obj_dict
+    return result
+
+def _enabled(value):
+    try:
+        return int(value) != 0
+    except (TypeError, ValueError):
+        return False
+
+class GslbState(object):
+    """
+        {name: dictionary} of the zones, policies, sites and service IPs.
+    """
+
+    def __init__(self, zones=(), policies=(), sites=(), service_ips=()):
+        self.zones = _dicts(zones)
+        self.policies = _dicts(policies)
+        self.sites = _dicts(sites)
+        self.service_ips = _dicts(service_ips)
+
+    @staticmethod
+    def fetch():
+        """
+            Returns the state of the device bound to the calling thread.
+            Raises AxError when a getAll fails.
+        """
+        lists = []
+        for cls in (GslbZone, GslbPolicy, GslbSite, GslbServiceIP):
+            objects = cls.getAll()
+            if objects is None:
+                raise AxError("%s.getAll failed"%cls.__name__)
+            lists.append(objects)
+        return GslbState(*lists)
+
+    def service(self, qname):
+        """
+            Returns (zone, service) answering the queried name, None when no
+            zone or service matches.
+        """
+        qname = qname.rstrip(".").lower()
+        labels = qname.split(".")
+        for i in range(1, len(labels)):
+            zone = self.zones.get(".".join(labels[i:]))
+            if zone is None:
+                continue
+            name = ".".join(labels[:i])
+            for service in zone.get("service_list") or ():
+                if str(service.get("name", "")).lower() == name:
+                    return zone, service
+            return None
+        return None
+
+    def locations(self):
+        """
+            Returns {service IP name: (site, SLB device)} from the
+            slb_device_list of the sites.
+        """
+        result = {}
+        for site in self.sites.itervalues():
+            for device in site.get("slb_device_list") or ():
+                for vip in device.get("vip_server_list") or ():
+                    result.setdefault(vip.get("name"), (site, device))
+            for server in site.get("ip_server_list") or ():
+                result.setdefault(server.get("name"), (site, {}))
+        return result
+
+class _Candidate(object):
+    __slots__ = ("name", "order", "record", "service_ip", "site", "device")
+
+    def __init__(self, name, order, record, service_ip, site, device):
+        self.name = name
+        self.order = order
+        self.record = record
+        self.service_ip = service_ip
+        self.site = site
+        self.device = device
+
+class Simulator(object):
+    """
+        site_regions    {site name: region} for geo_graphic
+        sessions        {service IP name: current sessions}
+        rtt             {(region, site name): round trip time}
+        down            names of service IPs to consider down
+    """
+
+    def __init__(self, state, site_regions=None, sessions=None, rtt=None, down=()):
+        self.state = state
+        self.site_regions = site_regions or {}
+        self.sessions = sessions or {}
+        self.rtt = rtt or {}
+        self.down = frozenset(down)
+        self.ignored = set()
+        self._locations = state.locations()
+        self._cache = {}
+
+    def distribution(self, qname, region=None):
+        """
+            Returns the [(service IP name, probability)] of the answers to a
+            query, empty when it is not answered.
+        """
+        key = (qname, region)
+        if key not in self._cache:
+            self._cache[key] = self._select(qname, region)
+        return self._cache[key]
+
+    def run(self, queries, sample=False, seed=None):
+        """
+            Returns the Prediction of a QuerySet: the expected number of
+            answers of each service IP, or with sample a random draw of them.
+        """
+        counts = queries.counts()
+        prediction = Prediction()
+        rng = None
+        if sample:
+            rng = numpy.random.RandomState(seed) if numpy is not None else random.Random(seed)
+        for group, count in zip(queries.groups, counts):
+            if not count:
+                continue
+            dist = self.distribution(*group)
+            if not dist:
+                prediction.add(group, None, count)
+                continue
+            names = [name for name, p in dist]
+            if rng is None:
+                answers = [count * p for name, p in dist]
+            elif numpy is not None:
+                answers = rng.multinomial(count, [p for name, p in dist]).tolist()
+            else:
+                answers = _multinomial(rng, count, [p for name, p in dist])
+            for name, n in zip(names, answers):
+                prediction.add(group, name, n)
+        return prediction
+
+    def _select(self, qname, region):
+        found = self.state.service(qname)
+        if found is None:
+            return []
+        zone, service = found
+        policy = self.state.policies.get(service.get("policy") or zone.get("policy") or "default") or {}
+        metric = dict((METRIC_ALIASES.get(k, k), v) for k, v in (policy.get("metric") or {}).iteritems())
+        metric_order = [METRIC_ALIASES.get(name, name) for name in policy.get("metric_order") or METRIC_ORDER]
+        for name, options in metric.iteritems():
+            if name not in metric_order and name != "round_robin" and _enabled((options or {}).get("enabled")):
+                self.ignored.add(name)
+        port = service.get("port")
+        candidates = []
+        for order, record in enumerate(service.get("dns_address_record_list") or ()):
+            if _enabled(record.get("no_response")):
+                continue
+            name = record.get("vip_order")
+            site, device = self._locations.get(name, ({}, {}))
+            candidates.append(_Candidate(name, order, record, self.state.service_ips.get(name) or {}, site, device))
+        weights = None
+        for name in metric_order:
+            if name == "health_check":
+                # health checks are on by default
+                if _enabled((metric.get(name) or {"enabled": 1}).get("enabled")):
+                    candidates = [c for c in candidates if self._up(c, port)]
+                continue
+            options = metric.get(name) or {}
+            if not _enabled(options.get("enabled")) or len(candidates) < 2:
+                continue
+            if name == "weighted_ip":
+                weights = [_weight(c.record.get("weight")) for c in candidates]
+            elif name == "weighted_site":
+                weights = [_weight(c.site.get("weight")) for c in candidates]
+            elif name == "geo_graphic":
+                candidates = self._narrow(candidates, lambda c: self.site_regions.get(c.site.get("name")) == region)
+            elif name == "session_capacity":
+                threshold = float(options.get("threshold", 90))
+                candidates = self._narrow(candidates, lambda c: self._usage(c) < threshold)
+            elif name == "num_sessions":
+                candidates = self._closest(candidates, lambda c: self.sessions.get(c.name), options.get("tolerance", 0))
+            elif name == "active_rrt":
+                candidates = self._closest(candidates, lambda c: self.rtt.get((region, c.site.get("name"))),
+                                           options.get("tolerance", 0))
+            elif name == "admin_preference":
+                best = max(int(c.device.get("admin_preference", 100)) for c in candidates)
+                candidates = [c for c in candidates if int(c.device.get("admin_preference", 100)) == best]
+            elif name == "orderid_ip":
+                candidates = candidates[:1]
+            elif name == "round_robin":
+                pass
+            else:
+                self.ignored.add(name)
+            if weights is not None:
+                break
+        if not candidates:
+            return []
+        if weights is None or not sum(weights):
+            weights = [1] * len(candidates)
+        total = float(sum(weights))
+        return [(c.name, w / total) for c, w in zip(candidates, weights) if w]
+
+    def _up(self, candidate, port):
+        if candidate.name in self.down or not candidate.service_ip:
+            return False
+        if not _enabled(candidate.service_ip.get("status", 1)) or not _enabled(candidate.site.get("status", 1)):
+            return False
+        for p in candidate.service_ip.get("port_list") or ():
+            if str(p.get("port_num")) == str(port):
+                return _enabled(p.get("status", 1))
+        return True
+
+    def _usage(self, candidate):
+        max_client = int(candidate.device.get("max_client") or 0)
+        if not max_client:
+            return 0.0
+        return 100.0 * self.sessions.get(candidate.name, 0) / max_client
+
+    def _narrow(self, candidates, keep):
+        """
+            The candidates passing the metric, all of them when none does.
+        """
+        kept = [c for c in candidates if keep(c)]
+        return kept or candidates
+
+    def _closest(self, candidates, measure, tolerance):
+        """
+            The candidates whose measure is within tolerance percent of the
+            lowest one, all of them without measures.
+        """
+        values = [(measure(c), c) for c in candidates]
+        known = [v for v, c in values if v is not None]
+        if not known:
+            return candidates
+        limit = min(known) * (1 + float(tolerance) / 100)
+        return [c for v, c in values if v is not None and v <= limit]
+
+def _weight(value):
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return 1
+
+def _multinomial(rng, count, probabilities):
+    cumulative = []
+    total = 0.0
+    for p in probabilities:
+        total += p
+        cumulative.append(total)
+    result = [0] * len(probabilities)
+    last = len(probabilities) - 1
+    for i in xrange(count):
+        result[min(bisect(cumulative, rng.random() * total), last)] += 1
+    return result
+
+class QuerySet(object):
+    """
+        The distinct (name, region) pairs in groups, and one group index per
+        query in codes, a numpy array or an array("l").
+    """
+
+    def __init__(self, groups, codes):
+        self.groups = groups
+        self.codes = codes
+
+    def __len__(self):
+        return len(self.codes)
+
+    @staticmethod
+    def fromRecords(records):
+        """
+            Builds the set from an iterable of (name, region).
+        """
+        index = {}
+        groups = []
+        codes = array("l")
+        for qname, region in records:
+            key = (qname.rstrip(".").lower(), region)
+            code = index.get(key)
+            if code is None:
+                code = index[key] = len(groups)
+                groups.append(key)
+            codes.append(code)
+        if numpy is not None:
+            codes = numpy.frombuffer(codes, dtype=numpy.dtype("l")) if codes else numpy.zeros(0, dtype=int)
+        return QuerySet(groups, codes)
+
+    @staticmethod
+    def synthetic(groups, count, weights=None, seed=None):
+        """
+            Draws count queries among the (name, region) groups, in
+            proportion to weights when given.
+        """
+        groups = [(qname.rstrip(".").lower(), region) for qname, region in groups]
+        if numpy is not None:
+            p = None
+            if weights is not None:
+                p = numpy.asarray(weights, dtype=float)
+                p = p / p.sum()
+            codes = numpy.random.RandomState(seed).choice(len(groups), count, p=p)
+            return QuerySet(groups, codes)
+        rng = random.Random(seed)
+        cumulative = []
+        total = 0.0
+        for w in weights or [1] * len(groups):
+            total += w
+            cumulative.append(total)
+        last = len(groups) - 1
+        codes = array("l", (min(bisect(cumulative, rng.random() * total), last) for i in xrange(count)))
+        return QuerySet(groups, codes)
+
+    def counts(self):
+        """
+            Returns the number of queries of each group.
+        """
+        if numpy is not None and not isinstance(self.codes, array):
+            return numpy.bincount(self.codes, minlength=len(self.groups)).tolist()
+        counts = [0] * len(self.groups)
+        for code in self.codes:
+            counts[code] += 1
+        return counts
+
+class Prediction(object):
+    """
+        answers     {(name, region): {service IP name: answers}}, None for the
+                    queries that are not answered
+    """
+
+    def __init__(self):
+        self.answers = {}
+
+    def add(self, group, name, count):
+        answers = self.answers.setdefault(group, {})
+        answers[name] = answers.get(name, 0) + count
+
+    def byServiceIP(self):
+        """
+            Returns {service IP name: answers} over all queries.
+        """
+        totals = {}
+        for answers in self.answers.itervalues():
+            for name, count in answers.iteritems():
+                totals[name] = totals.get(name, 0) + count
+        return totals
+
+    def shares(self):
+        """
+            Returns {service IP name: fraction of the queries}.
+        """
+        totals = self.byServiceIP()
+        total = float(sum(totals.itervalues())) or 1.0
+        return dict((name, count / total) for name, count in totals.iteritems())
+
+    def diff(self, other):
+        """
+            Returns {service IP name: (share here, share in other)} for the
+            service IPs whose share differs.
+        """
+        mine, theirs = self.shares(), other.shares()
+        return dict((name, (mine.get(name, 0.0), theirs.get(name, 0.0)))
+                    for name in set(mine) | set(theirs)
+                    if abs(mine.get(name, 0.0) - theirs.get(name, 0.0)) > 1e-9)
@@ -0,0 +1,203 @@
+# -*- encoding: utf8 -*-
+"""
+    GSLB sync module:  bulk sync of the DNS records of GSLB zone services.
+        ZonePlan        services of one zone to create, update and delete
+        SyncResult      plans and failures of one controller
+        plan_zone       diff of the desired services with the configured ones
+        ZoneSync        applies the desired services to many controllers
+
+        The desired state is {zone name: [service, ...]}, each service being
+        a dictionary as in GslbZone.service_list, keyed by name and port.
+        Every controller is read once with GslbZone.getAll, the desired
+        services are compared with the configured ones on their canonical
+        JSON form, and only the services that differ are sent, one
+        gslb.zone.service.create/update/delete call each.  The fields a
+        desired service leaves out keep their configured value.  The record
+        lists are compared in order, the order of the address records is the
+        order of the answers.
+
+        The controllers are read and written concurrently through an
+        executor.Executor, at most per_device calls at a time on one
+        controller.  Zones that are not configured on a controller are
+        reported in the plans and left alone; configured services missing
+        from the desired state are only deleted with prune.
+
+        Usage:
+            desired = {"example.com": [{"name": "www", "port": 80, "dns_address_record_list":
+                                        [{"vip_order": "gsip1", "weight": 1}, {"vip_order": "gsip2", "weight": 1}]}]}
+            zone_sync = ZoneSync([("10.0.0.1", "admin", "a10"), ("10.0.0.2", "admin", "a10")])
+            for device, result in zone_sync.sync(desired).iteritems():
+                print device, result.error, result.changes(), result.failures
+            zone_sync.close()
+"""
+
+import executor
+from base import AxError
+from changefeed import content_hash
+from gslb import GslbZone
+
+class ZonePlan(object):
+    """
+        The services of a zone to create, update and delete.  missing is
+        True when the zone is not configured on the controller.
+    """
+    __slots__ = ("zone", "create", "update", "delete", "missing")
+
+    def __init__(self, zone, create=None, update=None, delete=None, missing=False):
+        self.zone = zone
+        self.create = create or []
+        self.update = update or []
+        self.delete = delete or []
+        self.missing = missing
+
+    def changes(self):
+        return len(self.create) + len(self.update) + len(self.delete)
+
+    def __repr__(self):
+        if self.missing:
+            return "ZonePlan(%s missing)"%self.zone
+        return "ZonePlan(%s create=%d update=%d delete=%d)"%(self.zone, len(self.create), len(self.update), len(self.delete))
+
+class SyncResult(object):
+    """
+        error       why the controller could not be read, None otherwise
+        plans       {zone name: ZonePlan}
+        failures    list of (zone, operation, service key, error code or message)
+    """
+
+    def __init__(self, device, plans=None, error=None):
+        self.device = device
+        self.plans = plans or {}
+        self.error = error
+        self.failures = []
+
+    def changes(self):
+        return sum(plan.changes() for plan in self.plans.itervalues())
+
+    def missing(self):
+        return sorted(zone for zone, plan in self.plans.iteritems() if plan.missing)
+
+def service_key(service):
+    """
+        Returns the (name, port) identifying a service in its zone.
+    """
+    return service.get("name"), _port(service.get("port"))
+
+def _port(port):
+    try:
+        return int(port)
+    except (TypeError, ValueError):
+        return port
+
+def _canonical(service):
+    # the devices return empty record lists for the missing ones
+    result = dict((k, v) for k, v in service.iteritems() if v != [])
+    if "port" in result:
+        result["port"] = _port(result["port"])
+    return result
+
+def plan_zone(zone, desired, configured, prune=False):
+    """
+        Returns the ZonePlan turning the configured services of a zone into
+        the desired ones, configured being None for a missing zone.
+    """
+    if configured is None:
+        return ZonePlan(zone, missing=True)
+    current = dict((service_key(s), s) for s in configured)
+    plan = ZonePlan(zone)
+    wanted = set()
+    for service in desired:
+        key = service_key(service)
+        wanted.add(key)
+        old = current.get(key)
+        if old is None:
+            plan.create.append(service)
+            continue
+        merged = dict(old)
+        merged.update(service)
+        if content_hash(_canonical(merged)) != content_hash(_canonical(old)):
+            plan.update.append(merged)
+    if prune:
+        plan.delete = [s for key, s in current.iteritems() if key not in wanted]
+    return plan
+
+def fetch_zones():
+    """
+        Returns {zone name: service list} of the controller bound to the
+        calling thread.  Raises AxError when the zones cannot be read.
+    """
+    zones = GslbZone.getAll(("name", "service_list"))
+    if zones is None:
+        raise AxError("GslbZone.getAll failed")
+    return dict((z.get("name"), z.get("service_list") or []) for z in zones)
+
+class ZoneSync(object):
+    """
+        controllers list of (device_ip, username, password)
+        workers     calls running at the same time on all controllers
+        per_device  calls running at the same time on one controller
+    """
+
+    def __init__(self, controllers, workers=8, per_device=4, policy=None):
+        self.devices = [c[0] for c in controllers]
+        self._executor = executor.Executor(workers, per_device=per_device, policy=policy)
+        for device_ip, username, password in controllers:
+            self._executor.addDevice(device_ip, username, password)
+
+    def plan(self, desired, prune=False):
+        """
+            Reads every controller and returns {device: SyncResult} without
+            changing anything.
+        """
+        results = {}
+        for future in executor.as_completed(self._fetch()):
+            results[future.device] = self._plan(future, desired, prune)
+        return results
+
+    def sync(self, desired, prune=False):
+        """
+            Sends the changed services to every controller, returns
+            {device: SyncResult}.  The calls of a controller start as soon as
+            it has been read.
+        """
+        results = {}
+        calls = []
+        for future in executor.as_completed(self._fetch()):
+            result = results[future.device] = self._plan(future, desired, prune)
+            for plan in result.plans.itervalues():
+                calls.extend(self._submit(future.device, plan))
+        for device, zone, op, key, future in calls:
+            try:
+                code = future.result()
+            except Exception, e:
+                code = executor.error_message(e)
+            if code:
+                results[device].failures.append((zone, op, key, code))
+        return results
+
+    def close(self):
+        """
+            Logs out of the controllers.
+        """
+        self._executor.shutdown()
+
+    def _fetch(self):
+        return [self._executor.submit(device, fetch_zones) for device in self.devices]
+
+    def _plan(self, future, desired, prune):
+        # any failure stays with its controller, the others are still synced
+        try:
+            configured = future.result()
+            plans = dict((zone, plan_zone(zone, services, configured.get(zone), prune))
+                         for zone, services in desired.iteritems())
+        except Exception, e:
+            return SyncResult(future.device, error=executor.error_message(e))
+        return SyncResult(future.device, plans)
+
+    def _submit(self, device, plan):
+        zone = GslbZone(name=plan.zone)
+        for op, services, call in (("delete", plan.delete, zone.deleteService),
+                                   ("create", plan.create, zone.createService),
+                                   ("update", plan.update, zone.updateService)):
+            for service in services:
+                yield device, plan.zone, op, service_key(service), self._executor.submit(device, call, service)
@@ -0,0 +1,297 @@
+# -*- encoding: utf8 -*-
+"""
+    Interface poller module:  per second rates of the interface counters of many devices.
+        PortRate        rates and utilisation of one interface or ve
+        fetch_counters  reads the counters of one kind of port
+        compute_rates   rates and utilisation of all the ports in one step
+        CounterPoller   periodic bulk polling of the devices
+
+        Every poll reads InterfaceStats and VirtualInterfaceStats of all the
+        devices concurrently.  Each port, (device, kind, port_num), owns a
+        row of len(COUNTERS) values in flat array("d") buffers holding the
+        previous and the current sample, next to the time of each sample and
+        the link speed of the row.  The rates of all the ports of all the
+        devices are then computed in one step, on numpy views of the buffers
+        when numpy is installed and with a loop over the arrays otherwise:
+            rate            (current - previous) / elapsed seconds
+            utilisation     max(in_bytes rate, out_bytes rate) * 8 / link speed
+        A rate is unknown (NaN) for a port seen once, a port the last poll
+        could not read, and a counter that went backwards after a reset.
+        The utilisation is unknown without a link speed, so always for ves.
+        A device that fails a poll keeps its last sample, and its next rates
+        cover the whole time since that sample.
+
+        The counters are ulong64 and held as doubles, exact up to 2**53.  A
+        byte counter beyond that, 9 PB, is rounded to 2**-53 of its value,
+        at most 1 KB for any 64 bit value, so a rate over an interval of
+        seconds is off by at most a few hundred bytes per second.
+
+        Usage:
+            poller = CounterPoller(executor, ["10.0.0.1", "10.0.0.2"], interval=10)
+            poller.start()
+            for rate in poller.busiest(5):
+                print rate.device, rate.kind, rate.port_num, rate.utilisation, rate.rates["in_bytes"]
+            poller.close()
+"""
+
+import threading
+import time
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from base import AxError, error_message
+from network import InterfaceStats, VirtualInterfaceStats
+
+KIND_INTERFACE = "interface"
+KIND_VE = "ve"
+
+# kind: class
+CLASSES = {KIND_INTERFACE: InterfaceStats, KIND_VE: VirtualInterfaceStats}
+
+COUNTERS = ("in_pkts", "out_pkts", "in_bytes", "out_bytes", "in_errors", "out_errors")
+FIELDS = ("port_num", "link_speed") + COUNTERS
+
+WIDTH = len(COUNTERS)
+_IN_BYTES = COUNTERS.index("in_bytes")
+_OUT_BYTES = COUNTERS.index("out_bytes")
+
+NAN = float("nan")
+_NAN_ROW = array("d", [NAN]) * WIDTH
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return NAN
+
+def _known(value):
+    return None if value != value else value
+
+class PortRate(object):
+    """
+        rates       {counter: per second value, None when unknown}
+        utilisation fraction of the link speed, None when unknown
+        link_speed  Mbps, None when unknown
+    """
+    __slots__ = ("device", "kind", "port_num", "rates", "utilisation", "link_speed")
+
+    def __init__(self, device, kind, port_num, rates, utilisation=None, link_speed=None):
+        self.device = device
+        self.kind = kind
+        self.port_num = port_num
+        self.rates = rates
+        self.utilisation = utilisation
+        self.link_speed = link_speed
+
+    def toDict(self):
+        return dict((k, getattr(self, k)) for k in self.__slots__)
+
+    def __repr__(self):
+        utilisation = "-" if self.utilisation is None else "%.1f%%"%(self.utilisation * 100)
+        return "PortRate(%s %s %s %s)"%(self.device, self.kind, self.port_num, utilisation)
+
+def fetch_counters(kind):
+    """
+        Returns (time, [(port_num, link speed, counters)]) of a kind of port
+        of the device bound to the calling thread, the time being the middle
+        of the call and unknown values NaN.  Raises AxError when the
+        statistics cannot be read.
+    """
+    cls = CLASSES[kind]
+    started = time.time()
+    stats = cls.getAll(FIELDS)
+    sampled = (started + time.time()) / 2
+    if stats is None:
+        raise AxError("%s.getAll failed"%cls.__name__)
+    ports = []
+    for s in stats:
+        obj_dict = s.getObjectDict()
+        try:
+            port_num = int(obj_dict.get("port_num"))
+        except (TypeError, ValueError):
+            # a row without port number cannot be matched with a port
+            continue
+        ports.append((port_num, _number(obj_dict.get("link_speed")),
+                      [_number(obj_dict.get(c)) for c in COUNTERS]))
+    return sampled, ports
+
+def compute_rates(previous, current, previous_times, times, speeds):
+    """
+        Returns the (rates, utilisation) of all the rows of the flat
+        buffers, WIDTH counters per row and speeds in Mbps: rates has WIDTH
+        values per row, utilisation one, NaN when unknown.  They are numpy
+        arrays with numpy and array("d") otherwise.
+    """
+    rows = len(times)
+    if numpy is not None:
+        if not rows:
+            return numpy.zeros(0), numpy.zeros(0)
+        prev = numpy.frombuffer(previous, dtype=float).reshape(rows, WIDTH)
+        cur = numpy.frombuffer(current, dtype=float).reshape(rows, WIDTH)
+        elapsed = numpy.frombuffer(times, dtype=float) - numpy.frombuffer(previous_times, dtype=float)
+        link = numpy.frombuffer(speeds, dtype=float)
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            delta = cur - prev
+            rates = delta / elapsed[:, None]
+            rates[(delta < 0) | ~(elapsed > 0)[:, None]] = NAN
+            utilisation = numpy.maximum(rates[:, _IN_BYTES], rates[:, _OUT_BYTES]) * 8 / (link * 1e6)
+            utilisation[~(link > 0)] = NAN
+        return rates.reshape(-1), utilisation
+    rates = array("d", [NAN]) * (rows * WIDTH)
+    utilisation = array("d", [NAN]) * rows
+    for row in xrange(rows):
+        elapsed = times[row] - previous_times[row]
+        if not elapsed > 0:
+            continue
+        base = row * WIDTH
+        for i in xrange(base, base + WIDTH):
+            delta = current[i] - previous[i]
+            if delta >= 0:
+                rates[i] = delta / elapsed
+        in_rate, out_rate = rates[base + _IN_BYTES], rates[base + _OUT_BYTES]
+        if speeds[row] > 0 and in_rate == in_rate and out_rate == out_rate:
+            utilisation[row] = max(in_rate, out_rate) * 8 / (speeds[row] * 1e6)
+    return rates, utilisation
+
+class CounterPoller(object):
+    """
+        executor    executor.Executor with the devices added
+        devices     list of the devices polled
+        kinds       kinds of port polled, interfaces and ves by default
+        interval    seconds between two polls of start()
+
+        errors holds {(device, kind): error} of the kinds the last poll could
+        not read, and under None the error of a poll that failed as a whole.
+    """
+
+    def __init__(self, executor, devices, kinds=(KIND_INTERFACE, KIND_VE), interval=10):
+        self.executor = executor
+        self.devices = list(devices)
+        self.kinds = tuple(kinds)
+        self.interval = interval
+        # (device, kind, port_num) of each row
+        self.rows = []
+        self.rates = None
+        self.utilisation = None
+        self.polled = None
+        self.errors = {}
+        self._index = {}
+        self._previous = array("d")
+        self._current = array("d")
+        self._previous_times = array("d")
+        self._times = array("d")
+        self._speeds = array("d")
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _row(self, key, speed):
+        row = self._index.get(key)
+        if row is None:
+            row = self._index[key] = len(self.rows)
+            self.rows.append(key)
+            self._previous.extend(_NAN_ROW)
+            self._current.extend(_NAN_ROW)
+            self._previous_times.append(NAN)
+            self._times.append(NAN)
+            self._speeds.append(speed)
+        else:
+            self._speeds[row] = speed
+        return row
+
+    def poll(self):
+        """
+            Reads the counters of all the devices concurrently, then
+            computes the rates of every port.  Returns the number of ports
+            read; the kinds that failed are in errors.
+        """
+        futures = [(kind, self.executor.submit(device, fetch_counters, kind))
+                   for device in self.devices for kind in self.kinds]
+        results = []
+        for kind, future in futures:
+            try:
+                results.append((future.device, kind, future.result()))
+            except Exception, e:
+                self.errors[(future.device, kind)] = error_message(e)
+                continue
+            self.errors.pop((future.device, kind), None)
+        count = 0
+        with self._lock:
+            # the rows not read keep their sample and get no rate
+            self._previous[:] = self._current
+            self._previous_times[:] = self._times
+            for device, kind, (sampled, ports) in results:
+                for port_num, speed, counters in ports:
+                    row = self._row((device, kind, port_num), speed)
+                    self._current[row * WIDTH:(row + 1) * WIDTH] = array("d", counters)
+                    self._times[row] = sampled
+                    count += 1
+            self.rates, self.utilisation = compute_rates(self._previous, self._current, self._previous_times,
+                                                         self._times, self._speeds)
+            self.polled = time.time()
+        return count
+
+    def _portRate(self, row):
+        device, kind, port_num = self.rows[row]
+        if self.rates is None or row >= len(self.utilisation):
+            return PortRate(device, kind, port_num, dict.fromkeys(COUNTERS))
+        values = self.rates[row * WIDTH:(row + 1) * WIDTH]
+        return PortRate(device, kind, port_num, dict((c, _known(float(v))) for c, v in zip(COUNTERS, values)),
+                        _known(float(self.utilisation[row])), _known(self._speeds[row]))
+
+    def rate(self, device, kind, port_num):
+        """
+            Returns the PortRate of a port, None when it was never read.
+        """
+        with self._lock:
+            row = self._index.get((device, kind, int(port_num)))
+            return self._portRate(row) if row is not None else None
+
+    def table(self, device=None):
+        """
+            Returns the PortRate of every port, or of the ports of a device.
+        """
+        with self._lock:
+            return [self._portRate(row) for row, key in enumerate(self.rows) if device is None or key[0] == device]
+
+    def busiest(self, n=10):
+        """
+            Returns the n PortRate of the highest known utilisation.
+        """
+        ranked = [rate for rate in self.table() if rate.utilisation is not None]
+        ranked.sort(key=lambda rate: -rate.utilisation)
+        return ranked[:n]
+
+    def start(self):
+        """
+            Polls now, then every interval seconds in a background thread.
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="interface-poller")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """
+            Stops the polling; the executor is left to its owner.
+        """
+        self.stop()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+                self.errors.pop(None, None)
+            except Exception, e:
+                self.errors[None] = error_message(e)
+            self._stop.wait(self.interval)
@@ -0,0 +1,345 @@
+# -*- encoding: utf8 -*-
+"""
+    Inventory module:  fleet wide index of the SLB and GSLB objects.
+        InventoryRecord     one configured object, or one of its ports/members
+        DeviceInventory     the objects fetched from one device in one sync
+        Inventory           periodic sync of all devices and in-memory queries
+
+        The inventory fetches RealServer, ServiceGroup, VirtualServer and
+        GslbServiceIP from every device, with only the fields it indexes, and
+        answers from memory:
+            where is an IP address used (real server host, VIP, GSLB service IP)
+            which VIPs listen on a port
+            which service groups reference a real server
+            which objects match a name
+
+        A device that fails to sync keeps its previous objects in the index,
+        with the error and the time of its last good sync in status().  A
+        kind that cannot be read, such as the GSLB service IPs of an ADC
+        without GSLB, keeps its previous records while the other kinds are
+        indexed, and its error is listed under the errors of the device.
+
+        Usage:
+            inventory = Inventory([("10.0.0.1", "admin", "a10"), ("10.0.0.2", "admin", "a10")], interval=300)
+            inventory.start()
+            for record in inventory.whereUsed("10.1.2.3"):
+                print record.device, record.kind, record.name
+            for record in inventory.vipsOnPort(443):
+                print record.device, record.name, record.address
+            inventory.stop()
+
+        Or as a service answering GET /where?ip=, /vips?port=, /search?name=
+        and /status in JSON:
+            python inventory.py --device 10.0.0.1 --device 10.0.0.2 -u admin -p a10 --listen 8090
+"""
+
+import argparse
+import BaseHTTPServer
+import json
+import threading
+import time
+import urlparse
+
+import executor
+from base import AxError
+from gslb import GslbServiceIP
+from slb import RealServer, ServiceGroup, VirtualServer
+
+KIND_SERVER = "server"
+KIND_SERVICE_GROUP = "service_group"
+KIND_VIRTUAL_SERVER = "virtual_server"
+KIND_GSLB_SERVICE_IP = "gslb_service_ip"
+
+# (kind, class, fields fetched)
+SOURCES = (
+    (KIND_SERVER, RealServer, ("name", "host", "status", "port_list")),
+    (KIND_SERVICE_GROUP, ServiceGroup, ("name", "protocol", "member_list")),
+    (KIND_VIRTUAL_SERVER, VirtualServer, ("name", "address", "status", "vport_list")),
+    (KIND_GSLB_SERVICE_IP, GslbServiceIP, ("name", "ip_address", "external_ip_address", "status", "port_list")),
+)
+
+class InventoryRecord(object):
+    """
+        An indexed object.  port is set for the records of a port of a real
+        server, VIP or GSLB service IP; member for the records of a service
+        group member, as (server, port).
+    """
+    __slots__ = ("device", "kind", "name", "address", "port", "protocol", "member", "status")
+
+    def __init__(self, device, kind, name, address=None, port=None, protocol=None, member=None, status=None):
+        self.device = device
+        self.kind = kind
+        self.name = name
+        self.address = address
+        self.port = port
+        self.protocol = protocol
+        self.member = member
+        self.status = status
+
+    def toDict(self):
+        return dict((k, getattr(self, k)) for k in self.__slots__)
+
+    def __repr__(self):
+        return "InventoryRecord(%s)"%", ".join("%s=%r"%(k, getattr(self, k)) for k in self.__slots__
+                                                  if getattr(self, k) is not None)
+
+class DeviceInventory(object):
+    """
+        The records of one device with their indexes.
+    """
+
+    def __init__(self, device, records, synced):
+        self.device = device
+        self.records = records
+        self.synced = synced
+        self.by_address = {}
+        self.by_port = {}
+        self.by_member = {}
+        for record in records:
+            if record.address and record.port is None:
+                self.by_address.setdefault(record.address, []).append(record)
+            if record.port is not None:
+                self.by_port.setdefault((record.kind, record.port), []).append(record)
+            if record.member is not None:
+                self.by_member.setdefault(record.member[0], []).append(record)
+
+def fetch_device(device):
+    """
+        Returns (records, {kind: error}) of the device bound to the calling
+        thread, without the records of the kinds that could not be read.
+        Raises AxError when no kind can be read.
+    """
+    records = []
+    errors = {}
+    for kind, cls, fields in SOURCES:
+        try:
+            objects = cls.getAll(fields)
+            if objects is None:
+                raise AxError("%s.getAll failed on %s"%(cls.__name__, device))
+            kind_records = []
+            for obj in objects:
+                kind_records.extend(_records(device, kind, obj.getObjectDict()))
+        except Exception, e:
+            errors[kind] = executor.error_message(e)
+            continue
+        records.extend(kind_records)
+    if len(errors) == len(SOURCES):
+        raise AxError("; ".join(errors[kind] for kind, cls, fields in SOURCES))
+    return records, errors
+
+def _records(device, kind, obj):
+    name = obj.get("name", "")
+    status = obj.get("status")
+    if kind == KIND_SERVICE_GROUP:
+        yield InventoryRecord(device, kind, name, protocol=obj.get("protocol"))
+        for member in obj.get("member_list") or []:
+            yield InventoryRecord(device, kind, name, port=member.get("port"), member=(member.get("server"), member.get("port")),
+                                  status=member.get("status"))
+        return
+    if kind == KIND_SERVER:
+        address, ports, port_key = obj.get("host"), obj.get("port_list"), "port_num"
+    elif kind == KIND_VIRTUAL_SERVER:
+        address, ports, port_key = obj.get("address"), obj.get("vport_list"), "port"
+    else:
+        address, ports, port_key = obj.get("ip_address"), obj.get("port_list"), "port_num"
+        if obj.get("external_ip_address"):
+            yield InventoryRecord(device, kind, name, address=obj["external_ip_address"], status=status)
+    yield InventoryRecord(device, kind, name, address=address, status=status)
+    for port in ports or []:
+        yield InventoryRecord(device, kind, name, address=address, port=port.get(port_key), protocol=port.get("protocol"),
+                              status=port.get("status", status))
+
+class Inventory(object):
+    """
+        devices     list of (device_ip, username, password)
+        interval    seconds between two syncs of the fleet
+        workers     devices synced concurrently, see executor.Executor
+    """
+
+    def __init__(self, devices, interval=300, workers=8, policy=None):
+        self.devices = list(devices)
+        self.interval = interval
+        self.workers = workers
+        self._executor = executor.Executor(workers, per_device=1, policy=policy)
+        for device_ip, username, password in self.devices:
+            self._executor.addDevice(device_ip, username, password)
+        self._inventories = {}
+        self._status = dict((d[0], {"synced": None, "error": None, "errors": {}, "records": 0}) for d in self.devices)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def syncDevice(self, device_ip):
+        """
+            Fetches one device and swaps its records into the index.  Returns
+            True on success, even partial; on failure the previous records
+            are kept.
+        """
+        return self._store(device_ip, self._executor.submit(device_ip, fetch_device, device_ip))
+
+    def sync(self):
+        """
+            Syncs all devices, at most workers at a time.  Returns the number
+            of devices synced successfully.
+        """
+        futures = [(d[0], self._executor.submit(d[0], fetch_device, d[0])) for d in self.devices]
+        return len([d for d, future in futures if self._store(d, future)])
+
+    def _store(self, device_ip, future):
+        try:
+            records, errors = future.result()
+            if errors:
+                with self._lock:
+                    previous = self._inventories.get(device_ip)
+                if previous is not None:
+                    records = records + [r for r in previous.records if r.kind in errors]
+            inventory = DeviceInventory(device_ip, records, time.time())
+        except Exception, e:
+            # any failure stays with its device, so one malformed response
+            # cannot stop the sync of the others
+            with self._lock:
+                self._status[device_ip]["error"] = executor.error_message(e)
+            return False
+        with self._lock:
+            self._inventories[device_ip] = inventory
+            self._status[device_ip] = {"synced": inventory.synced, "error": None, "errors": errors,
+                                       "records": len(records)}
+        return True
+
+    def start(self):
+        """
+            Syncs now, then every interval seconds in a background thread.
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="inventory-sync")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """
+            Stops the syncs and logs out of the devices.
+        """
+        self.stop()
+        self._executor.shutdown()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sync()
+            self._stop.wait(self.interval)
+
+    def status(self):
+        with self._lock:
+            return dict((device, dict(s, errors=dict(s["errors"]))) for device, s in self._status.iteritems())
+
+    def _select(self, index, key):
+        with self._lock:
+            inventories = self._inventories.values()
+        result = []
+        for inventory in inventories:
+            result.extend(getattr(inventory, index).get(key, ()))
+        return result
+
+    def whereUsed(self, address):
+        """
+            Returns the records of the real servers, VIPs, GSLB service IPs and
+            their ports configured with the address.
+        """
+        return self._select("by_address", address)
+
+    def vipsOnPort(self, port):
+        """
+            Returns the virtual port records of the VIPs listening on port.
+        """
+        return self._select("by_port", (KIND_VIRTUAL_SERVER, int(port)))
+
+    def serviceGroupsOf(self, server):
+        """
+            Returns the member records of the service groups using the real server name.
+        """
+        return self._select("by_member", server)
+
+    def search(self, name=None, kind=None, address=None, port=None):
+        """
+            Returns the records matching all given criteria, name is a case
+            insensitive substring.
+        """
+        if address is not None:
+            records = self.whereUsed(address)
+        else:
+            with self._lock:
+                inventories = self._inventories.values()
+            records = [r for inventory in inventories for r in inventory.records]
+        name = name.lower() if name else None
+        return [r for r in records
+                if (name is None or name in r.name.lower())
+                and (kind is None or r.kind == kind)
+                and (port is None or r.port == int(port))]
+
+class _QueryHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        inventory = self.server.inventory
+        parts = urlparse.urlparse(self.path)
+        query = dict((k, v[0]) for k, v in urlparse.parse_qs(parts.query).iteritems())
+        try:
+            if parts.path == "/where" and "ip" in query:
+                result = [r.toDict() for r in inventory.whereUsed(query["ip"])]
+            elif parts.path == "/vips" and "port" in query:
+                result = [r.toDict() for r in inventory.vipsOnPort(query["port"])]
+            elif parts.path == "/search":
+                result = [r.toDict() for r in inventory.search(**query)]
+            elif parts.path == "/status":
+                result = inventory.status()
+            else:
+                self.send_error(404)
+                return
+        except (TypeError, ValueError), e:
+            self.send_error(400, str(e))
+            return
+        body = json.dumps(result)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(inventory, host="127.0.0.1", port=8090):
+    """
+        Answers the inventory queries over HTTP until interrupted.
+    """
+    server = BaseHTTPServer.HTTPServer((host, port), _QueryHandler)
+    server.inventory = inventory
+    server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Fleet inventory of SLB and GSLB objects")
+    parser.add_argument("--device", action="append", required=True, help="device address, repeatable")
+    parser.add_argument("-u", "--username", default="admin")
+    parser.add_argument("-p", "--password", required=True)
+    parser.add_argument("--interval", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--listen", type=int, default=8090)
+    options = parser.parse_args()
+
+    inventory = Inventory([(d, options.username, options.password) for d in options.device],
+                          interval=options.interval, workers=options.workers)
+    inventory.start()
+    try:
+        serve(inventory, options.host, options.listen)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        inventory.close()
+
+if __name__ == "__main__":
+    main()
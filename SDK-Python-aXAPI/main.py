@@ -1,6 +1,7 @@
 
 import method_call
 from  base import AxError, AxAPI
+from session_cache import SessionCache
 import urllib2
 from slb import ServiceGroup, ServiceGroupStats
 from slb import RealServer, RealServerStats
@@ -11,7 +12,7 @@ from gslb import *
 from network import *
 
 
-axapi_239 = method_call.AxApiContext("192.168.210.239", "user1", "aa&bb").authentication()
+axapi_239 = method_call.AxApiContext("192.168.210.239", "user1", "aa&bb", cache=SessionCache()).authentication()
 print axapi_239
 #status = method_call.axapi_authentication()
 #print method_call.AXAPI_SESSION_ID
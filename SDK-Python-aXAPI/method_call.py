@@ -9,82 +9,316 @@
     Date  : 03/04/2012
     
 """
-import urllib2
+import httplib
+import re
+import socket
+import ssl
+import threading
+import time
 import urllib
+import urlparse
+import zlib
 import json
-from xml.etree.ElementTree import XML
+try:
+    from xml.etree.cElementTree import XML, XMLParser, TreeBuilder
+except ImportError:
+    from xml.etree.ElementTree import XML, XMLParser, TreeBuilder
+from functools import partial
+import base
 from base import AxObject, AxError, AxAPIError
+from base import AxHttpError, AxTransportError, AxTimeoutError, AxCertificateError, LazyValue
+from retry import DEFAULT_POLICY, is_idempotent
+from metrics import METRICS, CallSample
 
 REST_URL = "/services/rest/V2/"
+AXAPI_SCHEME = "https"
 AXAPI_DEVICE = "192.168.210.239"
 AXAPI_SESSION_ID = ""
 AXAPI_LOGIN = 0
+AXAPI_POLICY = DEFAULT_POLICY
+AXAPI_CONTEXT = None
+# content codings offered to the device, None to disable response compression
+AXAPI_ACCEPT_ENCODING = "gzip, deflate"
+# ssl.SSLContext of the https connections, None for the default verifying context
+AXAPI_SSL_CONTEXT = None
+# parse_pool.ParsePool decoding the responses in worker processes, see parse_pool.install
+AXAPI_PARSE_POOL = None
+
+# aXAPI error codes meaning the session_id is no longer valid on the device
+SESSION_ERROR_CODES = (1009,)
+
+_thread_state = threading.local()
+_transfer_lock = threading.Lock()
+_transfer_totals = {}
+_READ_CHUNK = 64 * 1024
+_default_ssl_context = None
+_FAIL_STATUS = re.compile(r'status"?\s*[=:]\s*"fail"')
 
 class AxApiContext(AxObject):    
     
     __display__ = ["session_id", "is_login", "device_ip", "username"]
     
-    def __init__(self, device_ip, username, password):
-        params = dict(device_ip=device_ip, username=username, password=password, is_login=False)
+    def __init__(self, device_ip, username, password, policy=None, cache=None):
+        params = dict(device_ip=device_ip, username=username, password=password, is_login=False, policy=policy, cache=cache)
         AxObject.__init__(self, **params)
 
-    def authentication(self):
-        global AXAPI_SESSION_ID, AXAPI_DEVICE, AXAPI_LOGIN
-        AXAPI_DEVICE = self.device_ip
-        AXAPI_SESSION_ID = ""
-        AXAPI_LOGIN = 0
-        resp = call_api(self, method="authenticate", username=self.username, password=self.password)
-        xml_s = XML(resp)
-        for node in xml_s.findall('session_id'):
-            self.session_id = node.text
-            self.is_login = True
-            _set_session_id(self.session_id, self.device_ip)
-            break
+    def authentication(self, reuse=True):
+        """
+            Logs in to the device.  With a session_cache.SessionCache and
+            reuse set, a cached valid session is taken without a round trip.
+        """
+        self.is_login = False
+        self.session_id = ""
+        if reuse and self.cache is not None:
+            session_id = self.cache.get(self.device_ip, self.username, self.password)
+            if session_id:
+                self.session_id = session_id
+                self.is_login = True
+                self._activate()
+                return self
+        try:
+            resp = call_api(self, method="authenticate", username=self.username, password=self.password, _context=self)
+            xml_s = XML(resp)
+            for node in xml_s.findall('session_id'):
+                self.session_id = node.text
+                self.is_login = True
+                break
+        except AxAPIError:
+            pass
+        if self.is_login and self.cache is not None:
+            self.cache.put(self.device_ip, self.username, self.password, self.session_id)
+        self._activate()
         return self
 
     def switchContext(self):
         if self.is_login == False:
             self.authentication()
         else:
+            self._activate()
+
+    def logout(self):
+        """ method: session.close
+            Closes the session on the device.
+        """
+        if self.is_login:
+            try:
+                call_api(self, method="session.close", _context=self)
+            except AxError:
+                pass
+            if self.cache is not None:
+                self.cache.remove(self.device_ip, self.username, self.password)
+            self.is_login = False
+            self.session_id = ""
+
+    def _activate(self):
+        """
+            Makes the context the current one: for the calling thread only
+            when it has a bound context (see bind_context), else globally.
+        """
+        global AXAPI_CONTEXT, AXAPI_POLICY, AXAPI_DEVICE, AXAPI_SESSION_ID, AXAPI_LOGIN
+        if getattr(_thread_state, "context", None) is not None:
+            _thread_state.context = self
+            return
+        AXAPI_CONTEXT = self
+        AXAPI_POLICY = self.policy or DEFAULT_POLICY
+        if self.is_login:
             _set_session_id(self.session_id, self.device_ip)
+        else:
+            AXAPI_DEVICE = self.device_ip
+            AXAPI_SESSION_ID = ""
+            AXAPI_LOGIN = 0
+
+def bind_context(context):
+    """
+        Binds the AxApiContext to the calling thread so that every call_api
+        made by this thread goes to its device with its session, whatever the
+        global context is.  Passing None restores the global context.
+        Returns the previously bound context.
+    """
+    previous = getattr(_thread_state, "context", None)
+    _thread_state.context = context
+    return previous
+
+def current_context():
+    """
+        Returns the AxApiContext used by call_api in the calling thread.
+    """
+    return getattr(_thread_state, "context", None) or AXAPI_CONTEXT
 
 def call_api(axobjectinstance, **args):
     """
         Performs the GET/POST calls to the aXAPI REST interface.
         
+        When the device rejects the session_id, the current context logs in
+        again and the request is replayed once.  Every call is recorded in
+        metrics.METRICS under its device and method name.
+
         Arguments :
             method : The name of aXAPI call.
             format : (optional) Specify the aXAPI format, json/url.  The default is "url".
             post_data : (optional) The POST data for the REST create/update/delete transactions.
+            _context : (optional) AxApiContext to use instead of the current one.
+            _policy : (optional) retry.RetryPolicy overriding the one of the current context.
+            _timeout : (optional) timeout in seconds, or a (connect, read) tuple, for this call.
+            _idempotent : (optional) force whether the call may be retried after it reached the device.
+            _fields : (optional) names of the fields to keep in the objects of the returned lists,
+                      the other fields are skipped while the response is parsed.
+            _lazy : (optional) for xml/url responses, leave the lists nested in the returned
+                    objects undecoded as base.LazyValue until an AxObject field reads them.
             args : the arguments to pass to the method.
     """
 
-    if AXAPI_LOGIN == 1:
-        args["session_id"] = AXAPI_SESSION_ID
+    context = args.pop("_context", None) or getattr(_thread_state, "context", None)
+    policy = args.pop("_policy", None) or (context and context.policy) or AXAPI_POLICY
+    if args.has_key("_timeout"):
+        policy = policy.withTimeout(args.pop("_timeout"))
+    idempotent = args.pop("_idempotent", is_idempotent(args.get("method")))
+    device_ip = context.device_ip if context is not None else AXAPI_DEVICE
+
+    previous_sample = getattr(_thread_state, "sample", None)
+    sample = _thread_state.sample = CallSample()
+    started = time.time()
+    error = None
+    try:
+        return _call(axobjectinstance, context, args, policy, idempotent)
+    except Exception, e:
+        error = _error_code(e)
+        raise
+    finally:
+        sample.add("total", time.time() - started)
+        _thread_state.sample = previous_sample
+        METRICS.record(device_ip, args.get("method"), sample, error)
+
+def _call(axobjectinstance, context, args, policy, idempotent):
+    lazy = args.pop("_lazy", False)
+    fields = args.pop("_fields", None)
+    owner = context or AXAPI_CONTEXT
+    can_reauth = owner is not None and args.get("method") not in ("authenticate", "session.close")
+    fmt = args.get("format")
+    if fmt == "json":
+        decoder_class = _JsonDecoder
+    elif fmt:
+        decoder_class = _XmlDecoder
+    else:
+        decoder_class = _RawDecoder
+    if fields and fmt:
+        decoder_class = partial(decoder_class, frozenset(fields))
+    if AXAPI_PARSE_POOL is not None and fmt:
+        # lazy values hold parsed elements, which cannot leave the worker process
+        decoder_class = partial(AXAPI_PARSE_POOL.decoder, fmt, axobjectinstance.__xml_convrt__,
+                                frozenset(fields) if fields else None)
+
+    while True:
+        resp = _call_once(context, dict(args), policy, idempotent, decoder_class)
+        error = _response_error(resp)
+        if error is None:
+            break
+        if can_reauth and error.code in SESSION_ERROR_CODES:
+            can_reauth = False
+            owner.authentication(reuse=False)
+            if owner.is_login:
+                continue
+        raise error
+
+    if isinstance(resp, DecodedResponse):
+        resp = resp.data
+    elif fmt and fmt != "json":
+        # handle the xml/url response into the dict
+        started = time.time()
+        resp = _XmlDict(resp, axobjectinstance.__xml_convrt__, lazy=lazy)
+        _thread_state.sample.add("parse", time.time() - started)
+        if base.DEBUG:
+            print resp
+        
+    return resp
+
+def _error_code(error):
+    """
+        Returns the label under which the error of a call is counted.
+    """
+    if isinstance(error, AxAPIError):
+        return error.code
+    if isinstance(error, AxHttpError):
+        return "http_%d"%error.status
+    return error.__class__.__name__
+
+def _call_once(context, args, policy, idempotent, decoder_class):
+    if context is not None:
+        device_ip = context.device_ip
+        if context.is_login:
+            args["session_id"] = context.session_id
+    else:
+        device_ip = AXAPI_DEVICE
+        if AXAPI_LOGIN == 1:
+            args["session_id"] = AXAPI_SESSION_ID
 
     if args.has_key("post_data"):
         data = args["post_data"]
         del args["post_data"]
-        url_str = _get_request_url()+"?"+urllib.urlencode(args)
+        url_str = _get_request_url(device_ip)+"?"+urllib.urlencode(args)
     else:
         data = urllib.urlencode(args)
-        url_str = _get_request_url()
-    print data
-    print url_str
+        url_str = _get_request_url(device_ip)
+    if base.DEBUG:
+        print data
+        print url_str
     
-    resp = _send_request(url_str, data)
-    print resp
-    if args.has_key("format"):
-        fmt = args["format"]
-        if fmt == "json":
-            # handle the json response to build the dict
-            resp = json.loads(resp)
-        else:
-            # handle the xml/url response into the dict
-            resp = _XmlDict(XML(resp), axobjectinstance.__xml_convrt__)
-            print resp
-        
+    resp = _send_request(url_str, data, policy, idempotent, decoder_class)
+    if base.DEBUG:
+        print resp
     return resp
+
+def _response_error(resp):
+    """
+        Returns the AxAPIError of a response with status "fail", else None.
+        The response is the raw body, the decoded json dict or the XML root.
+    """
+    if isinstance(resp, DecodedResponse):
+        return resp.error
+    try:
+        if isinstance(resp, basestring):
+            if not _FAIL_STATUS.search(resp[:256]):
+                return None
+            if resp.lstrip().startswith("{"):
+                resp = json.loads(resp)
+            else:
+                resp = XML(resp)
+        if isinstance(resp, dict):
+            status = resp.get("response")
+            if not isinstance(status, dict) or status.get("status") != "fail":
+                return None
+            err = status.get("err", {})
+            return AxAPIError(int(err.get("code", 0)), err.get("msg", ""))
+        if resp.get("status") != "fail":
+            return None
+        node = resp.find("error")
+        return AxAPIError(int(node.get("code", 0)), node.get("msg", ""))
+    except (ValueError, KeyError, TypeError, AttributeError, SyntaxError):
+        return None
+
+def last_transfer():
+    """
+        Returns the transfer of the last request made by the calling thread
+        as a dict: device, encoding, wire_bytes (as received, compressed or
+        not) and body_bytes (decompressed).
+    """
+    return getattr(_thread_state, "transfer", None)
+
+def transfer_stats():
+    """
+        Returns the accumulated calls, wire_bytes and body_bytes per device,
+        e.g. to quantify the bandwidth saved by compression.
+    """
+    with _transfer_lock:
+        return dict((device, dict(totals)) for device, totals in _transfer_totals.iteritems())
+
+def _record_transfer(device, encoding, wire_bytes, body_bytes):
+    _thread_state.transfer = dict(device=device, encoding=encoding, wire_bytes=wire_bytes, body_bytes=body_bytes)
+    with _transfer_lock:
+        totals = _transfer_totals.setdefault(device, dict(calls=0, wire_bytes=0, body_bytes=0))
+        totals["calls"] += 1
+        totals["wire_bytes"] += wire_bytes
+        totals["body_bytes"] += body_bytes
             
 def _set_session_id(session_id, device_ip):
     global AXAPI_SESSION_ID, AXAPI_DEVICE, AXAPI_LOGIN
@@ -92,18 +326,302 @@ def _set_session_id(session_id, device_ip):
     AXAPI_DEVICE = device_ip
     AXAPI_LOGIN = 1
 
-def _get_request_url() :
-    return "https://" + AXAPI_DEVICE + ":443" + REST_URL 
+def _get_request_url(device_ip=None) :
+    """
+        The device may be given as host or host:port, e.g. a mock_server instance.
+    """
+    device_ip = device_ip or AXAPI_DEVICE
+    if device_ip.count(":") != 1 and "]:" not in device_ip:
+        device_ip += ":443"
+    return AXAPI_SCHEME + "://" + device_ip + REST_URL 
+
+def _send_request(url, data, policy=None, idempotent=False, decoder_class=None):
+    """
+        POSTs the data to the url under the retry policy.  Failed attempts are
+        retried with backoff when the policy allows it, and every outcome is
+        reported to the circuit breaker of the device.
+
+        The body is fed to a new decoder_class instance on each attempt, and
+        the value of its close() is returned, the raw body by default.
+    """
+    if decoder_class is None:
+        decoder_class = _RawDecoder
+    if policy is None:
+        policy = AXAPI_POLICY
+    breaker = policy.getBreaker(urlparse.urlsplit(url).netloc)
+    attempt = 0
+    while True:
+        breaker.allow()
+        try:
+            resp = _http_post(url, data, policy.connect_timeout, policy.read_timeout, decoder_class)
+        except (AxHttpError, AxTransportError, AxCertificateError), e:
+            if policy.isDeviceFailure(e):
+                breaker.recordFailure()
+            else:
+                breaker.recordSuccess()
+            if not policy.shouldRetry(e, attempt, idempotent):
+                raise
+            time.sleep(policy.backoff(attempt))
+            attempt += 1
+        else:
+            breaker.recordSuccess()
+            return resp
 
-def _send_request(url,data):
-    req = urllib2.Request(url,data)
-    try :
-        return urllib2.urlopen(req).read()
-    except urllib2.HTTPError , e:
-        raise AxError( e.read().split('&')[0] )
+def _ssl_context():
+    global _default_ssl_context
+    if AXAPI_SSL_CONTEXT is not None:
+        return AXAPI_SSL_CONTEXT
+    if _default_ssl_context is None:
+        _default_ssl_context = ssl.create_default_context()
+    return _default_ssl_context
+
+def _http_post(url, data, connect_timeout, read_timeout, decoder_class):
+    parts = urlparse.urlsplit(url)
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    if AXAPI_ACCEPT_ENCODING:
+        headers["Accept-Encoding"] = AXAPI_ACCEPT_ENCODING
+    path = parts.path
+    if parts.query:
+        path += "?" + parts.query
+    sample = getattr(_thread_state, "sample", None) or CallSample()
+    sample.request_bytes += len(path) + len(data)
+    ssl_context = _ssl_context() if parts.scheme == "https" else None
+    if ssl_context is not None:
+        conn = httplib.HTTPSConnection(parts.hostname, parts.port, timeout=connect_timeout, context=ssl_context)
+    else:
+        conn = httplib.HTTPConnection(parts.hostname, parts.port, timeout=connect_timeout)
+    try:
+        try:
+            # TCP connect and TLS handshake done separately to time each phase
+            started = time.time()
+            httplib.HTTPConnection.connect(conn)
+            connected = time.time()
+            sample.add("connect", connected - started)
+            if ssl_context is not None:
+                conn.sock = ssl_context.wrap_socket(conn.sock, server_hostname=parts.hostname)
+                sample.add("tls", time.time() - connected)
+        except socket.timeout:
+            raise AxTimeoutError("connect to %s timed out"%parts.hostname, sent=False)
+        except ssl.CertificateError, e:
+            raise AxCertificateError("certificate of %s rejected: %s"%(parts.hostname, e))
+        except socket.error, e:
+            if getattr(e, "reason", None) == "CERTIFICATE_VERIFY_FAILED":
+                raise AxCertificateError("certificate of %s rejected: %s"%(parts.hostname, e))
+            raise AxTransportError("connect to %s failed: %s"%(parts.hostname, e), sent=False)
+        conn.sock.settimeout(read_timeout)
+        try:
+            sent = time.time()
+            conn.request("POST", path, data, headers)
+            resp = conn.getresponse()
+            sample.add("server", time.time() - sent)
+            encoding = (resp.getheader("content-encoding") or "identity").lower()
+            if resp.status >= 400:
+                body = _decompress_all(resp.read(), encoding)
+                raise AxHttpError(resp.status, body.split('&')[0])
+            return _read_body(resp, parts.netloc, encoding, decoder_class(), sample)
+        except socket.timeout:
+            raise AxTimeoutError("read from %s timed out"%parts.hostname)
+        except (socket.error, httplib.HTTPException), e:
+            raise AxTransportError("request to %s failed: %s"%(parts.hostname, e))
+    finally:
+        conn.close()
+
+def _read_body(resp, device, encoding, decoder, sample):
+    """
+        Streams the response into the decoder, decompressing chunk by chunk
+        when the device used a content coding.  Time spent in the decoder is
+        accounted as parse, the rest as server; a decoder that only collects
+        the body, parses False, is accounted as server.
+    """
+    decompressor = _Decompressor(encoding) if encoding in ("gzip", "deflate") else None
+    wire_bytes = body_bytes = 0
+    started = time.time()
+    parse_time = 0.0
+    try:
+        while True:
+            chunk = resp.read(_READ_CHUNK)
+            if not chunk:
+                break
+            wire_bytes += len(chunk)
+            if decompressor is not None:
+                chunk = decompressor.decompress(chunk)
+            body_bytes += len(chunk)
+            fed = time.time()
+            decoder.feed(chunk)
+            parse_time += time.time() - fed
+        if decompressor is not None:
+            chunk = decompressor.flush()
+            body_bytes += len(chunk)
+            decoder.feed(chunk)
+    except zlib.error, e:
+        raise AxTransportError("invalid %s body from %s: %s"%(encoding, device, e))
+    received = time.time()
+    result = decoder.close()
+    if getattr(decoder, "parses", True):
+        sample.add("server", received - started - parse_time)
+        sample.add("parse", parse_time + time.time() - received)
+    else:
+        sample.add("server", time.time() - started)
+    sample.wire_bytes += wire_bytes
+    sample.body_bytes += body_bytes
+    _record_transfer(device, encoding, wire_bytes, body_bytes)
+    return result
+
+def _decompress_all(body, encoding):
+    if encoding not in ("gzip", "deflate"):
+        return body
+    try:
+        decompressor = _Decompressor(encoding)
+        return decompressor.decompress(body) + decompressor.flush()
+    except zlib.error:
+        return body
+
+class _Decompressor(object):
+    """
+        Incremental gzip/deflate decompression.  'deflate' is zlib wrapped
+        per the RFC but some servers send raw deflate, both are accepted.
+    """
+    def __init__(self, encoding):
+        self._raw_fallback = encoding == "deflate"
+        self._zobj = zlib.decompressobj(16 + zlib.MAX_WBITS if encoding == "gzip" else zlib.MAX_WBITS)
+
+    def decompress(self, data):
+        try:
+            out = self._zobj.decompress(data)
+        except zlib.error:
+            if not self._raw_fallback:
+                raise
+            self._zobj = zlib.decompressobj(-zlib.MAX_WBITS)
+            out = self._zobj.decompress(data)
+        self._raw_fallback = False
+        return out
+
+    def flush(self):
+        return self._zobj.flush()
+
+class _RawDecoder(object):
+    """
+        Collects the response body as a string.
+    """
+    parses = False
+
+    def __init__(self):
+        self._chunks = []
+
+    def feed(self, data):
+        self._chunks.append(data)
+
+    def close(self):
+        return "".join(self._chunks)
+
+class _JsonDecoder(_RawDecoder):
+    """
+        Decodes the JSON response.  With fields, the objects of the lists
+        in the response only keep those fields: the C decoder is faster
+        at decoding everything than any skipping parser in Python, so the
+        projection is applied right after decoding, before objects are built.
+    """
+    parses = True
+
+    def __init__(self, fields=None):
+        _RawDecoder.__init__(self)
+        self._fields = fields
+
+    def close(self):
+        resp = json.loads(_RawDecoder.close(self))
+        if self._fields and isinstance(resp, dict):
+            for k, v in resp.iteritems():
+                if isinstance(v, list):
+                    resp[k] = [_project(item, self._fields) for item in v]
+        return resp
+
+def _project(item, fields):
+    if not isinstance(item, dict):
+        return item
+    return dict((k, v) for k, v in item.iteritems() if k in fields)
+
+class _XmlDecoder(object):
+    """
+        Parses the XML response while it is received, returns the root element.
+        With fields, the elements of the listed objects that are not in fields
+        are skipped by the parser, see _ProjectingBuilder.
+    """
+    def __init__(self, fields=None):
+        if fields:
+            self._parser = XMLParser(target=_ProjectingBuilder(fields))
+        else:
+            self._parser = XMLParser()
+
+    def feed(self, data):
+        self._parser.feed(data)
+
+    def close(self):
+        return self._parser.close()
+
+class DecodedResponse(object):
+    """
+        A response already checked and converted, by decode_response.
+    """
+    __slots__ = ("data", "error")
+
+    def __init__(self, data, error=None):
+        self.data = data
+        self.error = error
+
+def decode_response(body, fmt, xml_convrt, fields=None):
+    """
+        Decodes a whole response body the way call_api does, into plain
+        dicts and lists.  Returns (data, error_code, error_message), data
+        is None and the error is set when the device answered with a failure.
+    """
+    decoder = _JsonDecoder(fields) if fmt == "json" else _XmlDecoder(fields)
+    decoder.feed(body)
+    resp = decoder.close()
+    error = _response_error(resp)
+    if error is not None:
+        return None, error.code, error.message
+    if fmt != "json":
+        resp = _XmlDict(resp, xml_convrt)
+    return resp, None, None
+
+class _ProjectingBuilder(object):
+    """
+        Parser target building the tree of a list response,
+            <response><xxx_list><xxx><field>...</field>...</xxx>...</xxx_list></response>
+        without the field elements (depth 4) that are not in fields, nor
+        anything below them.
+    """
+    FIELD_DEPTH = 4
+
+    def __init__(self, fields):
+        self._builder = TreeBuilder()
+        self._fields = fields
+        self._depth = 0
+        self._skip = 0
+
+    def start(self, tag, attrs):
+        self._depth += 1
+        if self._skip or (self._depth == self.FIELD_DEPTH and tag not in self._fields):
+            self._skip += 1
+        else:
+            self._builder.start(tag, attrs)
+
+    def end(self, tag):
+        self._depth -= 1
+        if self._skip:
+            self._skip -= 1
+        else:
+            return self._builder.end(tag)
+
+    def data(self, data):
+        if not self._skip:
+            self._builder.data(data)
+
+    def close(self):
+        return self._builder.close()
 
 class _XmlList(list):
-    def __init__(self, aList, assistant_dict):
+    def __init__(self, aList, assistant_dict, lazy=False):
         for element in aList:
             if len(element):
                 # treat like dict
@@ -115,7 +633,7 @@ class _XmlList(list):
                 if assistant_dict.has_key(element.tag):
                     self.append( _XmlList(element, assistant_dict) )
                 else:
-                    self.append( _XmlDict(element, assistant_dict) )
+                    self.append( _XmlDict(element, assistant_dict, defer=lazy) )
             elif element.text:
                 text = element.text.strip()
                 if text.isdigit():
@@ -137,8 +655,14 @@ class _XmlDict(dict):
     >>> xmldict = _XmlDictConvertWithAssistant(root, assistant_dict)
 
     And then use xmldict for what it is... a dict.
+
+    With lazy, the objects directly under the root (the items of a getAll
+    list or the object of a search) are built with defer: their own lists
+    are left as LazyValue for AxObject to decode on first access.  Each
+    LazyValue keeps its parsed element until then, which holds less memory
+    than the decoded list (see the retain cases of benchmark.py).
     '''
-    def __init__(self, parent_element, assistant_dict):
+    def __init__(self, parent_element, assistant_dict, lazy=False, defer=False):
         if parent_element.items():
             self.update(dict(parent_element.items()))
         for element in parent_element:
@@ -148,14 +672,17 @@ class _XmlDict(dict):
                 #if len(element) == 1 or element[0].tag != element[1].tag:
                 #    aDict = XmlDictConfigWithAssistant(element, assistant_dict)
                 if assistant_dict.has_key(element.tag):
-                    aDict = _XmlList(element, assistant_dict)
+                    if defer and not element.items():
+                        self[element.tag] = LazyValue(_deferred_list(element, assistant_dict))
+                        continue
+                    aDict = _XmlList(element, assistant_dict, lazy)
                 # treat like list - we assume that if the first two tags
                 # in a series are the same, then the rest are the same.
                 else:
                     # here, we put the list in dictionary; the key is the
                     # tag name the list elements all share in common, and
                     # the value is the list itself 
-                    aDict = _XmlDict(element, assistant_dict)
+                    aDict = _XmlDict(element, assistant_dict, defer=lazy)
                 # if the tag has attributes, add those to the dict
                 if element.items():
                     #aDict.update(dict(element.items()))
@@ -180,4 +707,7 @@ class _XmlDict(dict):
                 else:
                     self.update({element.tag: element.text})
 
+def _deferred_list(element, assistant_dict):
+    return lambda: _XmlList(element, assistant_dict)
+
 
@@ -0,0 +1,179 @@
+# -*- encoding: utf8 -*-
+"""
+    Metrics module:  per device and per method instrumentation of call_api.
+        CallSample      timings and sizes of one call, filled in by method_call
+        Histogram       fixed bucket latency histogram
+        MethodStats     aggregated calls of one aXAPI method on one device
+        CallMetrics     registry of MethodStats, queryable and exportable
+
+        Every call_api records, per device and method name (for example
+        slb.virtual_server.getAll), the number of calls, the error codes and a
+        latency histogram for each phase:
+            connect     TCP connect
+            tls         TLS handshake
+            server      sending the request and receiving the response
+            parse       decoding the response into the returned objects
+            total       the whole call, including retries and backoff
+
+        Usage:
+            vip_list = VirtualServer.getAll()
+            for stats in METRICS.slowest(5):
+                print stats["device"], stats["method"], stats["phases"]["total"]["mean"]
+            open("axapi_metrics.json", "w").write(METRICS.toJson())
+"""
+
+import bisect
+import json
+import threading
+
+PHASES = ("connect", "tls", "server", "parse", "total")
+
+# upper bounds in seconds of the histogram buckets, the last bucket is unbounded
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class CallSample(object):
+    """
+        Timings in seconds and sizes in bytes of one call, holding only the
+        phases the call went through.
+    """
+    def __init__(self):
+        self.timings = {}
+        self.request_bytes = 0
+        self.wire_bytes = 0
+        self.body_bytes = 0
+
+    def add(self, phase, seconds):
+        self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+
+class Histogram(object):
+
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q):
+        """
+            Upper bound of the bucket holding the q-th percentile (0-100),
+            the observed max for the unbounded bucket.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+    def toDict(self):
+        return dict(count=self.count, sum=self.sum, max=self.max,
+                    mean=self.sum / self.count if self.count else 0.0,
+                    p50=self.percentile(50), p95=self.percentile(95), p99=self.percentile(99),
+                    buckets=zip(list(self.bounds) + ["+Inf"], self.counts))
+
+class MethodStats(object):
+
+    def __init__(self, device, method):
+        self.device = device
+        self.method = method
+        self.calls = 0
+        self.errors = {}
+        self.request_bytes = 0
+        self.wire_bytes = 0
+        self.body_bytes = 0
+        self.phases = dict((phase, Histogram()) for phase in PHASES)
+
+    def record(self, sample, error=None):
+        self.calls += 1
+        if error is not None:
+            self.errors[error] = self.errors.get(error, 0) + 1
+        self.request_bytes += sample.request_bytes
+        self.wire_bytes += sample.wire_bytes
+        self.body_bytes += sample.body_bytes
+        for phase, seconds in sample.timings.iteritems():
+            self.phases[phase].observe(seconds)
+
+    def toDict(self):
+        return dict(device=self.device, method=self.method, calls=self.calls, errors=dict(self.errors),
+                    request_bytes=self.request_bytes, wire_bytes=self.wire_bytes, body_bytes=self.body_bytes,
+                    phases=dict((phase, h.toDict()) for phase, h in self.phases.iteritems()))
+
+class CallMetrics(object):
+    """
+        Thread safe registry of MethodStats keyed by (device, method).
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, device, method, sample, error=None):
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self._stats.get((device, method))
+            if stats is None:
+                stats = MethodStats(device, method)
+                self._stats[(device, method)] = stats
+            stats.record(sample, error)
+
+    def get(self, device, method):
+        """
+            Returns the stats of the method on the device as a dict, or None.
+        """
+        with self._lock:
+            stats = self._stats.get((device, method))
+            return stats.toDict() if stats is not None else None
+
+    def snapshot(self, device=None):
+        with self._lock:
+            return [s.toDict() for s in self._stats.itervalues() if device is None or s.device == device]
+
+    def slowest(self, n=10, phase="total"):
+        """
+            Returns the n (device, method) stats with the highest mean latency of the phase.
+        """
+        return sorted(self.snapshot(), key=lambda s: s["phases"][phase]["mean"], reverse=True)[:n]
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def toJson(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def toPrometheus(self):
+        """
+            Returns the metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        for s in self.snapshot():
+            labels = 'device="%s",method="%s"'%(s["device"], s["method"])
+            lines.append('axapi_calls_total{%s} %d'%(labels, s["calls"]))
+            for code, n in sorted(s["errors"].iteritems()):
+                lines.append('axapi_errors_total{%s,code="%s"} %d'%(labels, code, n))
+            for name in ("request_bytes", "wire_bytes", "body_bytes"):
+                lines.append('axapi_%s_total{%s} %d'%(name, labels, s[name]))
+            for phase in PHASES:
+                h = s["phases"][phase]
+                cumulative = 0
+                for bound, n in h["buckets"]:
+                    cumulative += n
+                    lines.append('axapi_latency_seconds_bucket{%s,phase="%s",le="%s"} %d'%(labels, phase, bound, cumulative))
+                lines.append('axapi_latency_seconds_sum{%s,phase="%s"} %f'%(labels, phase, h["sum"]))
+                lines.append('axapi_latency_seconds_count{%s,phase="%s"} %d'%(labels, phase, h["count"]))
+        return "\n".join(lines) + "\n"
+
+METRICS = CallMetrics()
@@ -0,0 +1,706 @@
+# -*- encoding: utf8 -*-
+"""
+    Mock server module:  local stand-in for an AX device speaking aXAPI V2.
+        MockStore       in-memory configuration of one device
+        MockDevice      threaded HTTP(S) server in front of a MockStore
+        seed            fills a store with synthetic objects
+
+        Implements authenticate/session.close and the slb.*, slb.template.*,
+        gslb.*, network.* and system.ntp.* methods used by the SDK, in json
+        and url formats, so the SDK can be exercised and load tested without
+        an ADC.  Latency, HTTP errors, aXAPI failures and dropped connections
+        can be injected.
+
+        Usage:
+            # from the command line, 20000 virtual servers on port 8080
+            python mock_server.py --port 8080 --seed 20000 --latency 0.005
+
+            # or in process
+            device = MockDevice(port=0, latency=0.002)
+            seed(device.store, virtual_servers=20000)
+            device.start()
+            method_call.AXAPI_SCHEME = "http"
+            ctx = method_call.AxApiContext(device.address, "admin", "a10").authentication()
+            vip_list = VirtualServer.getAll()
+            device.stop()
+"""
+
+import BaseHTTPServer
+import SocketServer
+import argparse
+import gzip
+import json
+import random
+import socket
+import ssl
+import sys
+import threading
+import time
+import urlparse
+import uuid
+import zlib
+from StringIO import StringIO
+from collections import OrderedDict
+from xml.sax.saxutils import escape
+
+# aXAPI error codes returned by the mock
+ERR_INVALID_SESSION = 1009
+ERR_BAD_CREDENTIALS = 1008
+ERR_NOT_FOUND = 1023
+ERR_EXISTS = 1405
+ERR_UNSUPPORTED = 1001
+ERR_INJECTED = 1500
+
+# method prefix: (list tag, object tag, key field or tuple of key fields)
+COLLECTIONS = {
+    "slb.service_group": ("service_group_list", "service_group", "name"),
+    "slb.server": ("server_list", "server", "name"),
+    "slb.virtual_server": ("virtual_server_list", "virtual_server", "name"),
+    "gslb.site": ("gslb_site_list", "gslb_site", "name"),
+    "gslb.zone": ("zone_list", "zone", "name"),
+    "gslb.policy": ("policy_list", "policy", "name"),
+    "gslb.dns_proxy": ("gslb_vserver_list", "gslb_vserver", "name"),
+    "gslb.service_ip": ("service_ip_list", "service_ip", "name"),
+    "gslb.snmp_template": ("snmp_template_list", "snmp_template", "name"),
+    "network.interface": ("interface_list", "interface", "port_num"),
+    "network.ve": ("ve_list", "ve", "port_num"),
+    "network.route.ipv4static": ("route_list", "route", ("address", "mask", "gateway")),
+    "system.ntp": ("ntp_list", "ntp", "server"),
+}
+
+# method prefix: object tag of the get/set settings
+SINGLETONS = {
+    "network.mgmt_interface": "mgmt_interface",
+    "network.dns.server": "dns",
+}
+
+# method prefix: (statistics list tag, nested list, nested statistics list)
+STATISTICS = {
+    "slb.service_group": ("service_group_stat_list", "member_list", "member_stat_list"),
+    "slb.server": ("server_stat_list", "port_list", "port_stat_list"),
+    "slb.virtual_server": ("virtual_server_stat_list", "vport_list", "vport_stat_list"),
+}
+
+# method prefix: (statistics list tag, link speed in Mbps, None for no link)
+PORT_STATISTICS = {
+    "network.interface": ("interface_stat_list", 10000),
+    "network.ve": ("ve_stat_list", None),
+}
+
+TEMPLATE_TYPES = ("cache", "smtp", "dns", "diameter", "http", "tcp", "udp", "tcp_proxy",
+                  "server", "server_port", "virtual_server", "vip_port", "cookie_persistence",
+                  "src_ip_persistence", "dst_ip_persistence", "ssl_persistence", "conn_reuse",
+                  "rtsp", "sip", "pbslb")
+
+def _key(key, obj):
+    """
+        Returns the collection key of an object, a tuple for a composite key.
+    """
+    if isinstance(key, tuple):
+        return tuple(obj.get(k) for k in key)
+    return obj.get(key)
+
+class MockFault(Exception):
+    def __init__(self, code, message):
+        Exception.__init__(self, "%d : %s"%(code, message))
+        self.code = code
+        self.message = message
+
+class MockStore(object):
+    """
+        Configuration of one mock device.  All access goes through call().
+
+        credentials     dict of username: password, None accepts any login
+        session_timeout idle seconds after which a session id is rejected
+    """
+
+    def __init__(self, credentials=None, session_timeout=600):
+        self.credentials = credentials
+        self.session_timeout = session_timeout
+        self.collections = {}
+        self.global_settings = {}
+        self.singletons = {}
+        self.sessions = {}
+        self.started = time.time()
+        self._rendered = {}
+        self._lock = threading.RLock()
+
+    def spec(self, prefix):
+        if prefix in COLLECTIONS:
+            return COLLECTIONS[prefix]
+        if prefix.startswith("slb.template."):
+            name = prefix[len("slb.template."):]
+            return ("%s_template_list"%name, "%s_template"%name, "name")
+        return None
+
+    def objects(self, prefix):
+        return self.collections.setdefault(prefix, OrderedDict())
+
+    def add(self, prefix, obj):
+        """
+            Stores the object, replacing any existing one with the same key.
+        """
+        with self._lock:
+            self.objects(prefix)[_key(self.spec(prefix)[2], obj)] = obj
+            self._rendered.clear()
+
+    def call(self, args, body, fmt):
+        """
+            Executes the aXAPI method in args.  Returns the response payload as
+            a dict, or None for a plain OK.  Raises MockFault on errors.
+        """
+        method = args.get("method", "")
+        if method == "authenticate":
+            return self._authenticate(args)
+        self._checkSession(args.get("session_id"))
+        if method == "session.close":
+            self.sessions.pop(args.get("session_id"), None)
+            return None
+        if method == "gslb.global.get":
+            return dict(self.global_settings)
+        if method == "gslb.global.set":
+            with self._lock:
+                self.global_settings.update(self._decodeBody(body, fmt, "global"))
+            return None
+        prefix, op = method.rsplit(".", 1) if "." in method else ("", method)
+        if prefix in SINGLETONS and op in ("get", "set"):
+            return self._singleton(prefix, op, body, fmt)
+        if prefix.endswith(".ipv4") or prefix.endswith(".ipv6"):
+            return self._address(prefix, op, args)
+        if prefix == "gslb.zone.service":
+            return self._zoneService(op, body, fmt)
+        spec = self.spec(prefix)
+        if spec is None:
+            raise MockFault(ERR_UNSUPPORTED, "unsupported method %s"%method)
+        list_tag, obj_tag, key = spec
+        with self._lock:
+            if op == "getAll" or (op == "get" and prefix == "system.ntp"):
+                return {list_tag: self.objects(prefix).values()}
+            if op in ("get", "search"):
+                return {obj_tag: self._find(prefix, args)}
+            if op in ("fetchAllStatistics", "fetchStatistics") and prefix in STATISTICS:
+                return self._statistics(prefix, args.get("name"))
+            if op in ("fetchAllStatistics", "fetchStatistics") and prefix in PORT_STATISTICS:
+                return self._portStatistics(prefix, args.get("port_num"))
+            if op in ("create", "add"):
+                for obj in self._bodyObjects(body, fmt, list_tag, obj_tag):
+                    if _key(key, obj) in self.objects(prefix):
+                        raise MockFault(ERR_EXISTS, "%s already exists"%(_key(key, obj),))
+                    self.add(prefix, obj)
+                return None
+            if op in ("update", "set"):
+                for obj in self._bodyObjects(body, fmt, list_tag, obj_tag):
+                    current = self.objects(prefix).get(_key(key, obj))
+                    if current is None and op == "update":
+                        raise MockFault(ERR_NOT_FOUND, "%s not found"%(_key(key, obj),))
+                    merged = dict(current or {})
+                    merged.update(obj)
+                    self.add(prefix, merged)
+                return None
+            if op == "delete":
+                if body:
+                    keys = [_key(key, obj) for obj in self._bodyObjects(body, fmt, list_tag, obj_tag)]
+                else:
+                    keys = [_key(key, self._find(prefix, args))]
+                for k in keys:
+                    if self.objects(prefix).pop(k, None) is None:
+                        raise MockFault(ERR_NOT_FOUND, "%s not found"%(k,))
+                self._rendered.clear()
+                return None
+        raise MockFault(ERR_UNSUPPORTED, "unsupported method %s"%method)
+
+    def rendered(self, args, fmt, render):
+        """
+            getAll responses are cached until the next write, so that the
+            mock spends its time answering rather than serialising.
+        """
+        method = args.get("method", "")
+        if not method.endswith(".getAll"):
+            return None
+        key = (method, fmt)
+        with self._lock:
+            if key not in self._rendered:
+                self._rendered[key] = render(self.call(args, "", fmt))
+            return self._rendered[key]
+
+    def _authenticate(self, args):
+        if self.credentials is not None and self.credentials.get(args.get("username")) != args.get("password"):
+            raise MockFault(ERR_BAD_CREDENTIALS, "Invalid username or password")
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self.sessions[session_id] = time.time()
+        return {"session_id": session_id}
+
+    def _checkSession(self, session_id):
+        with self._lock:
+            last = self.sessions.get(session_id)
+            if last is None or time.time() - last > self.session_timeout:
+                self.sessions.pop(session_id, None)
+                raise MockFault(ERR_INVALID_SESSION, "Invalid session ID")
+            self.sessions[session_id] = time.time()
+
+    def _find(self, prefix, args):
+        key = self.spec(prefix)[2]
+        objects = self.objects(prefix)
+        if isinstance(key, tuple) and all(k in args for k in key):
+            obj = objects.get(_key(key, args))
+        elif key in args:
+            value = args[key]
+            obj = objects.get(value)
+            if obj is None and value.isdigit():
+                obj = objects.get(int(value))
+        else:
+            obj = None
+            for field in ("name", "host"):
+                if field in args:
+                    obj = next((o for o in objects.itervalues() if o.get(field) == args[field]), None)
+                    break
+        if obj is None:
+            raise MockFault(ERR_NOT_FOUND, "object not found")
+        return obj
+
+    def _singleton(self, prefix, op, body, fmt):
+        obj_tag = SINGLETONS[prefix]
+        with self._lock:
+            settings = self.singletons.setdefault(prefix, {})
+            if op == "get":
+                return {obj_tag: dict(settings)}
+            settings.update(self._decodeBody(body, fmt, obj_tag))
+        return None
+
+    def _statistics(self, prefix, name):
+        stat_tag, port_list, port_stat_list = STATISTICS[prefix]
+        objects = self.objects(prefix).values()
+        if name:
+            objects = [o for o in objects if o.get("name") == name]
+        elapsed = time.time() - self.started
+        stats = []
+        for obj in objects:
+            stat = dict((k, v) for k, v in obj.iteritems() if not isinstance(v, (list, dict)))
+            stat.update(_counters(obj.get("name", ""), elapsed))
+            stat[port_stat_list] = []
+            for port in obj.get(port_list, []):
+                port_stat = dict((k, v) for k, v in port.iteritems() if not isinstance(v, (list, dict)))
+                port_stat.update(_counters("%s:%s"%(obj.get("name"), port.get("port", port.get("port_num"))), elapsed))
+                stat[port_stat_list].append(port_stat)
+            stats.append(stat)
+        return {stat_tag: stats}
+
+    def _portStatistics(self, prefix, port_num):
+        stat_tag, link_speed = PORT_STATISTICS[prefix]
+        objects = self.objects(prefix).values()
+        if port_num:
+            objects = [o for o in objects if str(o.get("port_num")) == str(port_num)]
+        elapsed = time.time() - self.started
+        stats = []
+        for obj in objects:
+            stat = _port_counters("%s:%s"%(prefix, obj.get("port_num")), elapsed)
+            stat["port_num"] = obj.get("port_num")
+            stat["status"] = 1 if str(obj.get("status", 1)) != "0" else 0
+            if link_speed is not None:
+                stat["link_speed"] = link_speed if stat["status"] else 0
+            stats.append(stat)
+        return {stat_tag: stats}
+
+    def _address(self, prefix, op, args):
+        parent, family = prefix.rsplit(".", 1)
+        obj = self._find(parent, args)
+        list_tag = "%s_addr_list"%family
+        if family == "ipv4":
+            entry = {"ipv4_addr": args.get("ipv4_addr"), "ipv4_mask": args.get("ipv4_mask")}
+        else:
+            entry = {"ipv6_addr": args.get("ipv6_addr"), "ipv6_prefix_len": _scalar(args.get("ipv6_prefix_len", ""))}
+        with self._lock:
+            addresses = obj.setdefault(list_tag, [])
+            if op == "add":
+                if entry in addresses:
+                    raise MockFault(ERR_EXISTS, "address already configured")
+                addresses.append(entry)
+            elif op == "delete":
+                if entry not in addresses:
+                    raise MockFault(ERR_NOT_FOUND, "address not configured")
+                addresses.remove(entry)
+            else:
+                raise MockFault(ERR_UNSUPPORTED, "unsupported method %s.%s"%(prefix, op))
+            self._rendered.clear()
+        return None
+
+    def _zoneService(self, op, body, fmt):
+        data = self._decodeBody(body, fmt, None)
+        service = data.get("service") or {}
+        with self._lock:
+            zone = self.objects("gslb.zone").get(data.get("name"))
+            if zone is None:
+                raise MockFault(ERR_NOT_FOUND, "zone %s not found"%data.get("name"))
+            services = zone.setdefault("service_list", [])
+            key = (service.get("name"), _scalar(str(service.get("port", ""))))
+            index = next((i for i, s in enumerate(services)
+                          if (s.get("name"), _scalar(str(s.get("port", "")))) == key), None)
+            if op == "create":
+                if index is not None:
+                    raise MockFault(ERR_EXISTS, "service %s:%s already exists"%key)
+                services.append(service)
+            elif index is None:
+                raise MockFault(ERR_NOT_FOUND, "service %s:%s not found"%key)
+            elif op == "update":
+                services[index] = service
+            elif op == "delete":
+                del services[index]
+            else:
+                raise MockFault(ERR_UNSUPPORTED, "unsupported method gslb.zone.service.%s"%op)
+            self._rendered.clear()
+        return None
+
+    def _bodyObjects(self, body, fmt, list_tag, obj_tag):
+        data = self._decodeBody(body, fmt, obj_tag)
+        if list_tag in data and isinstance(data[list_tag], list):
+            return data[list_tag]
+        return [data]
+
+    def _decodeBody(self, body, fmt, obj_tag):
+        if fmt == "json":
+            data = json.loads(body) if body else {}
+            return data.get(obj_tag, data)
+        return decode_url_data(body)
+
+def decode_url_data(data):
+    """
+        Decodes the url format POST data built by AxObject.getRequestPostDataXml:
+            key=value                       scalar
+            key=k1\\x03v1\\x02k2\\x03v2       dictionary
+            key=item1\\x02item2&item1=...   list of dictionaries
+        List items may hold lists themselves, as k\\x03ref1\\x02ref2.
+    """
+    pairs = []
+    for part in data.split("&"):
+        if part:
+            k, _, v = part.partition("=")
+            pairs.append((k, v))
+    raw = dict(pairs)
+
+    def is_list(k, names):
+        return bool(names) and all(n and n != k and chr(3) in raw.get(n, "") for n in names)
+
+    def url_dict(v):
+        d = {}
+        key = None
+        for item in v.split(chr(2)):
+            if chr(3) in item:
+                key, _, value = item.partition(chr(3))
+                d[key] = [value]
+            elif key is not None:
+                # next reference of a nested list
+                d[key].append(item)
+        for key, values in d.items():
+            if is_list(key, values):
+                referenced.update(values)
+                d[key] = [url_dict(raw[n]) for n in values]
+            else:
+                d[key] = _scalar(chr(2).join(values))
+        return d
+
+    referenced = set()
+    result = {}
+    for k, v in pairs:
+        names = v.split(chr(2))
+        if is_list(k, names):
+            referenced.update(names)
+            result[k] = [url_dict(raw[n]) for n in names]
+        elif chr(3) in v:
+            result[k] = url_dict(v)
+        else:
+            result[k] = _scalar(v)
+    for k in referenced:
+        result.pop(k, None)
+    return result
+
+def _scalar(v):
+    return int(v) if v.isdigit() else v
+
+def _counters(name, elapsed):
+    """
+        Synthetic, monotonically increasing counters for an object.
+    """
+    rate = zlib.crc32(name) % 1000 + 1
+    tot_conns = int(rate * elapsed) + rate * 100
+    return dict(status=1, cur_conns=rate % 97, tot_conns=tot_conns,
+                req_pkts=tot_conns * 7, resp_pkts=tot_conns * 6,
+                req_bytes=tot_conns * 900, resp_bytes=tot_conns * 5200,
+                cur_reqs=rate % 13, tot_reqs=tot_conns * 2, tot_succ_reqs=tot_conns * 2 - rate % 5)
+
+def _port_counters(name, elapsed):
+    """
+        Synthetic, monotonically increasing counters for an interface.
+    """
+    rate = zlib.crc32(name) % 100000 + 1000
+    in_pkts = int(rate * elapsed) + rate * 100
+    out_pkts = in_pkts * 9 // 10
+    return dict(in_pkts=in_pkts, out_pkts=out_pkts, in_bytes=in_pkts * 800, out_bytes=out_pkts * 1100,
+                in_errors=in_pkts // 1000000, out_errors=out_pkts // 2000000)
+
+def render_json(payload):
+    if payload is None:
+        payload = {"response": {"status": "OK"}}
+    return json.dumps(payload)
+
+def render_xml(payload):
+    out = ['<?xml version="1.0" encoding="utf-8" ?><response status="ok">']
+    for k, v in (payload or {}).iteritems():
+        _xml_value(k, v, out)
+    out.append('</response>')
+    return u"".join(out).encode("utf8")
+
+def _xml_value(tag, value, out):
+    if isinstance(value, dict):
+        out.append(u"<%s>"%tag)
+        for k, v in value.iteritems():
+            _xml_value(k, v, out)
+        out.append(u"</%s>"%tag)
+    elif isinstance(value, list):
+        item_tag = tag[:-len("_list")] if tag.endswith("_list") else "item"
+        out.append(u"<%s>"%tag)
+        for v in value:
+            _xml_value(item_tag, v, out)
+        out.append(u"</%s>"%tag)
+    else:
+        if not isinstance(value, unicode):
+            value = str(value).decode("utf8")
+        out.append(u"<%s>%s</%s>"%(tag, escape(value), tag))
+
+def render_fault(fault, fmt):
+    if fmt == "json":
+        return json.dumps({"response": {"status": "fail", "err": {"code": fault.code, "msg": fault.message}}})
+    return ('<?xml version="1.0" encoding="utf-8" ?><response status="fail"><error code="%d" msg="%s" /></response>'
+            %(fault.code, escape(fault.message, {'"': "&quot;"})))
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        device = self.server.device
+        length = int(self.headers.getheader("content-length") or 0)
+        body = self.rfile.read(length)
+        query = dict(urlparse.parse_qsl(urlparse.urlsplit(self.path).query))
+        if "method" in query:
+            args, post_data = query, body
+        else:
+            args, post_data = dict(urlparse.parse_qsl(body)), ""
+        fmt = args.get("format", "url")
+        render = render_json if fmt == "json" else render_xml
+
+        if device.latency or device.jitter:
+            time.sleep(device.latency + random.uniform(0, device.jitter))
+        if device.drop_rate and random.random() < device.drop_rate:
+            self.close_connection = 1
+            return
+        if device.error_rate and random.random() < device.error_rate:
+            return self._send(503, "service unavailable&injected")
+
+        try:
+            if device.fail_rate and random.random() < device.fail_rate:
+                raise MockFault(ERR_INJECTED, "injected failure")
+            out = None
+            if args.get("method") != "authenticate":
+                device.store._checkSession(args.get("session_id"))
+                out = device.store.rendered(args, fmt, render)
+            if out is None:
+                payload = device.store.call(args, post_data, fmt)
+                out = render_xml(payload) if args.get("method") == "authenticate" else render(payload)
+        except MockFault, fault:
+            out = render_fault(fault, fmt)
+        self._send(200, out)
+
+    def _send(self, status, out):
+        headers = {}
+        if self.server.device.compress and "gzip" in (self.headers.getheader("accept-encoding") or ""):
+            buf = StringIO()
+            with gzip.GzipFile(fileobj=buf, mode="wb", compresslevel=1) as f:
+                f.write(out)
+            out = buf.getvalue()
+            headers["Content-Encoding"] = "gzip"
+        self.send_response(status)
+        for k, v in headers.iteritems():
+            self.send_header(k, v)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    def log_message(self, format, *args):
+        if self.server.device.verbose:
+            BaseHTTPServer.BaseHTTPRequestHandler.log_message(self, format, *args)
+
+class _ThreadingServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # clients rejecting the certificate or dropping the connection
+        if self.device.verbose or not isinstance(sys.exc_info()[1], socket.error):
+            BaseHTTPServer.HTTPServer.handle_error(self, request, client_address)
+
+class MockDevice(object):
+    """
+        host, port          listening address, port 0 picks a free port
+        store               MockStore to serve, a new empty one by default
+        certfile, keyfile   serve HTTPS with this certificate
+        latency, jitter     seconds added to every request, jitter is uniform
+        error_rate          probability of an HTTP 503
+        fail_rate           probability of an aXAPI status="fail" response
+        drop_rate           probability of closing the connection without answer
+        compress            gzip responses when the client accepts it
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, store=None, certfile=None, keyfile=None,
+                 latency=0.0, jitter=0.0, error_rate=0.0, fail_rate=0.0, drop_rate=0.0,
+                 compress=True, verbose=False):
+        self.store = store if store is not None else MockStore()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.fail_rate = fail_rate
+        self.drop_rate = drop_rate
+        self.compress = compress
+        self.verbose = verbose
+        self.server = _ThreadingServer((host, port), _Handler)
+        self.server.device = self
+        if certfile:
+            self.server.socket = ssl.wrap_socket(self.server.socket, certfile=certfile, keyfile=keyfile, server_side=True)
+        self.address = "%s:%d"%self.server.server_address[:2]
+        self._thread = None
+
+    def start(self):
+        """
+            Serves in a background thread.
+        """
+        self._thread = threading.Thread(target=self.server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def seed(store, virtual_servers=1000, servers=None, service_groups=None, templates=20,
+         zones=50, sites=8, interfaces=8, ves=32, rng=None):
+    """
+        Fills the store with synthetic, cross-referenced configuration.  By
+        default there are as many real servers as virtual servers and one
+        service group per ten virtual servers.
+    """
+    rng = rng or random.Random(0)
+    servers = virtual_servers if servers is None else servers
+    service_groups = max(1, virtual_servers // 10) if service_groups is None else service_groups
+
+    for i in xrange(servers):
+        store.add("slb.server", {"name": "s%05d"%i, "host": _ip(10, i), "status": 1, "weight": 1,
+                                 "health_monitor": "", "conn_limit": 8000000,
+                                 "port_list": [{"port_num": 80, "protocol": 2, "status": 1, "weight": 1},
+                                               {"port_num": 443, "protocol": 2, "status": 1, "weight": 1}]})
+    for i in xrange(service_groups):
+        members = [{"server": "s%05d"%((i * 4 + j) % max(1, servers)), "port": 80, "status": 1, "template": "default"}
+                   for j in range(4)]
+        store.add("slb.service_group", {"name": "sg%04d"%i, "protocol": 2, "lb_method": i % 14,
+                                        "health_monitor": "ping", "member_list": members})
+    for i in xrange(virtual_servers):
+        group = "sg%04d"%(i % service_groups)
+        vports = [{"port": 80, "protocol": 11, "status": 1, "service_group": group,
+                   "http_template": "http_tmpl%03d"%(i % templates), "tcp_template": "tcp_tmpl%03d"%(i % templates),
+                   "cookie_persistence_template": "", "source_nat": ""},
+                  {"port": 443, "protocol": 12, "status": 1, "service_group": group,
+                   "http_template": "", "tcp_template": "tcp_tmpl%03d"%((i + 1) % templates),
+                   "cookie_persistence_template": "cookie_persistence_tmpl%03d"%(i % templates), "source_nat": ""}]
+        store.add("slb.virtual_server", {"name": "vip%05d"%i, "address": _ip(172, i), "status": 1,
+                                         "arp_status": 1, "stats_data": 1, "vrid": 0,
+                                         "vport_list": vports, "aflex_list": [], "acl_natpool_binding_list": []})
+    for template_type in TEMPLATE_TYPES:
+        for i in xrange(templates):
+            template = {"name": "%s_tmpl%03d"%(template_type, i), "idle_timeout": 120 + i % 3 * 60}
+            if template_type == "cache":
+                template["policy_list"] = [{"uri": "/static/%d"%j, "action": 1} for j in range(4)]
+            store.add("slb.template.%s"%template_type, template)
+
+    for i in xrange(sites):
+        devices = [{"name": "slb%02d_%d"%(i, j), "ip_addr": _ip(192, i * 4 + j), "admin_preference": 100,
+                    "max_client": 32768, "gateway": "0.0.0.0",
+                    "vip_server_list": [{"name": "gsip%04d"%((i * 4 + j) % max(1, zones))}]} for j in range(2)]
+        store.add("gslb.site", {"name": "site%02d"%i, "weight": 1 + rng.randint(0, 9), "status": 1,
+                                "bandwidth_cost": {}, "active_rrt": {}, "ip_server_list": [],
+                                "slb_device_list": devices})
+    for i in xrange(zones):
+        store.add("gslb.service_ip", {"name": "gsip%04d"%i, "ip_address": _ip(172, i), "status": 1,
+                                      "health_monitor": "ping",
+                                      "port_list": [{"port_num": 80, "protocol": 2, "health_monitor": "ping", "status": 1}]})
+    store.add("gslb.policy", {"name": "default", "metric": {"health_check": {"enabled": 1},
+                                                             "weighted_site": {"enabled": 1},
+                                                             "weighted_ip": {"enabled": 0}},
+                              "dns_options": {}, "geo_location": {}})
+    for i in xrange(zones):
+        services = [{"name": "www", "port": 80, "policy": "default", "action": 0,
+                     "dns_address_record_list": [{"vip_order": "gsip%04d"%((i + j) % zones), "as_replace": 0,
+                                                  "no_response": 0, "static": 0, "weight": 1} for j in range(2)],
+                     "dns_mx_record_list": [], "dns_cname_record_list": [], "dns_ns_record_list": []}]
+        store.add("gslb.zone", {"name": "zone%04d.example.com"%i, "ttl": 10, "policy": "default",
+                                "disable_all_services": 0, "dns_mx_record_list": [], "dns_ns_record_list": [],
+                                "service_list": services})
+
+    for i in xrange(1, interfaces + 1):
+        store.add("network.interface", {"port_num": i, "type": "ethernet", "name": "e%d"%i, "status": 1,
+                                        "duplexity": "auto", "speed": "auto",
+                                        "ipv4_addr_list": [{"ipv4_addr": "10.255.%d.1"%i, "ipv4_mask": "255.255.255.0"}],
+                                        "ipv6_addr_list": []})
+    for i in xrange(1, ves + 1):
+        store.add("network.ve", {"port_num": i, "name": "ve%d"%i, "status": 1,
+                                 "ipv4_addr_list": [{"ipv4_addr": "10.254.%d.1"%i, "ipv4_mask": "255.255.255.0"}],
+                                 "ipv6_addr_list": []})
+    store.add("network.route.ipv4static", {"address": "0.0.0.0", "mask": "0.0.0.0",
+                                           "gateway": "10.255.1.254", "distance": 1})
+    for i in xrange(1, ves + 1):
+        store.add("network.route.ipv4static", {"address": "10.%d.%d.0"%(100 + i // 256, i % 256), "mask": "255.255.255.0",
+                                               "gateway": "10.254.%d.254"%i, "distance": 1})
+    store.singletons["network.mgmt_interface"] = {"ipv4_address": "192.168.0.10", "ipv4_netmask": "255.255.255.0",
+                                                  "ipv4_gateway": "192.168.0.1", "status": 1, "speed": "auto",
+                                                  "apps_use_mgmt_port": 0}
+    store.singletons["network.dns.server"] = {"primary_dns": "10.0.0.53", "secondary_dns": "", "dns_suffix": "example.com"}
+    store.add("system.ntp", {"server": "pool.ntp.org", "status": 1})
+
+    addresses = [s["host"] for s in store.objects("slb.server").itervalues()]
+    addresses += [v["address"] for v in store.objects("slb.virtual_server").itervalues()]
+    addresses += [d["ip_addr"] for site in store.objects("gslb.site").itervalues() for d in site["slb_device_list"]]
+    assert len(set(addresses)) == len(addresses), "duplicate synthetic addresses"
+    return store
+
+def _ip(first, i):
+    # last octet 1..254, unique for i below 254 * 65536
+    return "%d.%d.%d.%d"%(first, i // (254 * 256) % 256, i // 254 % 256, i % 254 + 1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock aXAPI device")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--seed", type=int, default=1000, help="number of synthetic virtual servers")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    parser.add_argument("--session-timeout", type=int, default=600)
+    parser.add_argument("--certfile")
+    parser.add_argument("--keyfile")
+    parser.add_argument("--no-compress", action="store_true")
+    parser.add_argument("--verbose", action="store_true")
+    options = parser.parse_args()
+
+    store = seed(MockStore(session_timeout=options.session_timeout), virtual_servers=options.seed)
+    device = MockDevice(options.host, options.port, store, options.certfile, options.keyfile,
+                        options.latency, options.jitter, options.error_rate, options.fail_rate,
+                        options.drop_rate, not options.no_compress, options.verbose)
+    print "mock aXAPI device on %s://%s (set method_call.AXAPI_SCHEME = \"%s\")"%(
+        "https" if options.certfile else "http", device.address, "https" if options.certfile else "http")
+    try:
+        device.server.serve_forever()
+    except KeyboardInterrupt:
+        device.stop()
+
+if __name__ == "__main__":
+    main()
@@ -4,12 +4,11 @@
         Support the object-oriented interface for the network such as:
             Interface
             VirtualInterface
+            InterfaceStats
+            VirtualInterfaceStats
             MgmtInterface
             GatewayConfig
-            Trunk
-            VlanConfig
             NetworkRoute
-            NetworkArp
             NetworkDns
                         
     
@@ -70,12 +69,12 @@ class Interface(AxObject):
     __xml_convrt__ = {"interface_list": "interface", "ipv4_addr_list": "ipv4", "ipv6_addr_list": "ipv6"}
 
     @staticmethod
-    def getAll():
+    def getAll(fields = None):
         """ method : network.interface.getAll
             Returns a list of interface configuration in Interface instance.
         """
         try:
-            res = method_call.call_api(Interface(), method = "network.interface.getAll", format = "url")
+            res = method_call.call_api(Interface(), method = "network.interface.getAll", format = "url", _lazy = True, _fields = fields)
             a_list = []
             for item in res["interface_list"]:
                 a_list.append( Interface(**item) )
@@ -145,24 +144,26 @@ class Interface(AxObject):
             return e.code
         
     def deleteAllIPv4Addr(self):
-        try:
-            if self.getObjectDict.has_key("ipv4_addr_list"):
-                addr_list = self.getObjectDict()["ipv4_addr_list"]
-                for addr in addr_list:
-                    self.deleteIpv4Address(addr.ipv4_addr, addr.ipv4_mask)
-            return 0 
-        except AxAPIError, e:
-            return e.code
+        """ Delete the IPv4 addresses of ipv4_addr_list from the interface,
+            one call per address in turn; address_reconcile.reconcile runs
+            them concurrently for many interfaces and devices.
+            Returns 0, or the error code of the last failed delete.
+        """
+        code = 0
+        for addr in self.getObjectDict().get("ipv4_addr_list") or []:
+            code = self.deleteIpv4Address(addr["ipv4_addr"], addr["ipv4_mask"]) or code
+        return code
         
     def deleteAllIPv6Addr(self):
-        try:
-            if self.getObjectDict.has_key("ipv6_addr_list"):
-                addr_list = self.getObjectDict()["ipv6_addr_list"]
-                for addr in addr_list:
-                    self.deleteIpv6Address(addr.ipv6_addr, addr.ipv6_prefix_len)
-            return 0 
-        except AxAPIError, e:
-            return e.code
+        """ Delete the IPv6 addresses of ipv6_addr_list from the interface,
+            one call per address in turn; address_reconcile.reconcile runs
+            them concurrently for many interfaces and devices.
+            Returns 0, or the error code of the last failed delete.
+        """
+        code = 0
+        for addr in self.getObjectDict().get("ipv6_addr_list") or []:
+            code = self.deleteIpv6Address(addr["ipv6_addr"], addr["ipv6_prefix_len"]) or code
+        return code
 
 class VirtualInterface(AxObject):
     """
@@ -203,12 +204,12 @@ class VirtualInterface(AxObject):
     __xml_convrt__ = {"ve_list": "ve", "ipv4_addr_list": "ipv4", "ipv6_addr_list": "ipv6_addr"}
 
     @staticmethod
-    def getAll():
+    def getAll(fields = None):
         """ method : network.ve.getAll
             Returns a list of ve configuration in VirtualInterface instance.
         """
         try:
-            res = method_call.call_api(VirtualInterface(), method = "network.ve.getAll", format = "url")
+            res = method_call.call_api(VirtualInterface(), method = "network.ve.getAll", format = "url", _lazy = True, _fields = fields)
             a_list = []
             for item in res["ve_list"]:
                 a_list.append( VirtualInterface(**item) )
@@ -223,7 +224,7 @@ class VirtualInterface(AxObject):
         """
         try:
             r = method_call.call_api(VirtualInterface(), method = "network.ve.get", port_num = port_num, format = "url")
-            return Interface(**r[VirtualInterface.__obj_name__])
+            return VirtualInterface(**r[VirtualInterface.__obj_name__])
         except AxAPIError:
             return None
 
@@ -278,22 +279,336 @@ class VirtualInterface(AxObject):
             return e.code
         
     def deleteAllIPv4Addr(self):
+        """ Delete the IPv4 addresses of ipv4_addr_list from the interface,
+            one call per address in turn; address_reconcile.reconcile runs
+            them concurrently for many interfaces and devices.
+            Returns 0, or the error code of the last failed delete.
+        """
+        code = 0
+        for addr in self.getObjectDict().get("ipv4_addr_list") or []:
+            code = self.deleteIpv4Address(addr["ipv4_addr"], addr["ipv4_mask"]) or code
+        return code
+        
+    def deleteAllIPv6Addr(self):
+        """ Delete the IPv6 addresses of ipv6_addr_list from the interface,
+            one call per address in turn; address_reconcile.reconcile runs
+            them concurrently for many interfaces and devices.
+            Returns 0, or the error code of the last failed delete.
+        """
+        code = 0
+        for addr in self.getObjectDict().get("ipv6_addr_list") or []:
+            code = self.deleteIpv6Address(addr["ipv6_addr"], addr["ipv6_prefix_len"]) or code
+        return code
+
+class InterfaceStats(AxObject):
+    """
+        Implementation of the aXAPI network.interface.fetchAllStatistics/.fetchStatistics method to
+        collect the interface statistics data
+
+        Usage:
+            # interface stats with following data fields: all read-only
+            # port_num         interface number
+            # status           interface link status, down(0) or up(1)
+            # link_speed       negotiated link speed in Mbps, 0 when the link is down
+            # in_pkts          total number of packets received, ulong64
+            # out_pkts         total number of packets sent, ulong64
+            # in_bytes         total number of bytes received, ulong64
+            # out_bytes        total number of bytes sent, ulong64
+            # in_errors        total number of receive errors, ulong64
+            # out_errors       total number of transmit errors, ulong64
+
+            # Example:
+            for stats in InterfaceStats.getAll():
+                print stats.port_num, stats.in_bytes, stats.out_bytes
+            stats = InterfaceStats.get(1)
+    """
+
+    __display__ = ["port_num", "status", "in_bytes", "out_bytes"]
+    __obj_name__ = 'interface_stat_list'
+    __obj_readonly__ = True
+    __xml_convrt__ = {"interface_stat_list": "interface_stat"}
+
+    @staticmethod
+    def getAll(fields = None):
+        """ method : network.interface.fetchAllStatistics
+            Returns the statistics of all the interfaces in InterfaceStats instance.
+        """
         try:
-            if self.getObjectDict.has_key("ipv4_addr_list"):
-                addr_list = self.getObjectDict()["ipv4_addr_list"]
-                for addr in addr_list:
-                    self.deleteIpv4Address(addr.ipv4_addr, addr.ipv4_mask)
-            return 0 
+            res = method_call.call_api(InterfaceStats(), method = "network.interface.fetchAllStatistics", format = "url", _lazy = True, _fields = fields)
+            a_list = []
+            for item in res[InterfaceStats.__obj_name__]:
+                a_list.append( InterfaceStats(**item) )
+            return a_list
+        except AxAPIError:
+            return None
+
+    @staticmethod
+    def get(port_num):
+        """ method : network.interface.fetchStatistics
+            Get the statistics of the interface by given port number.
+        """
+        try:
+            r = method_call.call_api(InterfaceStats(), method = "network.interface.fetchStatistics", port_num = port_num, format = "url")
+            if len(r[InterfaceStats.__obj_name__]) > 0:
+                return InterfaceStats(**r[InterfaceStats.__obj_name__][0])
+            else:
+                return None
+        except AxAPIError:
+            return None
+
+class VirtualInterfaceStats(AxObject):
+    """
+        Implementation of the aXAPI network.ve.fetchAllStatistics/.fetchStatistics method to
+        collect the virtual interface statistics data
+
+        Usage:
+            # virtual interface stats with following data fields: all read-only
+            # port_num         virtual interface number
+            # status           virtual interface link status, down(0) or up(1)
+            # in_pkts          total number of packets received, ulong64
+            # out_pkts         total number of packets sent, ulong64
+            # in_bytes         total number of bytes received, ulong64
+            # out_bytes        total number of bytes sent, ulong64
+            # in_errors        total number of receive errors, ulong64
+            # out_errors       total number of transmit errors, ulong64
+
+            # Example:
+            for stats in VirtualInterfaceStats.getAll():
+                print stats.port_num, stats.in_bytes, stats.out_bytes
+            stats = VirtualInterfaceStats.get(1)
+    """
+
+    __display__ = ["port_num", "status", "in_bytes", "out_bytes"]
+    __obj_name__ = 've_stat_list'
+    __obj_readonly__ = True
+    __xml_convrt__ = {"ve_stat_list": "ve_stat"}
+
+    @staticmethod
+    def getAll(fields = None):
+        """ method : network.ve.fetchAllStatistics
+            Returns the statistics of all the virtual interfaces in VirtualInterfaceStats instance.
+        """
+        try:
+            res = method_call.call_api(VirtualInterfaceStats(), method = "network.ve.fetchAllStatistics", format = "url", _lazy = True, _fields = fields)
+            a_list = []
+            for item in res[VirtualInterfaceStats.__obj_name__]:
+                a_list.append( VirtualInterfaceStats(**item) )
+            return a_list
+        except AxAPIError:
+            return None
+
+    @staticmethod
+    def get(port_num):
+        """ method : network.ve.fetchStatistics
+            Get the statistics of the virtual interface by given port number.
+        """
+        try:
+            r = method_call.call_api(VirtualInterfaceStats(), method = "network.ve.fetchStatistics", port_num = port_num, format = "url")
+            if len(r[VirtualInterfaceStats.__obj_name__]) > 0:
+                return VirtualInterfaceStats(**r[VirtualInterfaceStats.__obj_name__][0])
+            else:
+                return None
+        except AxAPIError:
+            return None
+
+class MgmtInterface(AxObject):
+    """
+        Implementation of the aXAPI network.mgmt_interface.get/.set method
+        to manage the management interface configuration.
+
+        Usage:
+            # management interface with options:
+            # ipv4_address         IPv4 address, 'dhcp' to get it from DHCP
+            # ipv4_netmask         IPv4 mask
+            # ipv4_gateway         IPv4 default gateway of the management interface
+            # status               management interface status, disabled(0) or enabled(1)
+            # speed                speed setting, 'auto', '10M', '100M' or '1G'
+            # apps_use_mgmt_port   applications use the management port, no(0) or yes(1)
+
+            # Example:
+            mgmt = MgmtInterface.read()
+            mgmt.ipv4_gateway = "192.168.1.1"
+            mgmt.update()
+    """
+
+    __display__ = ["ipv4_address", "ipv4_netmask", "status"]
+    __obj_name__ = 'mgmt_interface'
+
+    @staticmethod
+    def read():
+        """ method : network.mgmt_interface.get
+            Returns the management interface configuration.
+        """
+        try:
+            r = method_call.call_api(MgmtInterface(), method = "network.mgmt_interface.get", format = "json")
+            return MgmtInterface(**r.get(MgmtInterface.__obj_name__, r))
+        except AxAPIError:
+            return None
+
+    def update(self):
+        """ method : network.mgmt_interface.set
+            Update the management interface configuration.
+        """
+        try:
+            method_call.call_api(self, method = "network.mgmt_interface.set", format = "json", post_data = self.getRequestPostDataJson())
+            return 0
         except AxAPIError, e:
             return e.code
-        
-    def deleteAllIPv6Addr(self):
+
+class GatewayConfig(AxObject):
+    """
+        The IPv4 default gateway of the data interfaces, kept as the
+        0.0.0.0/0 route of network.route.ipv4static.*
+
+        Usage:
+            # gateway with options:
+            # ipv4_gateway     IPv4 default gateway, None when there is none
+            # distance         administrative distance of the default route
+
+            # Example:
+            gw = GatewayConfig.read()
+            gw.ipv4_gateway = "10.0.0.1"
+            gw.update()
+    """
+
+    __display__ = ["ipv4_gateway", "distance"]
+    __obj_name__ = ''
+
+    DEFAULT_ROUTE = ("0.0.0.0", "0.0.0.0")
+
+    @staticmethod
+    def _defaultRoutes():
+        return [r for r in NetworkRoute._fetchAll() if (r.address, r.mask) == GatewayConfig.DEFAULT_ROUTE]
+
+    @staticmethod
+    def read():
+        """ method : network.route.ipv4static.getAll
+            Returns the default gateway configuration.
+        """
         try:
-            if self.getObjectDict.has_key("ipv6_addr_list"):
-                addr_list = self.getObjectDict()["ipv6_addr_list"]
-                for addr in addr_list:
-                    self.deleteIpv6Address(addr.ipv6_addr, addr.ipv6_prefix_len)
-            return 0 
+            routes = GatewayConfig._defaultRoutes()
+        except AxAPIError:
+            return None
+        if not routes:
+            return GatewayConfig(ipv4_gateway = None)
+        return GatewayConfig(ipv4_gateway = routes[0].gateway, distance = getattr(routes[0], "distance", 1))
+
+    def update(self):
+        """ method : network.route.ipv4static.create/.delete
+            Replace the default route: the route to ipv4_gateway is created
+            before the other default routes are deleted.
+        """
+        try:
+            routes = GatewayConfig._defaultRoutes()
+        except AxAPIError, e:
+            return e.code
+        address, mask = GatewayConfig.DEFAULT_ROUTE
+        if self.ipv4_gateway and not [r for r in routes if r.gateway == self.ipv4_gateway]:
+            code = NetworkRoute(address = address, mask = mask, gateway = self.ipv4_gateway,
+                                distance = getattr(self, "distance", 1)).create()
+            if code:
+                return code
+        for route in routes:
+            if route.gateway != self.ipv4_gateway:
+                code = route.delete()
+                if code:
+                    return code
+        return 0
+
+class NetworkRoute(AxObject):
+    """
+        Implementation of the aXAPI network.route.ipv4static.* method to
+        manage the IPv4 static routes as getAll/create/delete
+
+        Usage:
+            # static route with options:
+            # address          (required) destination network address
+            # mask             (required) destination network mask
+            # gateway          (required) next hop address
+            # distance         administrative distance
+
+            # Example:
+            route = NetworkRoute(address="10.10.0.0", mask="255.255.0.0", gateway="10.0.0.254", distance=1)
+            route.create()
+    """
+
+    __display__ = ["address", "mask", "gateway"]
+    __obj_name__ = ''
+
+    @staticmethod
+    def _fetchAll():
+        res = method_call.call_api(NetworkRoute(), method = "network.route.ipv4static.getAll", format = "json")
+        # the response holds the single list of the routes
+        items = next((v for v in res.itervalues() if isinstance(v, list)), [])
+        return [NetworkRoute(**dict((str(k), v) for k, v in item.iteritems())) for item in items]
+
+    @staticmethod
+    def getAll():
+        """ method : network.route.ipv4static.getAll
+            Returns a list of static routes in NetworkRoute instance.
+        """
+        try:
+            return NetworkRoute._fetchAll()
+        except AxAPIError:
+            return None
+
+    def create(self):
+        """ method: network.route.ipv4static.create
+            Create the static route.
+        """
+        try:
+            method_call.call_api(self, method = "network.route.ipv4static.create", format = "json", post_data = self.getRequestPostDataJson())
+            return 0
+        except AxAPIError, e:
+            return e.code
+
+    def delete(self):
+        """ method: network.route.ipv4static.delete
+            Delete the static route.
+        """
+        try:
+            method_call.call_api(self, method = "network.route.ipv4static.delete", format = "json", post_data = self.getRequestPostDataJson())
+            return 0
         except AxAPIError, e:
             return e.code
 
+class NetworkDns(AxObject):
+    """
+        Implementation of the aXAPI network.dns.server.get/.set method
+        to manage the DNS client configuration.
+
+        Usage:
+            # DNS client with options:
+            # primary_dns      primary DNS server
+            # secondary_dns    secondary DNS server
+            # dns_suffix       DNS suffix
+
+            # Example:
+            dns = NetworkDns.read()
+            dns.secondary_dns = "8.8.8.8"
+            dns.update()
+    """
+
+    __display__ = ["primary_dns", "secondary_dns", "dns_suffix"]
+    __obj_name__ = 'dns'
+
+    @staticmethod
+    def read():
+        """ method : network.dns.server.get
+            Returns the DNS client configuration.
+        """
+        try:
+            r = method_call.call_api(NetworkDns(), method = "network.dns.server.get", format = "json")
+            return NetworkDns(**r.get(NetworkDns.__obj_name__, r))
+        except AxAPIError:
+            return None
+
+    def update(self):
+        """ method : network.dns.server.set
+            Update the DNS client configuration.
+        """
+        try:
+            method_call.call_api(self, method = "network.dns.server.set", format = "json", post_data = self.getRequestPostDataJson())
+            return 0
+        except AxAPIError, e:
+            return e.code
@@ -0,0 +1,146 @@
+# -*- encoding: utf8 -*-
+"""
+    Network snapshot module:  the network configuration of devices in one read.
+        NetworkSnapshot     network objects of one device indexed by kind and key
+        fetch_kind          reads one kind of network object
+        snapshot            reads the network configuration of many devices
+
+        Every kind is read with its own getAll, or get for the settings, and
+        all the reads of all the devices are submitted to the executor at
+        once, so a device costs the time of its slowest read rather than the
+        sum of its reads.  The objects are indexed by their key:
+            interface, ve       port_num
+            route               (address, mask, gateway)
+        and the management interface, gateway and dns settings are kept as
+        one dictionary each.  A kind that cannot be read is left out and its
+        error recorded, the rest of the snapshot is still usable.
+
+        Usage:
+            snapshots = snapshot(executor, ["10.0.0.1", "10.0.0.2"])
+            for device, snap in snapshots.iteritems():
+                print device, snap.errors, snap.get("ve", 10)
+                print snap.addresses().get("10.1.10.1")
+"""
+
+import time
+
+from base import AxError, error_message
+from network import Interface, VirtualInterface, NetworkRoute, MgmtInterface, GatewayConfig, NetworkDns
+
+# kind: (class, key fields)
+LISTS = {
+    "interface": (Interface, ("port_num",)),
+    "ve": (VirtualInterface, ("port_num",)),
+    "route": (NetworkRoute, ("address", "mask", "gateway")),
+}
+
+# kind: class
+SETTINGS = {
+    "management": MgmtInterface,
+    "gateway": GatewayConfig,
+    "dns": NetworkDns,
+}
+
+KINDS = ("interface", "ve", "route", "management", "gateway", "dns")
+
+def _value(value):
+    if isinstance(value, basestring) and value.isdigit():
+        return int(value)
+    return value
+
+def object_key(kind, obj_dict):
+    """
+        Returns the index key of an object dictionary of a list kind.
+    """
+    fields = LISTS[kind][1]
+    if len(fields) == 1:
+        return _value(obj_dict.get(fields[0]))
+    return tuple(_value(obj_dict.get(f)) for f in fields)
+
+def fetch_kind(kind):
+    """
+        Returns the object dictionaries of a list kind, or the dictionary of
+        a settings kind, of the device bound to the calling thread.  Raises
+        AxError when the read fails.
+    """
+    if kind in SETTINGS:
+        obj = SETTINGS[kind].read()
+        if obj is None:
+            raise AxError("%s.read failed"%SETTINGS[kind].__name__)
+        return obj.getObjectDict()
+    cls = LISTS[kind][0]
+    objects = cls.getAll()
+    if objects is None:
+        raise AxError("%s.getAll failed"%cls.__name__)
+    return [obj.getObjectDict() for obj in objects]
+
+class NetworkSnapshot(object):
+    """
+        objects     {list kind: {key: object dictionary}}
+        settings    {settings kind: dictionary}
+        errors      {kind: error} of the kinds that could not be read
+        taken       time the reads were submitted
+    """
+
+    def __init__(self, device, taken=None):
+        self.device = device
+        self.taken = taken
+        self.objects = {}
+        self.settings = {}
+        self.errors = {}
+
+    def add(self, kind, result):
+        if kind in SETTINGS:
+            self.settings[kind] = result
+        else:
+            self.objects[kind] = dict((object_key(kind, obj), obj) for obj in result)
+
+    def get(self, kind, key=None):
+        """
+            Returns the object dictionary of the key, the settings dictionary
+            of a settings kind, None when unknown.
+        """
+        if kind in SETTINGS:
+            return self.settings.get(kind)
+        return self.objects.get(kind, {}).get(key)
+
+    def complete(self):
+        return not self.errors
+
+    def addresses(self):
+        """
+            Returns {address: [(kind, port_num)]} of the interface and ve
+            addresses, the management address under ("management", None).
+        """
+        result = {}
+        for kind in ("interface", "ve"):
+            for port_num, obj in self.objects.get(kind, {}).iteritems():
+                for a in obj.get("ipv4_addr_list") or ():
+                    result.setdefault(a.get("ipv4_addr"), []).append((kind, port_num))
+                for a in obj.get("ipv6_addr_list") or ():
+                    result.setdefault(a.get("ipv6_addr"), []).append((kind, port_num))
+        management = self.settings.get("management") or {}
+        if management.get("ipv4_address"):
+            result.setdefault(management["ipv4_address"], []).append(("management", None))
+        return result
+
+    def __repr__(self):
+        counts = " ".join("%s=%d"%(kind, len(self.objects[kind])) for kind in KINDS if kind in self.objects)
+        return "NetworkSnapshot(%s %s%s)"%(self.device, counts, " errors=%d"%len(self.errors) if self.errors else "")
+
+def snapshot(executor, devices, kinds=None):
+    """
+        Reads the kinds, all by default, from the devices with an
+        executor.Executor holding them.  Returns {device: NetworkSnapshot}.
+    """
+    kinds = KINDS if kinds is None else kinds
+    taken = time.time()
+    futures = [(kind, executor.submit(device, fetch_kind, kind)) for device in devices for kind in kinds]
+    result = dict((device, NetworkSnapshot(device, taken)) for device in devices)
+    for kind, future in futures:
+        snap = result[future.device]
+        try:
+            snap.add(kind, future.result())
+        except Exception, e:
+            snap.errors[kind] = error_message(e)
+    return result
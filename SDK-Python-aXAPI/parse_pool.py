@@ -0,0 +1,111 @@
+# -*- encoding: utf8 -*-
+"""
+    Parse pool module:  decoding of large aXAPI responses in worker processes.
+        ParsePool       multiprocessing pool decoding the response bodies
+        install         makes call_api decode its responses through a pool
+        uninstall       back to decoding in the calling thread
+
+        Parsing and converting a getAll of a large configuration holds the
+        GIL for seconds.  With a ParsePool installed, call_api hands the raw
+        bodies above threshold bytes to a worker process, which parses them,
+        converts them to plain dicts and lists and sends them back marshalled,
+        so the large responses of several devices are decoded in parallel and
+        the calling process only pays for loading the result.  Strings that
+        are plain ASCII come back as str.  Smaller responses are decoded in
+        the calling thread the same way, so the results do not depend on the
+        size.
+
+        The pool forks its workers when created, create it before starting
+        threads.  call_api(_lazy=True) has no effect while a pool is installed.
+
+        Usage:
+            pool = install(ParsePool(processes=4))
+            executor = Executor(workers=8)
+            ...
+            uninstall()
+            pool.close()
+"""
+
+import marshal
+import multiprocessing
+
+import method_call
+from method_call import DecodedResponse, decode_response
+from base import AxAPIError
+
+class ParsePool(object):
+    """
+        processes   worker processes, the number of CPUs by default
+        threshold   bodies smaller than this many bytes are decoded in the
+                    calling thread
+    """
+
+    def __init__(self, processes=None, threshold=1024 * 1024):
+        self.threshold = threshold
+        self._pool = multiprocessing.Pool(processes)
+
+    def decoder(self, fmt, xml_convrt, fields=None):
+        return _PoolDecoder(self, fmt, xml_convrt, fields)
+
+    def decode(self, body, fmt, xml_convrt, fields=None):
+        """
+            Returns the DecodedResponse of a body.
+        """
+        if len(body) < self.threshold:
+            data, code, message = decode_response(body, fmt, xml_convrt, fields)
+            data = _plain(data)
+        else:
+            data, code, message = marshal.loads(self._pool.apply(_decode, (body, fmt, xml_convrt, fields)))
+        if code is not None:
+            return DecodedResponse(None, AxAPIError(code, message))
+        return DecodedResponse(data)
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+
+class _PoolDecoder(object):
+    """
+        Collects the body, then decodes it through the pool.
+    """
+    def __init__(self, pool, fmt, xml_convrt, fields):
+        self._pool = pool
+        self._args = (fmt, xml_convrt, fields)
+        self._chunks = []
+
+    def feed(self, data):
+        self._chunks.append(data)
+
+    def close(self):
+        body = "".join(self._chunks)
+        self._chunks = None
+        return self._pool.decode(body, *self._args)
+
+def _decode(body, fmt, xml_convrt, fields):
+    # runs in the worker processes: marshal is much faster to load than
+    # pickle or json for plain containers of str
+    data, code, message = decode_response(body, fmt, xml_convrt, fields)
+    return marshal.dumps((_plain(data), code, message))
+
+def _plain(value):
+    if isinstance(value, dict):
+        return dict((_plain(k), _plain(v)) for k, v in value.iteritems())
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    if isinstance(value, unicode):
+        try:
+            return value.encode("ascii")
+        except UnicodeEncodeError:
+            return value
+    return value
+
+def install(pool):
+    """
+        Makes call_api decode the xml/url and json responses through pool,
+        returns the pool.
+    """
+    method_call.AXAPI_PARSE_POOL = pool
+    return pool
+
+def uninstall():
+    method_call.AXAPI_PARSE_POOL = None
@@ -0,0 +1,172 @@
+# -*- encoding: utf8 -*-
+"""
+    Retry module:  timeout, retry and circuit breaker policy for the aXAPI transport.
+        RetryPolicy         connect/read timeouts, retries with exponential backoff and jitter
+        CircuitBreaker      per-device breaker that fails fast on a sick device
+
+        Read methods (getAll, get, search, fetch*Statistics) are retried on
+        transport errors and 5xx responses.  Write methods are only retried
+        when the request never reached the device (connect failure).  A
+        certificate that fails verification is neither retried nor counted
+        as a failure of the device.
+
+        Usage:
+            # tighter timeouts and more retries for every call
+            method_call.AXAPI_POLICY = RetryPolicy(connect_timeout=3, read_timeout=30, max_retries=5)
+            # or per context
+            ctx = method_call.AxApiContext("10.1.1.1", "admin", "a10", policy=RetryPolicy(max_retries=0))
+            # or per call
+            method_call.call_api(VirtualServer(), method="slb.virtual_server.getAll", format="json", _timeout=(2, 120))
+"""
+
+import random
+import threading
+import time
+
+from base import AxHttpError, AxTransportError, AxCircuitOpenError
+
+READ_METHODS = ("get", "getAll", "search", "fetchStatistics", "fetchAllStatistics")
+
+def is_idempotent(method):
+    """
+        Returns True when the aXAPI method, e.g. slb.virtual_server.getAll,
+        only reads state on the device.
+    """
+    if not method:
+        return False
+    return method.split(".")[-1] in READ_METHODS
+
+class CircuitBreaker(object):
+    """
+        Consecutive failure counter for one device.
+
+        After failure_threshold consecutive failures the breaker opens and
+        every call raises AxCircuitOpenError for reset_timeout seconds.  The
+        first call after that is let through as a trial: success closes the
+        breaker, failure opens it again.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, device, failure_threshold=5, reset_timeout=30.0):
+        self.device = device
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitBreaker.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """ Raises AxCircuitOpenError when the device must be skipped.
+        """
+        with self._lock:
+            if self.state == CircuitBreaker.CLOSED:
+                return
+            if self.state == CircuitBreaker.OPEN and time.time() - self.opened_at >= self.reset_timeout:
+                self.state = CircuitBreaker.HALF_OPEN
+                return
+            raise AxCircuitOpenError(self.device)
+
+    def recordSuccess(self):
+        with self._lock:
+            self.failures = 0
+            self.state = CircuitBreaker.CLOSED
+
+    def recordFailure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == CircuitBreaker.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = CircuitBreaker.OPEN
+                self.opened_at = time.time()
+
+    def reset(self):
+        self.recordSuccess()
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(device, failure_threshold=5, reset_timeout=30.0):
+    """
+        Returns the process wide CircuitBreaker of the device, creating it on
+        first use.  The thresholds of the calling policy always apply.
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(device)
+        if breaker is None:
+            breaker = CircuitBreaker(device, failure_threshold, reset_timeout)
+            _breakers[device] = breaker
+        else:
+            breaker.failure_threshold = failure_threshold
+            breaker.reset_timeout = reset_timeout
+        return breaker
+
+class RetryPolicy(object):
+    """
+        Timeout and retry settings used by method_call._send_request.
+
+        connect_timeout     seconds to establish the TCP/TLS connection
+        read_timeout        seconds to wait for each read from the device
+        max_retries         retries after the first attempt, 0 disables retry
+        backoff_base        first backoff delay in seconds, doubled on each retry
+        backoff_max         upper bound of a single backoff delay
+        retry_statuses      HTTP status codes worth retrying for read methods
+        failure_threshold   consecutive failures that open the circuit breaker
+        reset_timeout       seconds an open breaker waits before a trial call
+    """
+
+    def __init__(self, connect_timeout=10.0, read_timeout=60.0, max_retries=3,
+                 backoff_base=0.5, backoff_max=10.0, retry_statuses=(500, 502, 503, 504),
+                 failure_threshold=5, reset_timeout=30.0):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_statuses = tuple(retry_statuses)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+    def withTimeout(self, timeout):
+        """
+            Returns a copy of the policy with the given timeout, either one
+            number for both phases or a (connect, read) tuple.
+        """
+        policy = RetryPolicy.__new__(RetryPolicy)
+        policy.__dict__.update(self.__dict__)
+        if isinstance(timeout, (tuple, list)):
+            policy.connect_timeout, policy.read_timeout = timeout
+        else:
+            policy.connect_timeout = policy.read_timeout = timeout
+        return policy
+
+    def getBreaker(self, device):
+        return get_breaker(device, self.failure_threshold, self.reset_timeout)
+
+    def isDeviceFailure(self, error):
+        """
+            True when the error says something about the health of the device
+            rather than about the request, i.e. it should count for the breaker.
+        """
+        if isinstance(error, AxTransportError):
+            return True
+        return isinstance(error, AxHttpError) and error.status >= 500
+
+    def shouldRetry(self, error, attempt, idempotent):
+        if attempt >= self.max_retries:
+            return False
+        if isinstance(error, AxTransportError):
+            return idempotent or not error.sent
+        if isinstance(error, AxHttpError):
+            return idempotent and error.status in self.retry_statuses
+        return False
+
+    def backoff(self, attempt):
+        """
+            Full jitter exponential backoff delay for the given retry attempt.
+        """
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, delay)
+
+DEFAULT_POLICY = RetryPolicy()
@@ -0,0 +1,158 @@
+# -*- encoding: utf8 -*-
+"""
+    Session module:  pool of authenticated aXAPI sessions per device.
+        SessionPool     a capped set of AxApiContext logged in to one device
+
+        Concurrent workers each check out their own session instead of
+        sharing the global one, and sessions are reused across calls so the
+        authenticate round trip is only paid once per pooled session.  The
+        pool never opens more than max_sessions sessions on the device, keep
+        it below the session limit configured on the ADC.
+
+        The pools are shared by the users of a device with the same
+        max_sessions, each user holding a reference on the pool it got from
+        get_pool; the last release_pool logs its sessions out.
+
+        Usage:
+            pool = get_pool("192.168.210.239", "admin", "a10")
+            # in each worker thread
+            with pool.session():
+                vip_list = VirtualServer.getAll()
+            # when done with the pool
+            release_pool(pool)
+            # at exit
+            close_pools()
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+import method_call
+from base import AxError
+
+class SessionPool(object):
+    """
+        Authenticated sessions of one user on one device.
+    """
+
+    def __init__(self, device_ip, username, password, max_sessions=4, policy=None):
+        self.device_ip = device_ip
+        self.username = username
+        self.password = password
+        self.max_sessions = max_sessions
+        self.policy = policy
+        self._idle = []
+        self._opened = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout=None):
+        """
+            Returns an idle AxApiContext, a new one when the cap is not reached,
+            or waits for one to be released.  The returned context may not be
+            logged in yet, see session().
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while not self._idle and self._opened >= self.max_sessions:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    raise AxError("no free session on device %s"%self.device_ip)
+                self._cond.wait(remaining)
+            if self._idle:
+                return self._idle.pop()
+            self._opened += 1
+        return method_call.AxApiContext(self.device_ip, self.username, self.password, policy=self.policy)
+
+    def release(self, context):
+        with self._cond:
+            self._idle.append(context)
+            self._cond.notify()
+
+    def discard(self, context):
+        """
+            Drops a context that must not be reused, freeing its slot.
+        """
+        context.logout()
+        with self._cond:
+            self._opened -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def session(self, timeout=None):
+        """
+            Checks out a session, logs it in if needed and binds it to the
+            calling thread for the duration of the with block.
+        """
+        context = self.acquire(timeout)
+        previous = method_call.bind_context(context)
+        try:
+            if not context.is_login:
+                context.authentication()
+            if not context.is_login:
+                raise AxError("authentication to %s failed"%self.device_ip)
+        except:
+            method_call.bind_context(previous)
+            self.discard(context)
+            raise
+        try:
+            yield context
+        finally:
+            method_call.bind_context(previous)
+            self.release(context)
+
+    def close(self):
+        """
+            Logs out every idle session.
+        """
+        with self._cond:
+            idle = self._idle
+            self._idle = []
+            self._opened -= len(idle)
+            self._cond.notify_all()
+        for context in idle:
+            context.logout()
+
+# (device_ip, username, max_sessions): [SessionPool, references]
+_pools = {}
+_pools_lock = threading.Lock()
+
+def _key(pool):
+    return pool.device_ip, pool.username, pool.max_sessions
+
+def get_pool(device_ip, username, password, max_sessions=4, policy=None):
+    """
+        Returns the shared SessionPool of the user on the device with
+        max_sessions, and takes a reference on it for release_pool.
+        Raises AxError when the pool is open with another password.
+    """
+    key = (device_ip, username, max_sessions)
+    with _pools_lock:
+        entry = _pools.get(key)
+        if entry is None:
+            entry = _pools[key] = [SessionPool(device_ip, username, password, max_sessions, policy), 0]
+        elif entry[0].password != password:
+            raise AxError("sessions of %s on %s are open with another password"%(username, device_ip))
+        entry[1] += 1
+        return entry[0]
+
+def release_pool(pool):
+    """
+        Gives back a reference taken by get_pool, the last one closes the pool.
+    """
+    with _pools_lock:
+        entry = _pools.get(_key(pool))
+        if entry is None or entry[0] is not pool:
+            return
+        entry[1] -= 1
+        if entry[1] > 0:
+            return
+        del _pools[_key(pool)]
+    pool.close()
+
+def close_pools():
+    with _pools_lock:
+        pools = [entry[0] for entry in _pools.itervalues()]
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,115 @@
+# -*- encoding: utf8 -*-
+"""
+    Session cache module:  encrypted on-disk cache of aXAPI session ids.
+        SessionCache    valid session ids per device/user, with expiry
+
+        Short-lived scripts started from cron reuse the session of a previous
+        run instead of calling authenticate every time.  Entries are keyed by
+        a hash of device, username and password, and the file is encrypted
+        with Fernet from the 'cryptography' package.  Without that package
+        the cache is disabled and every run logs in as before.
+
+        The key is read from the AXAPI_CACHE_KEY environment variable, or
+        from <cache file>.key which is created with mode 0600 on first use.
+
+        Usage:
+            ctx = method_call.AxApiContext("192.168.210.239", "admin", "a10", cache=SessionCache())
+            ctx.authentication()    # no round trip while the cached session is valid
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:
+    Fernet = None
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".axapi", "sessions")
+
+class SessionCache(object):
+    """
+        path    cache file, ~/.axapi/sessions by default
+        key     Fernet key, overrides AXAPI_CACHE_KEY and the key file
+        ttl     seconds a cached session is trusted, keep it below the idle
+                timeout of the aXAPI sessions on the devices
+    """
+
+    def __init__(self, path=None, key=None, ttl=540):
+        self.path = path or DEFAULT_CACHE_PATH
+        self.ttl = ttl
+        self._key = key
+        self._lock = threading.Lock()
+
+    def isEnabled(self):
+        return Fernet is not None
+
+    def get(self, device_ip, username, password):
+        """
+            Returns the cached session id, or None when missing or expired.
+        """
+        if not self.isEnabled():
+            return None
+        with self._lock:
+            entry = self._read().get(_entry_key(device_ip, username, password))
+        if entry is None or entry["expires"] <= time.time():
+            return None
+        return entry["session_id"]
+
+    def put(self, device_ip, username, password, session_id):
+        if not self.isEnabled():
+            return
+        with self._lock:
+            entries = self._read()
+            now = time.time()
+            for k in [k for k, v in entries.iteritems() if v["expires"] <= now]:
+                del entries[k]
+            entries[_entry_key(device_ip, username, password)] = {"session_id": session_id, "expires": now + self.ttl}
+            self._write(entries)
+
+    def remove(self, device_ip, username, password):
+        if not self.isEnabled():
+            return
+        with self._lock:
+            entries = self._read()
+            if entries.pop(_entry_key(device_ip, username, password), None) is not None:
+                self._write(entries)
+
+    def _fernet(self):
+        key = self._key or os.environ.get("AXAPI_CACHE_KEY")
+        if not key:
+            key_path = self.path + ".key"
+            if not os.path.exists(key_path):
+                _write_private(key_path, Fernet.generate_key())
+            with open(key_path, "rb") as f:
+                key = f.read().strip()
+        return Fernet(key)
+
+    def _read(self):
+        try:
+            with open(self.path, "rb") as f:
+                token = f.read()
+            return json.loads(self._fernet().decrypt(token))
+        except (IOError, OSError, ValueError, InvalidToken):
+            # a missing, unreadable or foreign file is an empty cache
+            return {}
+
+    def _write(self, entries):
+        token = self._fernet().encrypt(json.dumps(entries))
+        tmp_path = "%s.%d.tmp"%(self.path, os.getpid())
+        _write_private(tmp_path, token)
+        os.rename(tmp_path, self.path)
+
+def _entry_key(device_ip, username, password):
+    return hashlib.sha256("\0".join((device_ip, username, password))).hexdigest()
+
+def _write_private(path, data):
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory, 0700)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
@@ -88,12 +88,12 @@ class ServiceGroup(AxObject):
     __xml_convrt__ = {"service_group_list": "service_group", "member_list": "member"}
 
     @staticmethod
-    def getAll():
+    def getAll(fields = None):
         """ method :slb.service_group.getAll
             Returns a list of service groups in ServiceGroup instance.
         """
         try:
-            res = method_call.call_api(ServiceGroup(), method = "slb.service_group.getAll", format = "json")
+            res = method_call.call_api(ServiceGroup(), method = "slb.service_group.getAll", format = "json", _fields = fields)
             svc_list = []
             for item in res["service_group_list"]:
                 svc_list.append( ServiceGroup(**item) )
@@ -201,11 +201,11 @@ class ServiceGroupStats(AxObject):
         AxObject.__init__(self,**params)
     
     @staticmethod
-    def getAll():
+    def getAll(fields = None):
         """ method : slb.service_group.fetchAllStatistics
         """ 
         try:       
-            res = method_call.call_api(ServiceGroupStats(), method = "slb.service_group.fetchAllStatistics", format = "json")
+            res = method_call.call_api(ServiceGroupStats(), method = "slb.service_group.fetchAllStatistics", format = "json", _fields = fields)
             svc_list = []
             for item in res[ServiceGroupStats.__obj_name__]:
                 svc_list.append( ServiceGroupStats(**item) )
@@ -273,12 +273,12 @@ class RealServer(AxObject):
         AxObject.__init__(self,**params)
     
     @staticmethod
-    def getAll():
+    def getAll(fields = None):
         """ method :slb.server.getAll
             Returns a list of real servers in RealServer instance.
         """
         try:
-            res = method_call.call_api(RealServer(), method = "slb.server.getAll", format = "json")
+            res = method_call.call_api(RealServer(), method = "slb.server.getAll", format = "json", _fields = fields)
             rs_list = []
             for item in res["server_list"]:
                 rs_list.append( RealServer(**item) )
@@ -394,11 +394,11 @@ class RealServerStats(AxObject):
         AxObject.__init__(self,**params)
     
     @staticmethod
-    def getAll():
+    def getAll(fields = None):
         """ method : slb.server.fetchAllStatistics
         """      
         try:  
-            res = method_call.call_api(RealServerStats(), method = "slb.server.fetchAllStatistics", format = "json")
+            res = method_call.call_api(RealServerStats(), method = "slb.server.fetchAllStatistics", format = "json", _fields = fields)
             svc_list = []
             for item in res[RealServerStats.__obj_name__]:
                 svc_list.append( RealServerStats(**item) )
@@ -698,12 +698,12 @@ class VirtualServer(AxObject):
         AxObject.__init__(self,**params)
     
     @staticmethod
-    def getAll():
+    def getAll(fields = None):
         """ method :slb.virtual_server.getAll
             Returns a list of virtual servers in VirtualServer instance.
         """
         try:
-            res = method_call.call_api(VirtualServer(), method = "slb.virtual_server.getAll", format = "json")
+            res = method_call.call_api(VirtualServer(), method = "slb.virtual_server.getAll", format = "json", _fields = fields)
             vip_list = []
             for item in res["virtual_server_list"]:
                 vip_list.append( VirtualServer(**item) )
@@ -840,11 +840,11 @@ class VirtualServerStats(AxObject):
         AxObject.__init__(self,**params)
     
     @staticmethod
-    def getAll():
+    def getAll(fields = None):
         """ method : slb.virtual_server.fetchAllStatistics
         """    
         try:    
-            res = method_call.call_api(VirtualServerStats(), method = "slb.virtual_server.fetchAllStatistics", format = "json")
+            res = method_call.call_api(VirtualServerStats(), method = "slb.virtual_server.fetchAllStatistics", format = "json", _fields = fields)
             vip_list = []
             for item in res[VirtualServerStats.__obj_name__]:
                 vip_list.append( VirtualServerStats(**item) )
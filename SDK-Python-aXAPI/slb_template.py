@@ -2,10 +2,10 @@
 """
     SLB Template module:  aXAPI template configuration implementation.
         Support the object-oriented interface for the SLB templates such as:
-            TemplateSmtp:            
-            TemplateCache:            
-            TemplateVirtualServer:    
-            TemplateVipPort:            
+            TemplateSmtp:
+            TemplateCache:
+            TemplateVirtualServer:
+            TemplateVipPort:
             TemplateServer:
             TemplateServerPort
             TemplateHttp
@@ -22,20 +22,81 @@
             TemplateTcpProxy
             TemplateDns
             TemplateDiameter
-    
+
+        The template classes are generated from TEMPLATE_TYPES, one
+        TemplateType per slb.template.<key>.* method family, and share the
+        getAll/searchByName/create/delete/update of Template.  REGISTRY maps
+        the keys to the classes.  fetch_all runs the getAll of every type
+        concurrently and returns a TemplateIndex.
+
+        Usage:
+            executor = Executor(workers=8, per_device=4)
+            executor.addDevice("10.0.0.1", "admin", "a10")
+            index = fetch_all(executor, "10.0.0.1")
+            for template in index.templates("http"):
+                print template.name
+
     Author : Richard Zhang, A10 Networks (c)
     email  : rzhang@a10networks.com
     Date   : 03/07/2012
 """
 
 import method_call
-from  base import AxObject, AxAPIError
-
-class TemplateSmtp(AxObject):
-    """
-        Implementation of the aXAPI slb.template.smtp.* method to 
-        manage the SLB SMTP template as getAll/create/delete/update 
-        
+from  base import AxObject, AxAPIError, AxError, error_message
+
+class TemplateType(object):
+    """
+        One kind of SLB template:
+            key         method prefix slb.template.<key>, object name <key>_template
+                        and list tag <key>_template_list
+            class_name  name of the generated class
+            title       name of the template in the docstrings
+            lists       {list field: item name} of the url format
+            fields      {field: type} of the fields with a known type, the
+                        url format returns every value as a string
+            usage       options and example appended to the class docstring
+    """
+    __slots__ = ("key", "class_name", "title", "lists", "fields", "usage")
+
+    def __init__(self, key, class_name, title, lists=None, fields=None, usage=""):
+        self.key = key
+        self.class_name = class_name
+        self.title = title
+        self.lists = lists or {}
+        self.fields = fields or {}
+        self.usage = usage
+
+    @property
+    def obj_name(self):
+        return "%s_template"%self.key
+
+    @property
+    def list_tag(self):
+        return "%s_template_list"%self.key
+
+    def method(self, operation):
+        return "slb.template.%s.%s"%(self.key, operation)
+
+    def normalise(self, obj_dict):
+        """
+            Returns a copy of a template dictionary with the known fields
+            converted to their type.
+        """
+        result = dict(obj_dict)
+        for field, field_type in self.fields.iteritems():
+            value = result.get(field)
+            if value is None or isinstance(value, field_type):
+                continue
+            try:
+                result[field] = field_type(value)
+            except (TypeError, ValueError):
+                pass
+        return result
+
+    def __repr__(self):
+        return "TemplateType(%s)"%self.key
+
+_SMTP_USAGE = """
         Usage:
             # SMTP template with options:
             # name                     (required)
@@ -49,7 +110,7 @@ class TemplateSmtp(AxObject):
             #     client_domain              client domain
             #     service_group              service group name
             #     match_type                 match type, contains(0), starts with(1), ends with(2)
-            
+
             # Example: create a smtp template like
             # !
             # slb template smtp my_smpt_temp1
@@ -63,75 +124,12 @@ class TemplateSmtp(AxObject):
             for aSmtp in a_list:
                 # use aSmtp here
                 ...
-    """
-    
-    __display__ = ["name"]
-    __obj_name__ = 'smtp_template'
-    __xml_convrt__ = {"smtp_template_list": "smtp_template", "client_domain_switching_list": "client_domain_switching"}
-
-    @staticmethod
-    def getAll():
-        """ method : slb.template.smtp.getAll
-            Returns a list of SMTP template in TemplateSmtp instance.
-        """
-        try:
-            res = method_call.call_api(TemplateSmtp(), method = "slb.template.smtp.getAll", format = "url")
-            smtp_list = []
-            for item in res["smtp_template_list"]:
-                smtp_list.append( TemplateSmtp(**item) )
-            return smtp_list
-        except AxAPIError:
-            return None
-    
-    @staticmethod    
-    def searchByName(name):
-        """ method: slb.template.smtp.search
-            Search the SMTP template by given name.
-        """
-        try:
-            r = method_call.call_api(TemplateSmtp(), method = "slb.template.smtp.search", name = name, format = "url")
-            return TemplateSmtp(**r[TemplateSmtp.__obj_name__])
-        except AxAPIError:
-            return None
-
-    def create(self):
-        """ method: slb.template.smtp.create
-            Create the SMTP template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.smtp.create", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-        
-    def delete(self):
-        """ method: slb.template.smtp.delete
-            Delete the SMTP template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.smtp.delete", format = "url", name = self.name) 
-            return 0
-        except AxAPIError, e:
-            return e.code
-
-    def update(self):
-        """ method: slb.template.smtp.update
-            Update the SMTP template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.smtp.update", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
+"""
 
-class TemplateCache(AxObject):
-    """
-        Implementation of the aXAPI slb.template.cache.* method to 
-        manage the SLB cache template as getAll/searchByName/create/delete/update 
-        
+_CACHE_USAGE = """
         Usage:
             # cache template with options:
-            # name               (required) cache template name 
+            # name               (required) cache template name
             # age                (second)
             # max_cache          max cache size (MB)
             # min_content        min content size (Bytes)
@@ -147,1704 +145,280 @@ class TemplateCache(AxObject):
             #     action             cache(0), no cache(1) or invalidate(2)
             #     duration           duration (second), only when act is cache(0)
             #     pattern            only when act is invalidate(2)
-            
+
             # Example: create a cache template
             # !
             # slb template cache my_cache_templ1
             #    policy uri abc nocache
             #    policy uri 123 nocache
             # !
-            cache1 = TemplateRamCache(name="my_cache_templ1")
+            cache1 = TemplateCache(name="my_cache_templ1")
             cache1.policy_list = [{"uri": "abc", "action": 1}, {"uri": "123", "action": 1}]
             cache1.create()
             # get all cache templates
-            caches = TemplateRamCache.getAll()
+            caches = TemplateCache.getAll()
             for e in caches:
                 print e
                 # use aCache here
                 ...
-    """
-    
-    __display__ = ["name"]
-    __obj_name__ = 'cache_template'
-    __xml_convrt__ = {"cache_template_list": "cache_template", "policys": "policy", "policy_list": "policy"}
+"""
 
-    @staticmethod
-    def getAll():
-        """ method : slb.template.cache.getAll
-            Returns a list of cache template in TemplateCache instance.
-        """
-        try:
-            res = method_call.call_api(TemplateCache(), method = "slb.template.cache.getAll", format = "url")
-            a_list = []
-            for item in res["cache_template_list"]:
-                a_list.append( TemplateCache(**item) )
-            return a_list
-        except AxAPIError:
-            return None
-    
-    @staticmethod    
-    def searchByName(name):
-        """ method: slb.template.cache.search
-            Search the cache template by given name.
-        """
-        try:
-            r = method_call.call_api(TemplateCache(), method = "slb.template.cache.search", name = name, format = "url")
-            return TemplateCache(**r[TemplateCache.__obj_name__])
-        except AxAPIError:
-            return None
+_DNS_USAGE = """
+        Usage:
+            # dns template with options:
+            # name                             dns template name
+            # malformed_query                  malformed query, disabled(0), drop(1), forward to service group(2)
+            # service_group_malformed_query    service group name, only malformed_query is 2
+            # status                           dns template status, disabled(0) or enabled(1)
+            # def_policy                       default policy, no cache(0) or cache(1)
+            # log_period                       log period (Minutes)
+            # max_cache_size
+            # class_list         tag for the class list
+            #     name                 class list name
+            #     lid_list             tag for the collection of LID
+            #         id                   LID id
+            #         dns_cache_status     DNS cache status, enabled(1) or disabled(0)
+            #         ttl
+            #         weight
+            #         conn_rate_limit      connection rate limit
+            #         conn_rate_limit_per  connection rate limit interval
+            #         over_limit_action    drop(0), forward(1),
+            #         enable               DNS cache(2) or disable dns cache(3)
+            #         lockout              lockout
+            #         log_status           log status, enabled(1). disabled(0)
+            #         log_interval         log interval
+"""
 
-    def create(self):
-        """ method: slb.template.cache.create
-            Create the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.create", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-        
-    def delete(self):
-        """ method: slb.template.cache.delete
-            Delete the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.delete", format = "url", name = self.name) 
-            return 0
-        except AxAPIError, e:
-            return e.code
+_DIAMETER_USAGE = """
+        Usage:
+            # diameter template with options:
+            # name                     diameter template name
+            # multiple_origin_host     multiple origin host
+            # origin_host              origin host
+            # origin_realm             origin realm
+            # product_name             product name
+            # vendor_id                vendor id
+            # idle_timeout             idle timeout
+            # dwr_time_interval        dwr time interval
+            # session_age              session age
+            # customizing_cea_response     customizing cea response
+            # duplicate_avp_code       duplicate avp code
+            # duplicate_pattern        duplicate pattern
+            # duplicate_service_name   duplicate service name
+            # avps                     tag for collection of avps
+            #     code                 code
+            #     mandatory            mandatory
+            #     type                 INT32 (1), INT64(2), String(3)
+            #     value                value
+            # message_codes            tag for collection of message codes
+            #     value                 message code
+"""
 
-    def update(self):
-        """ method: slb.template.cache.update
-            Update the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.update", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-        
-class TemplateVirtualServer(AxObject):
+TEMPLATE_TYPES = (
+    TemplateType("smtp", "TemplateSmtp", "SMTP",
+                 lists={"client_domain_switching_list": "client_domain_switching"},
+                 fields={"starttls": int, "EXPN": int, "TURN": int, "VRFY": int}, usage=_SMTP_USAGE),
+    TemplateType("cache", "TemplateCache", "cache",
+                 lists={"policys": "policy", "policy_list": "policy"},
+                 fields={"age": int, "max_cache": int, "min_content": int, "max_content": int, "rep_policy": int,
+                         "acc_rel_req": int, "veri_host": int, "def_pol_no_cache": int, "insert_age": int,
+                         "insert_via": int}, usage=_CACHE_USAGE),
+    TemplateType("virtual_server", "TemplateVirtualServer", "virtual server"),
+    TemplateType("vip_port", "TemplateVipPort", "virtual port"),
+    TemplateType("server", "TemplateServer", "server"),
+    TemplateType("server_port", "TemplateServerPort", "server port"),
+    TemplateType("http", "TemplateHttp", "HTTP"),
+    TemplateType("pbslb", "TemplatePbslb", "PBSLB"),
+    TemplateType("sip", "TemplateSip", "SIP"),
+    TemplateType("rtsp", "TemplateRtsp", "RTSP"),
+    TemplateType("conn_reuse", "TemplateConnReuse", "connection reuse"),
+    TemplateType("tcp", "TemplateTcp", "TCP"),
+    TemplateType("udp", "TemplateUdp", "UDP"),
+    TemplateType("cookie_persistence", "TemplateCookiePersist", "cookie persistence"),
+    TemplateType("src_ip_persistence", "TemplateSourceIpPersist", "source IP persistence"),
+    TemplateType("dst_ip_persistence", "TemplateDestinationIp", "destination IP persistence"),
+    TemplateType("ssl_persistence", "TemplateSslPersist", "SSL session ID persistence"),
+    TemplateType("tcp_proxy", "TemplateTcpProxy", "TCP proxy"),
+    TemplateType("dns", "TemplateDns", "dns",
+                 lists={"lid_list": "lid"},
+                 fields={"malformed_query": int, "status": int, "def_policy": int, "log_period": int,
+                         "max_cache_size": int}, usage=_DNS_USAGE),
+    TemplateType("diameter", "TemplateDiameter", "diameter",
+                 lists={"avps": "avp", "message_codes": "code"},
+                 fields={"vendor_id": int, "idle_timeout": int, "dwr_time_interval": int, "session_age": int,
+                         "duplicate_avp_code": int}, usage=_DIAMETER_USAGE),
+)
+
+class Template(AxObject):
     """
-        Implementation of the aXAPI slb.template.cache.* method to 
-        manage the SLB virtual server template as getAll/searchByName/create/delete/update 
-        
-        Usage:
-            # cache template with options:
-            # name               (required) cache template name 
-            
-            # Example: create a cache template
-            # !
-            # slb template cache my_cache_templ1
-            #    policy uri abc nocache
-            #    policy uri 123 nocache
-            # !
-            cache1 = TemplateRamCache(name="my_cache_templ1")
-            cache1.policy_list = [{"uri": "abc", "action": 1}, {"uri": "123", "action": 1}]
-            cache1.create()
-            # get all cache templates
-            caches = TemplateRamCache.getAll()
-            for e in caches:
-                print e
-                # use aCache here
-                ...
+        Base of the template classes, implementation of the aXAPI
+        slb.template.<key>.* methods for the TemplateType in
+        __template_type__ as getAll/searchByName/create/delete/update.
     """
-    
+
     __display__ = ["name"]
-    __obj_name__ = 'cache_template'
-    __xml_convrt__ = {"cache_template_list": "cache_template", "policys": "policy", "policy_list": "policy"}
+    __template_type__ = None
+
+    @classmethod
+    def templateType(cls):
+        if cls.__template_type__ is None:
+            raise AxError("%s is not bound to a template type, see TEMPLATE_TYPES"%cls.__name__)
+        return cls.__template_type__
 
-    @staticmethod
-    def getAll():
-        """ method : slb.template.cache.getAll
-            Returns a list of cache template in TemplateCache instance.
+    @classmethod
+    def getAll(cls, fields = None):
+        """ method : slb.template.<key>.getAll
+            Returns a list of templates in instances of the class.
         """
+        t = cls.templateType()
         try:
-            res = method_call.call_api(TemplateVirtualServer(), method = "slb.template.cache.getAll", format = "url")
+            res = method_call.call_api(cls(), method = t.method("getAll"), format = "url", _lazy = True, _fields = fields)
             a_list = []
-            for item in res["cache_template_list"]:
-                a_list.append( TemplateVirtualServer(**item) )
+            for item in res[t.list_tag]:
+                a_list.append( cls(**item) )
             return a_list
         except AxAPIError:
             return None
-    
-    @staticmethod    
-    def searchByName(name):
-        """ method: slb.template.cache.search
-            Search the cache template by given name.
+
+    @classmethod
+    def searchByName(cls, name):
+        """ method: slb.template.<key>.search
+            Search the template by given name.
         """
+        t = cls.templateType()
         try:
-            r = method_call.call_api(TemplateVirtualServer(), method = "slb.template.cache.search", name = name, format = "url")
-            return TemplateVirtualServer(**r[TemplateVirtualServer.__obj_name__])
+            r = method_call.call_api(cls(), method = t.method("search"), name = name, format = "url")
+            return cls(**r[t.obj_name])
         except AxAPIError:
             return None
 
     def create(self):
-        """ method: slb.template.cache.create
-            Create the cache template.
+        """ method: slb.template.<key>.create
+            Create the template.
         """
         try:
-            method_call.call_api(self, method = "slb.template.cache.create", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
+            method_call.call_api(self, method = self.templateType().method("create"), format = "url", post_data = self.getRequestPostDataXml())
+            return 0
         except AxAPIError, e:
             return e.code
-        
+
     def delete(self):
-        """ method: slb.template.cache.delete
-            Delete the cache template.
+        """ method: slb.template.<key>.delete
+            Delete the template.
         """
         try:
-            method_call.call_api(self, method = "slb.template.cache.delete", format = "url", name = self.name) 
+            method_call.call_api(self, method = self.templateType().method("delete"), format = "url", name = self.name)
             return 0
         except AxAPIError, e:
             return e.code
 
     def update(self):
-        """ method: slb.template.cache.update
-            Update the cache template.
+        """ method: slb.template.<key>.update
+            Update the template.
         """
         try:
-            method_call.call_api(self, method = "slb.template.cache.update", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
+            method_call.call_api(self, method = self.templateType().method("update"), format = "url", post_data = self.getRequestPostDataXml())
+            return 0
         except AxAPIError, e:
             return e.code
 
-class TemplateVipPort(AxObject):
+def template_class(template_type):
     """
-        Implementation of the aXAPI slb.template.cache.* method to 
-        manage the SLB cache template as getAll/searchByName/create/delete/update 
-        
-        Usage:
-            # cache template with options:
-            # name               (required) cache template name 
-            
-            # Example: create a cache template
-            # !
-            # slb template cache my_cache_templ1
-            #    policy uri abc nocache
-            #    policy uri 123 nocache
-            # !
-            cache1 = TemplateRamCache(name="my_cache_templ1")
-            cache1.policy_list = [{"uri": "abc", "action": 1}, {"uri": "123", "action": 1}]
-            cache1.create()
-            # get all cache templates
-            caches = TemplateRamCache.getAll()
-            for e in caches:
-                print e
-                # use aCache here
-                ...
+        Returns a Template subclass implementing the methods of a TemplateType.
     """
-    
-    __display__ = ["name"]
-    __obj_name__ = 'cache_template'
-    __xml_convrt__ = {"cache_template_list": "cache_template", "policys": "policy", "policy_list": "policy"}
-
-    @staticmethod
-    def getAll():
-        """ method : slb.template.cache.getAll
-            Returns a list of cache template in TemplateCache instance.
-        """
-        try:
-            res = method_call.call_api(TemplateVipPort(), method = "slb.template.cache.getAll", format = "url")
-            a_list = []
-            for item in res["cache_template_list"]:
-                a_list.append( TemplateVipPort(**item) )
-            return a_list
-        except AxAPIError:
-            return None
-    
-    @staticmethod    
-    def searchByName(name):
-        """ method: slb.template.cache.search
-            Search the cache template by given name.
-        """
-        try:
-            r = method_call.call_api(TemplateVipPort(), method = "slb.template.cache.search", name = name, format = "url")
-            return TemplateVipPort(**r[TemplateVipPort.__obj_name__])
-        except AxAPIError:
-            return None
+    xml_convrt = {template_type.list_tag: template_type.obj_name}
+    xml_convrt.update(template_type.lists)
+    doc = """
+        Implementation of the aXAPI slb.template.%s.* method to
+        manage the SLB %s template as getAll/searchByName/create/delete/update
+        %s"""%(template_type.key, template_type.title, template_type.usage)
+    return type(template_type.class_name, (Template,), {
+        "__doc__": doc,
+        "__module__": __name__,
+        "__obj_name__": template_type.obj_name,
+        "__xml_convrt__": xml_convrt,
+        "__template_type__": template_type,
+    })
 
-    def create(self):
-        """ method: slb.template.cache.create
-            Create the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.create", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-        
-    def delete(self):
-        """ method: slb.template.cache.delete
-            Delete the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.delete", format = "url", name = self.name) 
-            return 0
-        except AxAPIError, e:
-            return e.code
+# template key: class
+REGISTRY = dict((t.key, template_class(t)) for t in TEMPLATE_TYPES)
 
-    def update(self):
-        """ method: slb.template.cache.update
-            Update the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.update", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
+TemplateSmtp = REGISTRY["smtp"]
+TemplateCache = REGISTRY["cache"]
+TemplateVirtualServer = REGISTRY["virtual_server"]
+TemplateVipPort = REGISTRY["vip_port"]
+TemplateServer = REGISTRY["server"]
+TemplateServerPort = REGISTRY["server_port"]
+TemplateHttp = REGISTRY["http"]
+TemplatePbslb = REGISTRY["pbslb"]
+TemplateSip = REGISTRY["sip"]
+TemplateRtsp = REGISTRY["rtsp"]
+TemplateConnReuse = REGISTRY["conn_reuse"]
+TemplateTcp = REGISTRY["tcp"]
+TemplateUdp = REGISTRY["udp"]
+TemplateCookiePersist = REGISTRY["cookie_persistence"]
+TemplateSourceIpPersist = REGISTRY["src_ip_persistence"]
+TemplateDestinationIp = REGISTRY["dst_ip_persistence"]
+TemplateSslPersist = REGISTRY["ssl_persistence"]
+TemplateTcpProxy = REGISTRY["tcp_proxy"]
+TemplateDns = REGISTRY["dns"]
+TemplateDiameter = REGISTRY["diameter"]
 
-class TemplateServer(AxObject):
+class TemplateIndex(object):
     """
-        Implementation of the aXAPI slb.template.cache.* method to 
-        manage the SLB cache template as getAll/searchByName/create/delete/update 
-        
-        Usage:
-            # cache template with options:
-            # name               (required) cache template name 
-            
-            # Example: create a cache template
-            # !
-            # slb template cache my_cache_templ1
-            #    policy uri abc nocache
-            #    policy uri 123 nocache
-            # !
-            cache1 = TemplateRamCache(name="my_cache_templ1")
-            cache1.policy_list = [{"uri": "abc", "action": 1}, {"uri": "123", "action": 1}]
-            cache1.create()
-            # get all cache templates
-            caches = TemplateRamCache.getAll()
-            for e in caches:
-                print e
-                # use aCache here
-                ...
+        The templates of one device by type and name:
+            by_type     {template key: {name: Template}}
+            errors      {template key: error} of the types that could not be read
     """
-    
-    __display__ = ["name"]
-    __obj_name__ = 'cache_template'
-    __xml_convrt__ = {"cache_template_list": "cache_template", "policys": "policy", "policy_list": "policy"}
 
-    @staticmethod
-    def getAll():
-        """ method : slb.template.cache.getAll
-            Returns a list of cache template in TemplateServer instance.
-        """
-        try:
-            res = method_call.call_api(TemplateServer(), method = "slb.template.cache.getAll", format = "url")
-            a_list = []
-            for item in res["cache_template_list"]:
-                a_list.append( TemplateServer(**item) )
-            return a_list
-        except AxAPIError:
-            return None
-    
-    @staticmethod    
-    def searchByName(name):
-        """ method: slb.template.cache.search
-            Search the cache template by given name.
-        """
-        try:
-            r = method_call.call_api(TemplateServer(), method = "slb.template.cache.search", name = name, format = "url")
-            return TemplateServer(**r[TemplateServer.__obj_name__])
-        except AxAPIError:
-            return None
+    def __init__(self, device=None):
+        self.device = device
+        self.by_type = {}
+        self.errors = {}
 
-    def create(self):
-        """ method: slb.template.cache.create
-            Create the cache template.
+    def add(self, key, templates):
+        self.by_type[key] = dict((t.get("name"), t) for t in templates)
+
+    def templates(self, key):
+        return self.by_type.get(key, {}).values()
+
+    def get(self, key, name):
+        return self.by_type.get(key, {}).get(name)
+
+    def find(self, name):
         """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.create", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-        
-    def delete(self):
-        """ method: slb.template.cache.delete
-            Delete the cache template.
+            Returns the [(template key, Template)] named name.
         """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.delete", format = "url", name = self.name) 
-            return 0
-        except AxAPIError, e:
-            return e.code
+        return [(key, by_name[name]) for key, by_name in self.by_type.iteritems() if name in by_name]
 
-    def update(self):
-        """ method: slb.template.cache.update
-            Update the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.update", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
+    def __len__(self):
+        return sum(len(by_name) for by_name in self.by_type.itervalues())
 
-class TemplateServerPort(AxObject):
+def fetch_all(executor, device_ip, keys=None, fields=None):
     """
-        Implementation of the aXAPI slb.template.cache.* method to 
-        manage the SLB cache template as getAll/searchByName/create/delete/update 
-        
-        Usage:
-            # cache template with options:
-            # name               (required) cache template name 
-            
-            # Example: create a cache template
-            # !
-            # slb template cache my_cache_templ1
-            #    policy uri abc nocache
-            #    policy uri 123 nocache
-            # !
-            cache1 = TemplateRamCache(name="my_cache_templ1")
-            cache1.policy_list = [{"uri": "abc", "action": 1}, {"uri": "123", "action": 1}]
-            cache1.create()
-            # get all cache templates
-            caches = TemplateRamCache.getAll()
-            for e in caches:
-                print e
-                # use aCache here
-                ...
+        Runs the getAll of every template type, or of the keys, on a device
+        registered with an executor.Executor, as many at a time as the
+        executor allows on the device.  Returns a TemplateIndex.
     """
-    
-    __display__ = ["name"]
-    __obj_name__ = 'cache_template'
-    __xml_convrt__ = {"cache_template_list": "cache_template", "policys": "policy", "policy_list": "policy"}
+    return fetch_fleet(executor, [device_ip], keys, fields)[device_ip]
 
-    @staticmethod
-    def getAll():
-        """ method : slb.template.cache.getAll
-            Returns a list of cache template in TemplateServerPort instance.
-        """
-        try:
-            res = method_call.call_api(TemplateServerPort(), method = "slb.template.cache.getAll", format = "url")
-            a_list = []
-            for item in res["cache_template_list"]:
-                a_list.append( TemplateServerPort(**item) )
-            return a_list
-        except AxAPIError:
-            return None
-    
-    @staticmethod    
-    def searchByName(name):
-        """ method: slb.template.cache.search
-            Search the cache template by given name.
-        """
-        try:
-            r = method_call.call_api(TemplateServerPort(), method = "slb.template.cache.search", name = name, format = "url")
-            return TemplateServerPort(**r[TemplateServerPort.__obj_name__])
-        except AxAPIError:
-            return None
-
-    def create(self):
-        """ method: slb.template.cache.create
-            Create the cache template.
-        """
+def fetch_fleet(executor, devices, keys=None, fields=None):
+    """
+        Same as fetch_all for many devices at once, returns {device: TemplateIndex}.
+    """
+    keys = keys or [t.key for t in TEMPLATE_TYPES]
+    futures = [(device, key, executor.submit(device, REGISTRY[key].getAll, fields)) for device in devices for key in keys]
+    result = dict((device, TemplateIndex(device)) for device in devices)
+    for device, key, future in futures:
+        index = result[device]
+        # any failure is recorded with its type, the other types and
+        # devices are still indexed
         try:
-            method_call.call_api(self, method = "slb.template.cache.create", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-        
-    def delete(self):
-        """ method: slb.template.cache.delete
-            Delete the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.delete", format = "url", name = self.name) 
-            return 0
-        except AxAPIError, e:
-            return e.code
-
-    def update(self):
-        """ method: slb.template.cache.update
-            Update the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.update", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-
-class TemplateHttp(AxObject):
-    """
-        Implementation of the aXAPI slb.template.cache.* method to 
-        manage the SLB cache template as getAll/searchByName/create/delete/update 
-        
-        Usage:
-            # cache template with options:
-            # name               (required) cache template name 
-            
-            # Example: create a cache template
-            # !
-            # slb template cache my_cache_templ1
-            #    policy uri abc nocache
-            #    policy uri 123 nocache
-            # !
-            cache1 = TemplateRamCache(name="my_cache_templ1")
-            cache1.policy_list = [{"uri": "abc", "action": 1}, {"uri": "123", "action": 1}]
-            cache1.create()
-            # get all cache templates
-            caches = TemplateRamCache.getAll()
-            for e in caches:
-                print e
-                # use aCache here
-                ...
-    """
-    
-    __display__ = ["name"]
-    __obj_name__ = 'cache_template'
-    __xml_convrt__ = {"cache_template_list": "cache_template", "policys": "policy", "policy_list": "policy"}
-
-    @staticmethod
-    def getAll():
-        """ method : slb.template.cache.getAll
-            Returns a list of cache template in TemplateHttp instance.
-        """
-        try:
-            res = method_call.call_api(TemplateHttp(), method = "slb.template.cache.getAll", format = "url")
-            a_list = []
-            for item in res["cache_template_list"]:
-                a_list.append( TemplateHttp(**item) )
-            return a_list
-        except AxAPIError:
-            return None
-    
-    @staticmethod    
-    def searchByName(name):
-        """ method: slb.template.cache.search
-            Search the cache template by given name.
-        """
-        try:
-            r = method_call.call_api(TemplateHttp(), method = "slb.template.cache.search", name = name, format = "url")
-            return TemplateHttp(**r[TemplateHttp.__obj_name__])
-        except AxAPIError:
-            return None
-
-    def create(self):
-        """ method: slb.template.cache.create
-            Create the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.create", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-        
-    def delete(self):
-        """ method: slb.template.cache.delete
-            Delete the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.delete", format = "url", name = self.name) 
-            return 0
-        except AxAPIError, e:
-            return e.code
-
-    def update(self):
-        """ method: slb.template.cache.update
-            Update the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.update", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-
-class TemplatePbslb(AxObject):
-    """
-        Implementation of the aXAPI slb.template.cache.* method to 
-        manage the SLB cache template as getAll/searchByName/create/delete/update 
-        
-        Usage:
-            # cache template with options:
-            # name               (required) cache template name 
-            
-            # Example: create a cache template
-            # !
-            # slb template cache my_cache_templ1
-            #    policy uri abc nocache
-            #    policy uri 123 nocache
-            # !
-            cache1 = TemplateRamCache(name="my_cache_templ1")
-            cache1.policy_list = [{"uri": "abc", "action": 1}, {"uri": "123", "action": 1}]
-            cache1.create()
-            # get all cache templates
-            caches = TemplateRamCache.getAll()
-            for e in caches:
-                print e
-                # use aCache here
-                ...
-    """
-    
-    __display__ = ["name"]
-    __obj_name__ = 'cache_template'
-    __xml_convrt__ = {"cache_template_list": "cache_template", "policys": "policy", "policy_list": "policy"}
-
-    @staticmethod
-    def getAll():
-        """ method : slb.template.cache.getAll
-            Returns a list of cache template in TemplatePbslb instance.
-        """
-        try:
-            res = method_call.call_api(TemplatePbslb(), method = "slb.template.cache.getAll", format = "url")
-            a_list = []
-            for item in res["cache_template_list"]:
-                a_list.append( TemplatePbslb(**item) )
-            return a_list
-        except AxAPIError:
-            return None
-    
-    @staticmethod    
-    def searchByName(name):
-        """ method: slb.template.cache.search
-            Search the cache template by given name.
-        """
-        try:
-            r = method_call.call_api(TemplatePbslb(), method = "slb.template.cache.search", name = name, format = "url")
-            return TemplatePbslb(**r[TemplatePbslb.__obj_name__])
-        except AxAPIError:
-            return None
-
-    def create(self):
-        """ method: slb.template.cache.create
-            Create the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.create", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-        
-    def delete(self):
-        """ method: slb.template.cache.delete
-            Delete the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.delete", format = "url", name = self.name) 
-            return 0
-        except AxAPIError, e:
-            return e.code
-
-    def update(self):
-        """ method: slb.template.cache.update
-            Update the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.update", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-
-class TemplateSip(AxObject):
-    """
-        Implementation of the aXAPI slb.template.cache.* method to 
-        manage the SLB cache template as getAll/searchByName/create/delete/update 
-        
-        Usage:
-            # cache template with options:
-            # name               (required) cache template name 
-            
-            # Example: create a cache template
-            # !
-            # slb template cache my_cache_templ1
-            #    policy uri abc nocache
-            #    policy uri 123 nocache
-            # !
-            cache1 = TemplateRamCache(name="my_cache_templ1")
-            cache1.policy_list = [{"uri": "abc", "action": 1}, {"uri": "123", "action": 1}]
-            cache1.create()
-            # get all cache templates
-            caches = TemplateRamCache.getAll()
-            for e in caches:
-                print e
-                # use aCache here
-                ...
-    """
-    
-    __display__ = ["name"]
-    __obj_name__ = 'cache_template'
-    __xml_convrt__ = {"cache_template_list": "cache_template", "policys": "policy", "policy_list": "policy"}
-
-    @staticmethod
-    def getAll():
-        """ method : slb.template.cache.getAll
-            Returns a list of cache template in TemplateCache instance.
-        """
-        try:
-            res = method_call.call_api(TemplateSip(), method = "slb.template.cache.getAll", format = "url")
-            a_list = []
-            for item in res["cache_template_list"]:
-                a_list.append( TemplateSip(**item) )
-            return a_list
-        except AxAPIError:
-            return None
-    
-    @staticmethod    
-    def searchByName(name):
-        """ method: slb.template.cache.search
-            Search the cache template by given name.
-        """
-        try:
-            r = method_call.call_api(TemplateSip(), method = "slb.template.cache.search", name = name, format = "url")
-            return TemplateSip(**r[TemplateSip.__obj_name__])
-        except AxAPIError:
-            return None
-
-    def create(self):
-        """ method: slb.template.cache.create
-            Create the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.create", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-        
-    def delete(self):
-        """ method: slb.template.cache.delete
-            Delete the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.delete", format = "url", name = self.name) 
-            return 0
-        except AxAPIError, e:
-            return e.code
-
-    def update(self):
-        """ method: slb.template.cache.update
-            Update the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.update", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-
-class TemplateRtsp(AxObject):
-    """
-        Implementation of the aXAPI slb.template.cache.* method to 
-        manage the SLB cache template as getAll/searchByName/create/delete/update 
-        
-        Usage:
-            # cache template with options:
-            # name               (required) cache template name 
-            
-            # Example: create a cache template
-            # !
-            # slb template cache my_cache_templ1
-            #    policy uri abc nocache
-            #    policy uri 123 nocache
-            # !
-            cache1 = TemplateRamCache(name="my_cache_templ1")
-            cache1.policy_list = [{"uri": "abc", "action": 1}, {"uri": "123", "action": 1}]
-            cache1.create()
-            # get all cache templates
-            caches = TemplateRamCache.getAll()
-            for e in caches:
-                print e
-                # use aCache here
-                ...
-    """
-    
-    __display__ = ["name"]
-    __obj_name__ = 'cache_template'
-    __xml_convrt__ = {"cache_template_list": "cache_template", "policys": "policy", "policy_list": "policy"}
-
-    @staticmethod
-    def getAll():
-        """ method : slb.template.cache.getAll
-            Returns a list of cache template in TemplateRtsp instance.
-        """
-        try:
-            res = method_call.call_api(TemplateRtsp(), method = "slb.template.cache.getAll", format = "url")
-            a_list = []
-            for item in res["cache_template_list"]:
-                a_list.append( TemplateRtsp(**item) )
-            return a_list
-        except AxAPIError:
-            return None
-    
-    @staticmethod    
-    def searchByName(name):
-        """ method: slb.template.cache.search
-            Search the cache template by given name.
-        """
-        try:
-            r = method_call.call_api(TemplateRtsp(), method = "slb.template.cache.search", name = name, format = "url")
-            return TemplateRtsp(**r[TemplateRtsp.__obj_name__])
-        except AxAPIError:
-            return None
-
-    def create(self):
-        """ method: slb.template.cache.create
-            Create the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.create", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-        
-    def delete(self):
-        """ method: slb.template.cache.delete
-            Delete the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.delete", format = "url", name = self.name) 
-            return 0
-        except AxAPIError, e:
-            return e.code
-
-    def update(self):
-        """ method: slb.template.cache.update
-            Update the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.update", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-
-class TemplateConnReuse(AxObject):
-    """
-        Implementation of the aXAPI slb.template.cache.* method to 
-        manage the SLB cache template as getAll/searchByName/create/delete/update 
-        
-        Usage:
-            # cache template with options:
-            # name               (required) cache template name 
-            
-            # Example: create a cache template
-            # !
-            # slb template cache my_cache_templ1
-            #    policy uri abc nocache
-            #    policy uri 123 nocache
-            # !
-            cache1 = TemplateRamCache(name="my_cache_templ1")
-            cache1.policy_list = [{"uri": "abc", "action": 1}, {"uri": "123", "action": 1}]
-            cache1.create()
-            # get all cache templates
-            caches = TemplateRamCache.getAll()
-            for e in caches:
-                print e
-                # use aCache here
-                ...
-    """
-    
-    __display__ = ["name"]
-    __obj_name__ = 'cache_template'
-    __xml_convrt__ = {"cache_template_list": "cache_template", "policys": "policy", "policy_list": "policy"}
-
-    @staticmethod
-    def getAll():
-        """ method : slb.template.cache.getAll
-            Returns a list of cache template in TemplateConnReuse instance.
-        """
-        try:
-            res = method_call.call_api(TemplateConnReuse(), method = "slb.template.cache.getAll", format = "url")
-            a_list = []
-            for item in res["cache_template_list"]:
-                a_list.append( TemplateConnReuse(**item) )
-            return a_list
-        except AxAPIError:
-            return None
-    
-    @staticmethod    
-    def searchByName(name):
-        """ method: slb.template.cache.search
-            Search the cache template by given name.
-        """
-        try:
-            r = method_call.call_api(TemplateConnReuse(), method = "slb.template.cache.search", name = name, format = "url")
-            return TemplateConnReuse(**r[TemplateConnReuse.__obj_name__])
-        except AxAPIError:
-            return None
-
-    def create(self):
-        """ method: slb.template.cache.create
-            Create the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.create", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-        
-    def delete(self):
-        """ method: slb.template.cache.delete
-            Delete the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.delete", format = "url", name = self.name) 
-            return 0
-        except AxAPIError, e:
-            return e.code
-
-    def update(self):
-        """ method: slb.template.cache.update
-            Update the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.update", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-
-class TemplateTcp(AxObject):
-    """
-        Implementation of the aXAPI slb.template.cache.* method to 
-        manage the SLB cache template as getAll/searchByName/create/delete/update 
-        
-        Usage:
-            # cache template with options:
-            # name               (required) cache template name 
-            
-            # Example: create a cache template
-            # !
-            # slb template cache my_cache_templ1
-            #    policy uri abc nocache
-            #    policy uri 123 nocache
-            # !
-            cache1 = TemplateRamCache(name="my_cache_templ1")
-            cache1.policy_list = [{"uri": "abc", "action": 1}, {"uri": "123", "action": 1}]
-            cache1.create()
-            # get all cache templates
-            caches = TemplateRamCache.getAll()
-            for e in caches:
-                print e
-                # use aCache here
-                ...
-    """
-    
-    __display__ = ["name"]
-    __obj_name__ = 'cache_template'
-    __xml_convrt__ = {"cache_template_list": "cache_template", "policys": "policy", "policy_list": "policy"}
-
-    @staticmethod
-    def getAll():
-        """ method : slb.template.cache.getAll
-            Returns a list of cache template in TemplateTcp instance.
-        """
-        try:
-            res = method_call.call_api(TemplateTcp(), method = "slb.template.cache.getAll", format = "url")
-            a_list = []
-            for item in res["cache_template_list"]:
-                a_list.append( TemplateTcp(**item) )
-            return a_list
-        except AxAPIError:
-            return None
-    
-    @staticmethod    
-    def searchByName(name):
-        """ method: slb.template.cache.search
-            Search the cache template by given name.
-        """
-        try:
-            r = method_call.call_api(TemplateTcp(), method = "slb.template.cache.search", name = name, format = "url")
-            return TemplateTcp(**r[TemplateTcp.__obj_name__])
-        except AxAPIError:
-            return None
-
-    def create(self):
-        """ method: slb.template.cache.create
-            Create the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.create", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-        
-    def delete(self):
-        """ method: slb.template.cache.delete
-            Delete the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.delete", format = "url", name = self.name) 
-            return 0
-        except AxAPIError, e:
-            return e.code
-
-    def update(self):
-        """ method: slb.template.cache.update
-            Update the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.update", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-
-class TemplateUdp(AxObject):
-    """
-        Implementation of the aXAPI slb.template.cache.* method to 
-        manage the SLB cache template as getAll/searchByName/create/delete/update 
-        
-        Usage:
-            # cache template with options:
-            # name               (required) cache template name 
-            
-            # Example: create a cache template
-            # !
-            # slb template cache my_cache_templ1
-            #    policy uri abc nocache
-            #    policy uri 123 nocache
-            # !
-            cache1 = TemplateRamCache(name="my_cache_templ1")
-            cache1.policy_list = [{"uri": "abc", "action": 1}, {"uri": "123", "action": 1}]
-            cache1.create()
-            # get all cache templates
-            caches = TemplateRamCache.getAll()
-            for e in caches:
-                print e
-                # use aCache here
-                ...
-    """
-    
-    __display__ = ["name"]
-    __obj_name__ = 'cache_template'
-    __xml_convrt__ = {"cache_template_list": "cache_template", "policys": "policy", "policy_list": "policy"}
-
-    @staticmethod
-    def getAll():
-        """ method : slb.template.cache.getAll
-            Returns a list of cache template in TemplateUdp instance.
-        """
-        try:
-            res = method_call.call_api(TemplateUdp(), method = "slb.template.cache.getAll", format = "url")
-            a_list = []
-            for item in res["cache_template_list"]:
-                a_list.append( TemplateUdp(**item) )
-            return a_list
-        except AxAPIError:
-            return None
-    
-    @staticmethod    
-    def searchByName(name):
-        """ method: slb.template.cache.search
-            Search the cache template by given name.
-        """
-        try:
-            r = method_call.call_api(TemplateUdp(), method = "slb.template.cache.search", name = name, format = "url")
-            return TemplateUdp(**r[TemplateUdp.__obj_name__])
-        except AxAPIError:
-            return None
-
-    def create(self):
-        """ method: slb.template.cache.create
-            Create the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.create", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-        
-    def delete(self):
-        """ method: slb.template.cache.delete
-            Delete the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.delete", format = "url", name = self.name) 
-            return 0
-        except AxAPIError, e:
-            return e.code
-
-    def update(self):
-        """ method: slb.template.cache.update
-            Update the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.update", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-
-class TemplateCookiePersist(AxObject):
-    """
-        Implementation of the aXAPI slb.template.cache.* method to 
-        manage the SLB cache template as getAll/searchByName/create/delete/update 
-        
-        Usage:
-            # cache template with options:
-            # name               (required) cache template name 
-            
-            # Example: create a cache template
-            # !
-            # slb template cache my_cache_templ1
-            #    policy uri abc nocache
-            #    policy uri 123 nocache
-            # !
-            cache1 = TemplateRamCache(name="my_cache_templ1")
-            cache1.policy_list = [{"uri": "abc", "action": 1}, {"uri": "123", "action": 1}]
-            cache1.create()
-            # get all cache templates
-            caches = TemplateRamCache.getAll()
-            for e in caches:
-                print e
-                # use aCache here
-                ...
-    """
-    
-    __display__ = ["name"]
-    __obj_name__ = 'cache_template'
-    __xml_convrt__ = {"cache_template_list": "cache_template", "policys": "policy", "policy_list": "policy"}
-
-    @staticmethod
-    def getAll():
-        """ method : slb.template.cache.getAll
-            Returns a list of cache template in TemplateCookiePersist instance.
-        """
-        try:
-            res = method_call.call_api(TemplateCookiePersist(), method = "slb.template.cache.getAll", format = "url")
-            a_list = []
-            for item in res["cache_template_list"]:
-                a_list.append( TemplateCookiePersist(**item) )
-            return a_list
-        except AxAPIError:
-            return None
-    
-    @staticmethod    
-    def searchByName(name):
-        """ method: slb.template.cache.search
-            Search the cache template by given name.
-        """
-        try:
-            r = method_call.call_api(TemplateCookiePersist(), method = "slb.template.cache.search", name = name, format = "url")
-            return TemplateCookiePersist(**r[TemplateCookiePersist.__obj_name__])
-        except AxAPIError:
-            return None
-
-    def create(self):
-        """ method: slb.template.cache.create
-            Create the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.create", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-        
-    def delete(self):
-        """ method: slb.template.cache.delete
-            Delete the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.delete", format = "url", name = self.name) 
-            return 0
-        except AxAPIError, e:
-            return e.code
-
-    def update(self):
-        """ method: slb.template.cache.update
-            Update the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.update", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-
-class TemplateSourceIpPersist(AxObject):
-    """
-        Implementation of the aXAPI slb.template.cache.* method to 
-        manage the SLB cache template as getAll/searchByName/create/delete/update 
-        
-        Usage:
-            # cache template with options:
-            # name               (required) cache template name 
-            
-            # Example: create a cache template
-            # !
-            # slb template cache my_cache_templ1
-            #    policy uri abc nocache
-            #    policy uri 123 nocache
-            # !
-            cache1 = TemplateRamCache(name="my_cache_templ1")
-            cache1.policy_list = [{"uri": "abc", "action": 1}, {"uri": "123", "action": 1}]
-            cache1.create()
-            # get all cache templates
-            caches = TemplateRamCache.getAll()
-            for e in caches:
-                print e
-                # use aCache here
-                ...
-    """
-    
-    __display__ = ["name"]
-    __obj_name__ = 'cache_template'
-    __xml_convrt__ = {"cache_template_list": "cache_template", "policys": "policy", "policy_list": "policy"}
-
-    @staticmethod
-    def getAll():
-        """ method : slb.template.cache.getAll
-            Returns a list of cache template in TemplateSourceIpPersist instance.
-        """
-        try:
-            res = method_call.call_api(TemplateSourceIpPersist(), method = "slb.template.cache.getAll", format = "url")
-            a_list = []
-            for item in res["cache_template_list"]:
-                a_list.append( TemplateSourceIpPersist(**item) )
-            return a_list
-        except AxAPIError:
-            return None
-    
-    @staticmethod    
-    def searchByName(name):
-        """ method: slb.template.cache.search
-            Search the cache template by given name.
-        """
-        try:
-            r = method_call.call_api(TemplateSourceIpPersist(), method = "slb.template.cache.search", name = name, format = "url")
-            return TemplateSourceIpPersist(**r[TemplateSourceIpPersist.__obj_name__])
-        except AxAPIError:
-            return None
-
-    def create(self):
-        """ method: slb.template.cache.create
-            Create the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.create", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-        
-    def delete(self):
-        """ method: slb.template.cache.delete
-            Delete the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.delete", format = "url", name = self.name) 
-            return 0
-        except AxAPIError, e:
-            return e.code
-
-    def update(self):
-        """ method: slb.template.cache.update
-            Update the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.update", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-
-class TemplateDestinationIp(AxObject):
-    """
-        Implementation of the aXAPI slb.template.cache.* method to 
-        manage the SLB cache template as getAll/searchByName/create/delete/update 
-        
-        Usage:
-            # cache template with options:
-            # name               (required) cache template name 
-            
-            # Example: create a cache template
-            # !
-            # slb template cache my_cache_templ1
-            #    policy uri abc nocache
-            #    policy uri 123 nocache
-            # !
-            cache1 = TemplateRamCache(name="my_cache_templ1")
-            cache1.policy_list = [{"uri": "abc", "action": 1}, {"uri": "123", "action": 1}]
-            cache1.create()
-            # get all cache templates
-            caches = TemplateRamCache.getAll()
-            for e in caches:
-                print e
-                # use aCache here
-                ...
-    """
-    
-    __display__ = ["name"]
-    __obj_name__ = 'cache_template'
-    __xml_convrt__ = {"cache_template_list": "cache_template", "policys": "policy", "policy_list": "policy"}
-
-    @staticmethod
-    def getAll():
-        """ method : slb.template.cache.getAll
-            Returns a list of cache template in TemplateDestinationIp instance.
-        """
-        try:
-            res = method_call.call_api(TemplateCache(), method = "slb.template.cache.getAll", format = "url")
-            a_list = []
-            for item in res["cache_template_list"]:
-                a_list.append( TemplateCache(**item) )
-            return a_list
-        except AxAPIError:
-            return None
-    
-    @staticmethod    
-    def searchByName(name):
-        """ method: slb.template.cache.search
-            Search the cache template by given name.
-        """
-        try:
-            r = method_call.call_api(TemplateCache(), method = "slb.template.cache.search", name = name, format = "url")
-            return TemplateCache(**r[TemplateCache.__obj_name__])
-        except AxAPIError:
-            return None
-
-    def create(self):
-        """ method: slb.template.cache.create
-            Create the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.create", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-        
-    def delete(self):
-        """ method: slb.template.cache.delete
-            Delete the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.delete", format = "url", name = self.name) 
-            return 0
-        except AxAPIError, e:
-            return e.code
-
-    def update(self):
-        """ method: slb.template.cache.update
-            Update the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.update", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-
-class Template(AxObject):
-    """
-        Implementation of the aXAPI slb.template.cache.* method to 
-        manage the SLB cache template as getAll/searchByName/create/delete/update 
-        
-        Usage:
-            # cache template with options:
-            # name               (required) cache template name 
-            
-            # Example: create a cache template
-            # !
-            # slb template cache my_cache_templ1
-            #    policy uri abc nocache
-            #    policy uri 123 nocache
-            # !
-            cache1 = TemplateRamCache(name="my_cache_templ1")
-            cache1.policy_list = [{"uri": "abc", "action": 1}, {"uri": "123", "action": 1}]
-            cache1.create()
-            # get all cache templates
-            caches = TemplateRamCache.getAll()
-            for e in caches:
-                print e
-                # use aCache here
-                ...
-    """
-    
-    __display__ = ["name"]
-    __obj_name__ = 'cache_template'
-    __xml_convrt__ = {"cache_template_list": "cache_template", "policys": "policy", "policy_list": "policy"}
-
-    @staticmethod
-    def getAll():
-        """ method : slb.template.cache.getAll
-            Returns a list of cache template in TemplateCache instance.
-        """
-        try:
-            res = method_call.call_api(TemplateDestinationIp(), method = "slb.template.cache.getAll", format = "url")
-            a_list = []
-            for item in res["cache_template_list"]:
-                a_list.append( TemplateDestinationIp(**item) )
-            return a_list
-        except AxAPIError:
-            return None
-    
-    @staticmethod    
-    def searchByName(name):
-        """ method: slb.template.cache.search
-            Search the cache template by given name.
-        """
-        try:
-            r = method_call.call_api(TemplateDestinationIp(), method = "slb.template.cache.search", name = name, format = "url")
-            return TemplateDestinationIp(**r[TemplateDestinationIp.__obj_name__])
-        except AxAPIError:
-            return None
-
-    def create(self):
-        """ method: slb.template.cache.create
-            Create the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.create", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-        
-    def delete(self):
-        """ method: slb.template.cache.delete
-            Delete the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.delete", format = "url", name = self.name) 
-            return 0
-        except AxAPIError, e:
-            return e.code
-
-    def update(self):
-        """ method: slb.template.cache.update
-            Update the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.update", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-
-class TemplateSslPersist(AxObject):
-    """
-        Implementation of the aXAPI slb.template.cache.* method to 
-        manage the SLB cache template as getAll/searchByName/create/delete/update 
-        
-        Usage:
-            # cache template with options:
-            # name               (required) cache template name 
-            
-            # Example: create a cache template
-            # !
-            # slb template cache my_cache_templ1
-            #    policy uri abc nocache
-            #    policy uri 123 nocache
-            # !
-            cache1 = TemplateRamCache(name="my_cache_templ1")
-            cache1.policy_list = [{"uri": "abc", "action": 1}, {"uri": "123", "action": 1}]
-            cache1.create()
-            # get all cache templates
-            caches = TemplateRamCache.getAll()
-            for e in caches:
-                print e
-                # use aCache here
-                ...
-    """
-    
-    __display__ = ["name"]
-    __obj_name__ = 'cache_template'
-    __xml_convrt__ = {"cache_template_list": "cache_template", "policys": "policy", "policy_list": "policy"}
-
-    @staticmethod
-    def getAll():
-        """ method : slb.template.cache.getAll
-            Returns a list of cache template in TemplateSslPersist instance.
-        """
-        try:
-            res = method_call.call_api(TemplateSslPersist(), method = "slb.template.cache.getAll", format = "url")
-            a_list = []
-            for item in res["cache_template_list"]:
-                a_list.append( TemplateSslPersist(**item) )
-            return a_list
-        except AxAPIError:
-            return None
-    
-    @staticmethod    
-    def searchByName(name):
-        """ method: slb.template.cache.search
-            Search the cache template by given name.
-        """
-        try:
-            r = method_call.call_api(TemplateSslPersist(), method = "slb.template.cache.search", name = name, format = "url")
-            return TemplateSslPersist(**r[TemplateSslPersist.__obj_name__])
-        except AxAPIError:
-            return None
-
-    def create(self):
-        """ method: slb.template.cache.create
-            Create the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.create", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-        
-    def delete(self):
-        """ method: slb.template.cache.delete
-            Delete the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.delete", format = "url", name = self.name) 
-            return 0
-        except AxAPIError, e:
-            return e.code
-
-    def update(self):
-        """ method: slb.template.cache.update
-            Update the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.update", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-
-class TemplateTcpProxy(AxObject):
-    """
-        Implementation of the aXAPI slb.template.cache.* method to 
-        manage the SLB cache template as getAll/searchByName/create/delete/update 
-        
-        Usage:
-            # cache template with options:
-            # name               (required) cache template name 
-            
-            # Example: create a cache template
-            # !
-            # slb template cache my_cache_templ1
-            #    policy uri abc nocache
-            #    policy uri 123 nocache
-            # !
-            cache1 = TemplateRamCache(name="my_cache_templ1")
-            cache1.policy_list = [{"uri": "abc", "action": 1}, {"uri": "123", "action": 1}]
-            cache1.create()
-            # get all cache templates
-            caches = TemplateRamCache.getAll()
-            for e in caches:
-                print e
-                # use aCache here
-                ...
-    """
-    
-    __display__ = ["name"]
-    __obj_name__ = 'cache_template'
-    __xml_convrt__ = {"cache_template_list": "cache_template", "policys": "policy", "policy_list": "policy"}
-
-    @staticmethod
-    def getAll():
-        """ method : slb.template.cache.getAll
-            Returns a list of cache template in TemplateTcpProxy instance.
-        """
-        try:
-            res = method_call.call_api(TemplateTcpProxy(), method = "slb.template.cache.getAll", format = "url")
-            a_list = []
-            for item in res["cache_template_list"]:
-                a_list.append( TemplateTcpProxy(**item) )
-            return a_list
-        except AxAPIError:
-            return None
-    
-    @staticmethod    
-    def searchByName(name):
-        """ method: slb.template.cache.search
-            Search the cache template by given name.
-        """
-        try:
-            r = method_call.call_api(TemplateTcpProxy(), method = "slb.template.cache.search", name = name, format = "url")
-            return TemplateTcpProxy(**r[TemplateTcpProxy.__obj_name__])
-        except AxAPIError:
-            return None
-
-    def create(self):
-        """ method: slb.template.cache.create
-            Create the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.create", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-        
-    def delete(self):
-        """ method: slb.template.cache.delete
-            Delete the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.delete", format = "url", name = self.name) 
-            return 0
-        except AxAPIError, e:
-            return e.code
-
-    def update(self):
-        """ method: slb.template.cache.update
-            Update the cache template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.cache.update", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-
-class TemplateDns(AxObject):
-    """
-        Implementation of the aXAPI slb.template.dns.* method to 
-        manage the SLB dns template as getAll/searchByName/create/delete/update 
-        
-        Usage:
-            # dns template with options:
-            # name               (required) cache template name 
-            # name                             dns template name
-            # malformed_query                  malformed query, disabled(0), drop(1), forward to service group(2)
-            # service_group_malformed_query    service group name, only malformed_query is 2
-            # status                           dns template status, disabled(0) or enabled(1)
-            # def_policy                       default policy, no cache(0) or cache(1)
-            # log_period                       log period (Minutes)
-            # max_cache_size
-            # class_list         tag for the class list
-            #     name                 class list name
-            #     lid_list             tag for the collection of LID
-            #         id                   LID id
-            #         dns_cache_status     DNS cache status, enabled(1) or disabled(0)
-            #         ttl
-            #         weight
-            #         conn_rate_limit      connection rate limit
-            #         conn_rate_limit_per  connection rate limit interval
-            #         over_limit_action    drop(0), forward(1),
-            #         enable               DNS cache(2) or disable dns cache(3)
-            #         lockout              lockout
-            #         log_status           log status, enabled(1). disabled(0)
-            #         log_interval         log interval
-    """
-    
-    __display__ = ["name"]
-    __obj_name__ = 'dns_template'
-    __xml_convrt__ = {"dns_template_list": "dns_template", "lid_list": "lid"}
-
-    @staticmethod
-    def getAll():
-        """ method : slb.template.dns.getAll
-            Returns a list of dns template in TemplateDns instance.
-        """
-        try:
-            res = method_call.call_api(TemplateDns(), method = "slb.template.dns.getAll", format = "url")
-            a_list = []
-            for item in res["dns_template_list"]:
-                a_list.append( TemplateDns(**item) )
-            return a_list
-        except AxAPIError:
-            return None
-    
-    @staticmethod    
-    def searchByName(name):
-        """ method: slb.template.dns.search
-            Search the dns template by given name.
-        """
-        try:
-            r = method_call.call_api(TemplateDns(), method = "slb.template.dns.search", name = name, format = "url")
-            return TemplateDns(**r[TemplateDns.__obj_name__])
-        except AxAPIError:
-            return None
-
-    def create(self):
-        """ method: slb.template.dns.create
-            Create the dns template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.dns.create", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-        
-    def delete(self):
-        """ method: slb.template.dns.delete
-            Delete the dns template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.dns.delete", format = "url", name = self.name) 
-            return 0
-        except AxAPIError, e:
-            return e.code
-
-    def update(self):
-        """ method: slb.template.dns.update
-            Update the dns template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.dns.update", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-   
-class TemplateDiameter(AxObject):
-    """
-        Implementation of the aXAPI slb.template.diameter.* method to 
-        manage the SLB diameter template as getAll/searchByName/create/delete/update 
-        
-        Usage:
-            # diameter template with options:
-            # name               (required) cache template name 
-            # name                     diameter template name
-            # multiple_origin_host     multiple origin host
-            # origin_host              origin host
-            # origin_realm             origin realm
-            # product_name             product name
-            # vendor_id                vendor id
-            # idle_timeout             idle timeout
-            # dwr_time_interval        dwr time interval
-            # session_age              session age
-            # customizing_cea_response     customizing cea response
-            # duplicate_avp_code       duplicate avp code
-            # duplicate_pattern        duplicate pattern
-            # duplicate_service_name   duplicate service name
-            # avps                     tag for collection of avps
-            #     code                 code
-            #     mandatory            mandatory
-            #     type                 INT32 (1), INT64(2), String(3)
-            #     value                value
-            # message_codes            tag for collection of message codes
-            #     value                 message code
-    """
-    
-    __display__ = ["name"]
-    __obj_name__ = 'diameter_template'
-    __xml_convrt__ = {"diameter_template_list": "diameter_template", "avps": "avp", "message_codes": "code"}
-
-    @staticmethod
-    def getAll():
-        """ method : slb.template.diameter.getAll
-            Returns a list of diameter template in TemplateDiameter instance.
-        """
-        try:
-            res = method_call.call_api(TemplateDiameter(), method = "slb.template.diameter.getAll", format = "url")
-            a_list = []
-            for item in res["diameter_template_list"]:
-                a_list.append( TemplateDiameter(**item) )
-            return a_list
-        except AxAPIError:
-            return None
-    
-    @staticmethod    
-    def searchByName(name):
-        """ method: slb.template.diameter.search
-            Search the diameter template by given name.
-        """
-        try:
-            r = method_call.call_api(TemplateDiameter(), method = "slb.template.diameter.search", name = name, format = "url")
-            return TemplateDiameter(**r[TemplateDiameter.__obj_name__])
-        except AxAPIError:
-            return None
-
-    def create(self):
-        """ method: slb.template.diameter.create
-            Create the diameter template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.diameter.create", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-        
-    def delete(self):
-        """ method: slb.template.diameter.delete
-            Delete the diameter template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.diameter.delete", format = "url", name = self.name) 
-            return 0
-        except AxAPIError, e:
-            return e.code
-
-    def update(self):
-        """ method: slb.template.diameter.update
-            Update the diameter template.
-        """
-        try:
-            method_call.call_api(self, method = "slb.template.diameter.update", format = "url", post_data = self.getRequestPostDataXml())
-            return 0 
-        except AxAPIError, e:
-            return e.code
-        
\ No newline at end of file
+            templates = future.result()
+            if templates is None:
+                index.errors[key] = "%s.getAll failed"%REGISTRY[key].__name__
+            else:
+                index.add(key, templates)
+        except Exception, e:
+            index.errors[key] = error_message(e)
+    return result
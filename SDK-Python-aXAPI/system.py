@@ -41,10 +41,10 @@ class SystemNtp(AxObject):
         """
         try:
             res = method_call.call_api(SystemNtp(), method = "system.ntp.get", format = "url")
-            smtp_list = []
-            for item in res["smtp_template_list"]:
-                smtp_list.append( SystemNtp(**item) )
-            return smtp_list
+            ntp_list = []
+            for item in res["ntp_list"]:
+                ntp_list.append( SystemNtp(**item) )
+            return ntp_list
         except AxAPIError:
             return None
     
@@ -0,0 +1,169 @@
+# -*- encoding: utf8 -*-
+"""
+    Template dedup module:  identical SLB templates across devices.
+        template_body   the body of a template, without its name
+        body_hash       content address of the normalised body of a template
+        TemplateGroup   templates of one type with the same body
+        TemplateDedup   groups the fleet templates and pushes canonical ones
+
+        The templates are fetched with getAll from all devices concurrently
+        (slb_template.fetch_fleet) and hashed on their normalised body: the
+        name and the empty fields are dropped and numbers are compared as
+        numbers, the url format returning them as strings.  Templates of the
+        same type with the same body hash are grouped whatever their names
+        and devices.  The normal form is only hashed, a group keeps the body
+        of its first member as read.
+
+        push() writes one template body, such as the body of a group, to
+        many devices concurrently and skips the devices already holding the
+        same body under that name, so a standardisation only costs the
+        writes that change something.
+
+        Usage:
+            dedup = TemplateDedup(executor)
+            dedup.load(["10.0.0.1", "10.0.0.2"], keys=("http", "tcp", "cache"))
+            for group in dedup.duplicates():
+                print group.key, group.hash[:8], group.members
+            group = dedup.duplicates()[0]
+            print dedup.push(group.key, "std_%s"%group.key, group.body, devices=dedup.devices)
+"""
+
+import re
+
+from base import AxError, error_message
+from changefeed import content_hash
+from slb_template import REGISTRY, fetch_fleet
+
+_NUMBER = re.compile(r"^-?\d+$")
+
+def _canonical(value):
+    if isinstance(value, dict):
+        return dict((k, _canonical(v)) for k, v in value.iteritems() if v not in ("", None, [], {}))
+    if isinstance(value, list):
+        return [_canonical(v) for v in value]
+    if isinstance(value, basestring) and _NUMBER.match(value):
+        return int(value)
+    return value
+
+def template_body(obj_dict):
+    """
+        Returns the body of a template as read, without its name.
+    """
+    body = dict(obj_dict)
+    body.pop("name", None)
+    return body
+
+def body_hash(key, body):
+    """
+        Returns the content address of a template body of the key, computed
+        on its normal form so that "60" and 60 or a missing and an empty
+        field hash the same.
+    """
+    canonical = _canonical(REGISTRY[key].templateType().normalise(body))
+    canonical.pop("name", None)
+    return content_hash([key, canonical])
+
+class TemplateGroup(object):
+    """
+        body        body of the first member as read, the one to push
+        members     [(device, template name)] with this body
+    """
+    __slots__ = ("key", "hash", "body", "members")
+
+    def __init__(self, key, hash, body):
+        self.key = key
+        self.hash = hash
+        self.body = body
+        self.members = []
+
+    def devices(self):
+        return sorted(set(device for device, name in self.members))
+
+    def names(self):
+        return sorted(set(name for device, name in self.members))
+
+    def __repr__(self):
+        return "TemplateGroup(%s %s x%d)"%(self.key, self.hash[:8], len(self.members))
+
+class TemplateDedup(object):
+    """
+        executor    executor.Executor with the devices added
+    """
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.devices = []
+        self.groups = {}
+        self.errors = {}
+        # {(device, key): {name: hash}}
+        self._hashes = {}
+
+    def load(self, devices, keys=None):
+        """
+            Fetches the templates of the keys, all types by default, from the
+            devices concurrently and groups them by body.  Returns the number
+            of templates loaded.
+        """
+        self.devices = list(devices)
+        self.groups = {}
+        self.errors = {}
+        self._hashes = {}
+        count = 0
+        for device, index in fetch_fleet(self.executor, self.devices, keys).iteritems():
+            for key, error in index.errors.iteritems():
+                self.errors[(device, key)] = error
+            for key, by_name in index.by_type.iteritems():
+                hashes = self._hashes[(device, key)] = {}
+                for name, template in by_name.iteritems():
+                    body = template_body(template.getObjectDict())
+                    h = hashes[name] = body_hash(key, body)
+                    group = self.groups.get(h)
+                    if group is None:
+                        group = self.groups[h] = TemplateGroup(key, h, body)
+                    group.members.append((device, name))
+                    count += 1
+        return count
+
+    def duplicates(self, min_members=2):
+        """
+            Returns the groups of at least min_members templates, largest first.
+        """
+        groups = [g for g in self.groups.itervalues() if len(g.members) >= min_members]
+        groups.sort(key=lambda g: (-len(g.members), g.key, g.hash))
+        return groups
+
+    def lookup(self, device, key, name):
+        """
+            Returns the TemplateGroup of a loaded template, None if unknown.
+        """
+        h = self._hashes.get((device, key), {}).get(name)
+        return self.groups.get(h) if h is not None else None
+
+    def push(self, key, name, body, devices=None):
+        """
+            Writes the template name with body to the devices, the loaded ones
+            by default, concurrently: created where it is missing, updated
+            where it differs, and left alone where it is the same.  Returns
+            {device: 0 on success or unchanged, error code or message}.
+        """
+        cls = REGISTRY[key]
+        h = body_hash(key, body)
+        calls = []
+        result = {}
+        for device in devices or self.devices:
+            current = self._hashes.get((device, key))
+            if current is not None and current.get(name) == h:
+                result[device] = 0
+                continue
+            template = cls(**dict((str(k), v) for k, v in body.iteritems() if k != "name"))
+            template.name = name
+            write = template.update if current is not None and name in current else template.create
+            calls.append((device, self.executor.submit(device, write)))
+        for device, future in calls:
+            try:
+                result[device] = future.result()
+            except Exception, e:
+                result[device] = error_message(e)
+            if result[device] == 0:
+                self._hashes.setdefault((device, key), {})[name] = h
+        return result
@@ -0,0 +1,219 @@
+# -*- encoding: utf8 -*-
+"""
+    Template usage module:  reference counts of the SLB templates.
+        TemplateRef     one reference of an object to a template
+        DeviceUsage     templates and references of one device
+        TemplateUsage   loads the fleet and answers orphans and heavy hitters
+
+        The templates of every type (slb_template.fetch_fleet) and the real
+        servers, service groups and virtual servers, with only the fields
+        holding template names, are fetched from all devices concurrently.
+        The references are then counted in one pass over the objects:
+            RealServer      template, port_list template
+            ServiceGroup    member_list template
+            VirtualServer   vip_template, pbslb_template, and the
+                            *_template fields of vport_list
+        so that unused templates are found without a search per template.
+        References to a template that does not exist on the device are
+        reported as dangling.
+
+        Usage:
+            usage = TemplateUsage(executor)
+            usage.load(["10.0.0.1", "10.0.0.2"])
+            for device, key, name in usage.orphans():
+                print device, key, name
+            for device, key, name, count in usage.heavyHitters(10):
+                print device, key, name, count
+"""
+
+from base import AxError, error_message
+from slb import RealServer, ServiceGroup, VirtualServer
+from slb_template import fetch_fleet
+
+# referencing field: template key
+VPORT_REFERENCES = {
+    "vport_template": "vip_port",
+    "pbslb_template": "pbslb",
+    "http_template": "http",
+    "ram_cache_template": "cache",
+    "tcp_proxy_template": "tcp_proxy",
+    "conn_reuse_template": "conn_reuse",
+    "source_ip_persistence_template": "src_ip_persistence",
+    "cookie_persistence_template": "cookie_persistence",
+    "tcp_template": "tcp",
+    "udp_template": "udp",
+    "dns_template": "dns",
+    "rtsp_template": "rtsp",
+    "sip_template": "sip",
+    "smtp_template": "smtp",
+    "diameter_template": "diameter",
+}
+VIRTUAL_SERVER_REFERENCES = {"vip_template": "virtual_server", "pbslb_template": "pbslb"}
+
+# (kind, class, fields fetched)
+SOURCES = (
+    ("server", RealServer, ("name", "template", "port_list")),
+    ("service_group", ServiceGroup, ("name", "member_list")),
+    ("virtual_server", VirtualServer, ("name", "vip_template", "pbslb_template", "vport_list")),
+)
+
+# names of the templates the devices always have
+DEFAULT_TEMPLATES = frozenset(["default"])
+
+class TemplateRef(object):
+    """
+        port is the port of the referencing real server port, service group
+        member or virtual port, None for a reference of the object itself.
+    """
+    __slots__ = ("key", "template", "kind", "name", "port")
+
+    def __init__(self, key, template, kind, name, port=None):
+        self.key = key
+        self.template = template
+        self.kind = kind
+        self.name = name
+        self.port = port
+
+    def __repr__(self):
+        return "TemplateRef(%s %s <- %s %s%s)"%(self.key, self.template, self.kind, self.name,
+                                               "" if self.port is None else ":%s"%self.port)
+
+def references(kind, obj):
+    """
+        Yields the TemplateRef of an object dictionary of the kind.
+    """
+    name = obj.get("name")
+    if kind == "server":
+        if obj.get("template"):
+            yield TemplateRef("server", obj["template"], kind, name)
+        for port in obj.get("port_list") or ():
+            if port.get("template"):
+                yield TemplateRef("server_port", port["template"], kind, name, port.get("port_num"))
+    elif kind == "service_group":
+        for member in obj.get("member_list") or ():
+            if member.get("template"):
+                yield TemplateRef("server_port", member["template"], kind, name, member.get("port"))
+    else:
+        for field, key in VIRTUAL_SERVER_REFERENCES.iteritems():
+            if obj.get(field):
+                yield TemplateRef(key, obj[field], kind, name)
+        for vport in obj.get("vport_list") or ():
+            for field, key in VPORT_REFERENCES.iteritems():
+                if vport.get(field):
+                    yield TemplateRef(key, vport[field], kind, name, vport.get("port"))
+
+def fetch_objects(device):
+    """
+        Returns {kind: [object dictionary]} of the device bound to the
+        calling thread.  Raises AxError when a getAll fails.
+    """
+    result = {}
+    for kind, cls, fields in SOURCES:
+        objects = cls.getAll(fields)
+        if objects is None:
+            raise AxError("%s.getAll failed on %s"%(cls.__name__, device))
+        result[kind] = [obj.getObjectDict() for obj in objects]
+    return result
+
+class DeviceUsage(object):
+    """
+        counts      {(template key, name): number of references}, with 0 for
+                    the unused templates
+        referrers   {(template key, name): [TemplateRef]}
+        dangling    the TemplateRef to templates missing on the device
+        errors      {template key: error} of the types that could not be read
+    """
+
+    def __init__(self, device, index, objects):
+        self.device = device
+        self.errors = dict(index.errors)
+        self.counts = {}
+        self.referrers = {}
+        self.dangling = []
+        for key, by_name in index.by_type.iteritems():
+            for name in by_name:
+                self.counts[(key, name)] = 0
+        for kind, items in objects.iteritems():
+            for obj in items:
+                for ref in references(kind, obj):
+                    k = (ref.key, ref.template)
+                    if k not in self.counts:
+                        # unknown when the type failed to load, the default
+                        # templates are not always listed by getAll
+                        if ref.key not in self.errors and ref.template not in DEFAULT_TEMPLATES:
+                            self.dangling.append(ref)
+                        continue
+                    self.counts[k] += 1
+                    self.referrers.setdefault(k, []).append(ref)
+
+    def orphans(self):
+        """
+            Returns the sorted (template key, name) of the unused templates.
+        """
+        return sorted(k for k, count in self.counts.iteritems() if not count and k[1] not in DEFAULT_TEMPLATES)
+
+    def heavyHitters(self, n=10):
+        """
+            Returns the n most referenced [(template key, name, count)].
+        """
+        ranked = sorted(self.counts.iteritems(), key=lambda item: (-item[1], item[0]))
+        return [(k[0], k[1], count) for k, count in ranked[:n] if count]
+
+class TemplateUsage(object):
+    """
+        executor    executor.Executor with the devices added
+    """
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.devices = {}
+        self.errors = {}
+
+    def load(self, devices):
+        """
+            Fetches the templates and the referencing objects of the devices
+            concurrently and counts the references.  Returns the number of
+            devices loaded; the others are in errors.
+        """
+        futures = dict((d, self.executor.submit(d, fetch_objects, d)) for d in devices)
+        indexes = fetch_fleet(self.executor, devices)
+        loaded = 0
+        for device in devices:
+            try:
+                usage = DeviceUsage(device, indexes[device], futures[device].result())
+            except Exception, e:
+                self.errors[device] = error_message(e)
+                continue
+            self.errors.pop(device, None)
+            self.devices[device] = usage
+            loaded += 1
+        return loaded
+
+    def orphans(self):
+        """
+            Returns the [(device, template key, name)] of the unused templates.
+        """
+        return [(device, key, name) for device, usage in sorted(self.devices.iteritems())
+                for key, name in usage.orphans()]
+
+    def heavyHitters(self, n=10):
+        """
+            Returns the n most referenced [(device, template key, name, count)]
+            of the fleet.
+        """
+        ranked = [(device,) + hit for device, usage in self.devices.iteritems() for hit in usage.heavyHitters(n)]
+        ranked.sort(key=lambda hit: (-hit[3], hit[:3]))
+        return ranked[:n]
+
+    def dangling(self):
+        """
+            Returns the [(device, TemplateRef)] of the references to missing templates.
+        """
+        return [(device, ref) for device, usage in sorted(self.devices.iteritems()) for ref in usage.dangling]
+
+    def referrers(self, key, name):
+        """
+            Returns the [(device, TemplateRef)] of the objects using a template.
+        """
+        return [(device, ref) for device, usage in sorted(self.devices.iteritems())
+                for ref in usage.referrers.get((key, name), ())]
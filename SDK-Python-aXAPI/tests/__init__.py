@@ -0,0 +1,11 @@
+# -*- encoding: utf8 -*-
+"""
+    Unit tests of the SDK, run from SDK-Python-aXAPI with:
+        python -m unittest discover -s tests -t .
+"""
+
+import os
+import sys
+
+# the SDK modules import each other as top level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
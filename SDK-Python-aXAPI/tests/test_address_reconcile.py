@@ -0,0 +1,36 @@
+# -*- encoding: utf8 -*-
+
+import unittest
+
+from address_reconcile import plan_addresses
+
+class PlanAddressesTest(unittest.TestCase):
+
+    CONFIGURED = {"port_num": 1,
+                  "ipv4_addr_list": [{"ipv4_addr": "10.0.0.1", "ipv4_mask": "255.255.255.0"},
+                                     {"ipv4_addr": "10.0.1.1", "ipv4_mask": "255.255.255.0"}],
+                  "ipv6_addr_list": [{"ipv6_addr": "2001:DB8::1", "ipv6_prefix_len": 64}]}
+
+    def test_missing_interface(self):
+        self.assertTrue(plan_addresses("interface", 1, {"ipv4": []}, None).missing)
+
+    def test_ipv4(self):
+        plan = plan_addresses("interface", 1, {"ipv4": [("10.0.0.1", "/24"), ("10.0.2.1", 24)]}, self.CONFIGURED)
+        self.assertEqual(plan.add, [("ipv4", "10.0.2.1", "255.255.255.0")])
+        self.assertEqual(plan.delete, [("ipv4", "10.0.1.1", "255.255.255.0")])
+
+    def test_ipv6_canonical_form(self):
+        plan = plan_addresses("interface", 1, {"ipv6": [("2001:db8:0::1", "64")]}, self.CONFIGURED)
+        self.assertEqual(plan.changes(), 0)
+
+    def test_family_left_out_is_untouched(self):
+        plan = plan_addresses("ve", 1, {"ipv6": []}, self.CONFIGURED)
+        self.assertEqual(plan.add, [])
+        self.assertEqual(plan.delete, [("ipv6", "2001:db8::1", 64)])
+
+    def test_empty_configuration(self):
+        plan = plan_addresses("ve", 2, {"ipv4": [("10.0.0.1", "255.255.255.0")]}, {"port_num": 2})
+        self.assertEqual((plan.add, plan.delete), ([("ipv4", "10.0.0.1", "255.255.255.0")], []))
+
+if __name__ == "__main__":
+    unittest.main()
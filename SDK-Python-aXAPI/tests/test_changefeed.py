@@ -0,0 +1,84 @@
+# -*- encoding: utf8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from base import AxError
+from changefeed import ChangeFeed, EVENT_ADD, EVENT_CHANGE, EVENT_REMOVE, content_hash
+from slb import RealServer, ServiceGroup
+
+def servers(*hosts):
+    return [RealServer(name="s%d"%i, host=host) for i, host in enumerate(hosts)]
+
+def summary(events):
+    return sorted((e.event, e.key) for e in events)
+
+class ChangeFeedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.feed = ChangeFeed()
+
+    def test_content_hash_ignores_the_key_order(self):
+        self.assertEqual(content_hash({"name": "s0", "host": "10.0.0.1"}),
+                         content_hash(dict([("host", "10.0.0.1"), ("name", "s0")])))
+        self.assertNotEqual(content_hash({"name": "s0", "host": "10.0.0.1"}),
+                            content_hash({"name": "s0", "host": "10.0.0.2"}))
+
+    def test_diff(self):
+        self.assertEqual(summary(self.feed.diff("d1", "RealServer", "name", servers("10.0.0.1", "10.0.0.2"))),
+                         [(EVENT_ADD, "s0"), (EVENT_ADD, "s1")])
+        self.assertEqual(self.feed.diff("d1", "RealServer", "name", servers("10.0.0.1", "10.0.0.2")), [])
+        events = self.feed.diff("d1", "RealServer", "name", servers("10.0.0.1", "10.0.0.2")[1:])
+        self.assertEqual(summary(events), [(EVENT_REMOVE, "s0")])
+        events = self.feed.diff("d1", "RealServer", "name",
+                                [RealServer(name="s0", host="10.0.0.9"), RealServer(name="s1", host="10.0.0.2")])
+        self.assertEqual(summary(events), [(EVENT_ADD, "s0")])
+        events = self.feed.diff("d1", "RealServer", "name", servers("10.0.0.9", "10.0.0.4"))
+        self.assertEqual(summary(events), [(EVENT_CHANGE, "s1")])
+        self.assertEqual(events[0].obj.host, "10.0.0.4")
+
+    def test_diff_is_per_device_and_kind(self):
+        self.feed.diff("d1", "RealServer", "name", servers("10.0.0.1"))
+        self.assertEqual(len(self.feed.diff("d2", "RealServer", "name", servers("10.0.0.1"))), 1)
+        self.assertEqual(len(self.feed.diff("d1", "ServiceGroup", "name", [ServiceGroup(name="s0")])), 1)
+        self.feed.forget("d1")
+        self.assertEqual(summary(self.feed.diff("d1", "RealServer", "name", servers("10.0.0.1"))),
+                         [(EVENT_ADD, "s0")])
+
+    def test_failed_source_reports_no_removal(self):
+        self.feed.diff("d1", "RealServer", "name", servers("10.0.0.1"))
+        get_all = RealServer.__dict__["getAll"]
+        def failing(fields=None):
+            raise AxError("unreachable")
+        RealServer.getAll = staticmethod(failing)
+        received = []
+        self.feed.subscribe(received.append)
+        try:
+            self.assertEqual(ChangeFeed(sources=((RealServer, "name"),)).poll("d1"), [])
+            self.feed.sources = ((RealServer, "name"),)
+            self.assertEqual(self.feed.poll("d1"), [])
+            RealServer.getAll = staticmethod(lambda fields=None: [])
+            self.assertEqual(summary(self.feed.poll("d1")), [(EVENT_REMOVE, "s0")])
+        finally:
+            RealServer.getAll = get_all
+        self.assertEqual(summary(received), [(EVENT_REMOVE, "s0")])
+
+    def test_save_and_load(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "feed.json")
+            feed = ChangeFeed(path=path)
+            feed.diff("d1", "RealServer", "name", servers("10.0.0.1", "10.0.0.2"))
+            feed.save()
+            self.assertEqual(os.listdir(directory), ["feed.json"])
+            feed = ChangeFeed(path=path)
+            self.assertEqual(summary(feed.diff("d1", "RealServer", "name", servers("10.0.0.1", "10.0.0.3"))),
+                             [(EVENT_CHANGE, "s1")])
+        finally:
+            shutil.rmtree(directory)
+        self.assertRaises(AxError, self.feed.save)
+
+if __name__ == "__main__":
+    unittest.main()
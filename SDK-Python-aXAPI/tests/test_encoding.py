@@ -0,0 +1,77 @@
+# -*- encoding: utf8 -*-
+
+import json
+import unittest
+
+import method_call
+import mock_server
+from base import UrlEncoder, url_encoder
+from slb import VirtualServer
+from slb_template import TemplateCache
+
+VIP = {"name": "vip1", "address": "10.0.0.1", "status": 1, "description": u"café",
+       "vport_list": [{"port": 80, "protocol": 2, "service_group": "sg1",
+                       "member_list": [{"server": "s1", "port": 80}, {"server": "s2", "port": 8080}]},
+                      {"port": 443, "protocol": 12, "service_group": "sg2"}]}
+
+class UrlEncoderTest(unittest.TestCase):
+
+    def roundTrip(self, obj_dict, xml_convrt=()):
+        return mock_server.decode_url_data(UrlEncoder(xml_convrt).encode(obj_dict))
+
+    def test_scalars(self):
+        self.assertEqual(self.roundTrip({"name": "vip1", "status": 1, "enabled": True}),
+                         {"name": "vip1", "status": 1, "enabled": 1})
+
+    def test_empty_values_are_left_out(self):
+        self.assertEqual(self.roundTrip({"name": "vip1", "description": "", "vport_list": [], "ha": {}}),
+                         {"name": "vip1"})
+
+    def test_dictionary(self):
+        self.assertEqual(self.roundTrip({"name": "t1", "conn_limit": {"limit": 100, "log": 1}}),
+                         {"name": "t1", "conn_limit": {"limit": 100, "log": 1}})
+
+    def test_nested_lists(self):
+        result = self.roundTrip(VIP)
+        self.assertEqual(result["description"], u"café".encode("utf8"))
+        self.assertEqual(result["vport_list"][0]["member_list"],
+                         [{"server": "s1", "port": 80}, {"server": "s2", "port": 8080}])
+        self.assertEqual(result["vport_list"][1], VIP["vport_list"][1])
+
+    def test_class_encoder(self):
+        policies = [{"uri": "/a%d"%i, "action": i % 3} for i in range(5)]
+        data = url_encoder(TemplateCache).encode({"name": "c1", "max_cache_size": 80, "policy_list": policies})
+        self.assertEqual(mock_server.decode_url_data(data), {"name": "c1", "max_cache_size": 80, "policy_list": policies})
+
+    def test_nested_dictionary_in_list_is_refused(self):
+        self.assertRaises(method_call.AxAPIError, UrlEncoder(()).encode, {"vport_list": [{"ha": {"a": 1}}]})
+
+class ProjectionTest(unittest.TestCase):
+
+    FIELDS = frozenset(("name", "status"))
+
+    def items(self):
+        return [dict(VIP, name="vip%d"%i, status=i % 2) for i in range(3)]
+
+    def test_json(self):
+        body = json.dumps({"virtual_server_list": self.items()})
+        data, code, message = method_call.decode_response(body, "json", VirtualServer.__xml_convrt__, self.FIELDS)
+        self.assertEqual(data["virtual_server_list"], [{"name": "vip%d"%i, "status": i % 2} for i in range(3)])
+
+    def test_xml_skips_other_fields(self):
+        body = mock_server.render_xml({"virtual_server_list": self.items()})
+        data, code, message = method_call.decode_response(body, "url", VirtualServer.__xml_convrt__, self.FIELDS)
+        self.assertEqual(data["virtual_server_list"], [{"name": "vip%d"%i, "status": i % 2} for i in range(3)])
+
+    def test_xml_without_fields_keeps_everything(self):
+        body = mock_server.render_xml({"virtual_server_list": self.items()})
+        data, code, message = method_call.decode_response(body, "url", VirtualServer.__xml_convrt__)
+        self.assertEqual(len(data["virtual_server_list"][0]["vport_list"]), 2)
+
+    def test_failure_is_reported(self):
+        body = json.dumps({"response": {"status": "fail", "err": {"code": 1023, "msg": "not found"}}})
+        data, code, message = method_call.decode_response(body, "json", VirtualServer.__xml_convrt__, self.FIELDS)
+        self.assertEqual((data, code), (None, 1023))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+# -*- encoding: utf8 -*-
+
+import threading
+import time
+import unittest
+
+import executor
+import method_call
+import mock_server
+import session
+from base import AxError
+from executor import Executor
+
+class ExecutorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scheme = method_call.AXAPI_SCHEME
+        method_call.AXAPI_SCHEME = "http"
+        self.devices = [mock_server.MockDevice().start() for i in range(2)]
+        self.addresses = [d.address for d in self.devices]
+        self.executors = []
+
+    def tearDown(self):
+        for e in self.executors:
+            e.shutdown()
+        for d in self.devices:
+            d.stop()
+        session.close_pools()
+        method_call.AXAPI_SCHEME = self.scheme
+
+    def executor(self, workers=8, per_device=2):
+        e = Executor(workers, per_device)
+        for address in self.addresses:
+            e.addDevice(address, "admin", "a10")
+        self.executors.append(e)
+        return e
+
+    def test_per_device_limit(self):
+        e = self.executor(workers=8, per_device=2)
+        lock = threading.Lock()
+        active = dict((a, 0) for a in self.addresses)
+        highest = dict(active)
+        def call(address):
+            with lock:
+                active[address] += 1
+                highest[address] = max(highest[address], active[address])
+            time.sleep(0.02)
+            with lock:
+                active[address] -= 1
+            return method_call.current_context().device_ip
+        futures = [e.submit(a, call, a) for a in self.addresses for i in range(8)]
+        self.assertEqual([f.result(10) for f in futures], [f.device for f in futures])
+        self.assertEqual(highest, dict((a, 2) for a in self.addresses))
+        # one session per concurrent call
+        self.assertEqual([len(d.store.sessions) for d in self.devices], [2, 2])
+
+    def test_errors_are_held_by_the_future(self):
+        e = self.executor()
+        future = e.submit(self.addresses[0], lambda: {}["missing"])
+        self.assertRaises(KeyError, future.result, 10)
+        self.assertEqual(executor.error_message(future.exception()), "KeyError: 'missing'")
+        self.assertRaises(AxError, e.submit, "192.0.2.1", lambda: None)
+
+    def test_shutdown_keeps_shared_sessions(self):
+        first, second = self.executor(), self.executor()
+        first.submit(self.addresses[0], lambda: None).result(10)
+        second.submit(self.addresses[0], lambda: None).result(10)
+        first.shutdown()
+        self.assertRaises(AxError, first.submit, self.addresses[0], lambda: None)
+        self.assertEqual(len(self.devices[0].store.sessions), 1)
+        self.assertEqual(second.submit(self.addresses[0], lambda: 1).result(10), 1)
+        second.shutdown()
+        self.assertEqual(len(self.devices[0].store.sessions), 0)
+        self.assertEqual(session._pools, {})
+
+    def test_pools_by_limit_and_password(self):
+        small = self.executor(per_device=1)
+        large = self.executor(per_device=4)
+        self.assertIsNot(small._devices[self.addresses[0]].pool, large._devices[self.addresses[0]].pool)
+        self.assertEqual(large._devices[self.addresses[0]].pool.max_sessions, 4)
+        self.assertRaises(AxError, large.addDevice, self.addresses[0], "admin", "other")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,24 @@
+# -*- encoding: utf8 -*-
+
+import unittest
+
+from gslb_propagate import differs, plan_kind
+
+class DiffersTest(unittest.TestCase):
+
+    def test_only_desired_fields_count(self):
+        self.assertFalse(differs({"name": "p", "ttl": 10}, {"name": "p", "ttl": 10, "extra": 1}))
+        self.assertTrue(differs({"name": "p", "ttl": 10}, {"name": "p", "ttl": 20}))
+
+    def test_empty_values_are_equal(self):
+        self.assertFalse(differs({"name": "p", "ip_list": [], "ha": {}, "note": ""}, {"name": "p"}))
+        self.assertTrue(differs({"name": "p", "ip_list": ["a"]}, {"name": "p", "ip_list": []}))
+
+    def test_plan_kind(self):
+        desired = {"a": {"ttl": 1}, "b": {"ttl": 2}, "c": {"ttl": 3}}
+        current = {"b": {"ttl": 2}, "c": {"ttl": 4}, "d": {"ttl": 5}}
+        self.assertEqual(plan_kind(desired, current), (["a"], ["c"], []))
+        self.assertEqual(plan_kind(desired, current, prune=True), (["a"], ["c"], ["d"]))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+# -*- encoding: utf8 -*-
+
+import unittest
+
+from gslb_sim import GslbState, Simulator
+
+def service(name, port=80, **options):
+    result = dict(name=name, port=port, policy="default", dns_address_record_list=[])
+    result.update(options)
+    return result
+
+class SimulatorTest(unittest.TestCase):
+
+    def state(self, metric=None, metric_order=None, weights=(1, 3)):
+        records = [{"vip_order": "ip%d"%i, "weight": w} for i, w in enumerate(weights)]
+        policy = {"name": "default", "metric": metric or {}}
+        if metric_order is not None:
+            policy["metric_order"] = metric_order
+        sites = [{"name": "site%d"%i, "weight": 1, "status": 1,
+                  "slb_device_list": [{"name": "slb%d"%i, "admin_preference": 100 + i,
+                                       "vip_server_list": [{"name": "ip%d"%i}]}]} for i in range(len(weights))]
+        return GslbState(zones=[{"name": "example.com", "policy": "default",
+                                 "service_list": [service("www", dns_address_record_list=records)]}],
+                         policies=[policy], sites=sites,
+                         service_ips=[{"name": "ip%d"%i, "status": 1} for i in range(len(weights))])
+
+    def select(self, sim, qname="www.example.com", region=None):
+        return dict(sim._select(qname, region))
+
+    def test_round_robin_by_default(self):
+        self.assertEqual(self.select(Simulator(self.state())), {"ip0": 0.5, "ip1": 0.5})
+
+    def test_unknown_name(self):
+        self.assertEqual(Simulator(self.state())._select("ftp.example.com", None), [])
+
+    def test_weighted_ip(self):
+        sim = Simulator(self.state({"weighted_ip": {"enabled": 1}}))
+        self.assertEqual(self.select(sim), {"ip0": 0.25, "ip1": 0.75})
+
+    def test_health_check_drops_down_ips(self):
+        sim = Simulator(self.state({"weighted_ip": {"enabled": 1}}), down=["ip1"])
+        self.assertEqual(self.select(sim), {"ip0": 1.0})
+
+    def test_geo_graphic(self):
+        sim = Simulator(self.state({"geo_graphic": {"enabled": 1}}), site_regions={"site0": "eu", "site1": "us"})
+        self.assertEqual(self.select(sim, region="us"), {"ip1": 1.0})
+        # no site in the region: all the candidates stay
+        self.assertEqual(self.select(sim, region="ap"), {"ip0": 0.5, "ip1": 0.5})
+
+    def test_metric_order(self):
+        metric = {"admin_preference": {"enabled": 1}, "weighted_ip": {"enabled": 1}}
+        sim = Simulator(self.state(metric, ["admin_preference", "weighted_ip"]))
+        self.assertEqual(self.select(sim), {"ip1": 1.0})
+        sim = Simulator(self.state(metric, ["weighted_ip", "admin_preference"]))
+        self.assertEqual(self.select(sim), {"ip0": 0.25, "ip1": 0.75})
+
+    def test_aliases(self):
+        sim = Simulator(self.state({"num_session": {"enabled": 1}}), sessions={"ip0": 10, "ip1": 50})
+        self.assertEqual(self.select(sim), {"ip0": 1.0})
+        self.assertEqual(sim.ignored, set())
+
+    def test_ignored_metrics(self):
+        metric = {"least_response": {"enabled": 1}, "bandwidth_cost": {"enabled": 1},
+                  "active_servers": {"enabled": 0}, "round_robin": {"enabled": 1}}
+        sim = Simulator(self.state(metric, ["least_response"]))
+        self.assertEqual(self.select(sim), {"ip0": 0.5, "ip1": 0.5})
+        self.assertEqual(sim.ignored, set(["least_response", "bandwidth_cost"]))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+# -*- encoding: utf8 -*-
+
+import unittest
+
+from gslb_sync import plan_zone
+
+def service(name, port=80, **options):
+    result = dict(name=name, port=port, policy="default", dns_address_record_list=[])
+    result.update(options)
+    return result
+
+class PlanZoneTest(unittest.TestCase):
+
+    def test_missing_zone(self):
+        plan = plan_zone("example.com", [service("www")], None)
+        self.assertTrue(plan.missing)
+
+    def test_create_update_delete(self):
+        configured = [service("www", "80", dns_mx_record_list=[]), service("ftp", 21), service("old", 80)]
+        desired = [service("www", 80), service("ftp", 21, policy="geo"), service("new", 53)]
+        plan = plan_zone("example.com", desired, configured, prune=True)
+        self.assertEqual([s["name"] for s in plan.create], ["new"])
+        self.assertEqual([(s["name"], s["policy"]) for s in plan.update], [("ftp", "geo")])
+        self.assertEqual([s["name"] for s in plan.delete], ["old"])
+
+    def test_no_delete_without_prune(self):
+        plan = plan_zone("example.com", [], [service("www")])
+        self.assertEqual(plan.changes(), 0)
+
+    def test_update_keeps_unset_fields(self):
+        configured = [service("www", ttl=10, action=0)]
+        plan = plan_zone("example.com", [dict(name="www", port=80, ttl=20)], configured)
+        self.assertEqual(plan.update, [dict(configured[0], ttl=20)])
+
+if __name__ == "__main__":
+    unittest.main()
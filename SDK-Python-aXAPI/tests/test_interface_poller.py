@@ -0,0 +1,72 @@
+# -*- encoding: utf8 -*-
+
+import math
+import unittest
+from array import array
+
+import interface_poller
+from interface_poller import NAN, WIDTH, compute_rates
+
+class ComputeRatesTest(unittest.TestCase):
+    """
+        Runs on the array path; NumpyComputeRatesTest runs the same cases
+        on numpy.
+    """
+    use_numpy = False
+
+    def setUp(self):
+        self.numpy = interface_poller.numpy
+        if not self.use_numpy:
+            interface_poller.numpy = None
+        elif self.numpy is None:
+            self.skipTest("numpy is not installed")
+
+    def tearDown(self):
+        interface_poller.numpy = self.numpy
+
+    def compute(self, previous, current, previous_times, times, speeds):
+        rates, utilisation = compute_rates(array("d", previous), array("d", current), array("d", previous_times),
+                                           array("d", times), array("d", speeds))
+        return [float(v) for v in rates], [float(v) for v in utilisation]
+
+    def assertValues(self, values, expected):
+        self.assertEqual(len(values), len(expected))
+        for v, e in zip(values, expected):
+            if e is None:
+                self.assertTrue(math.isnan(v), "%r is not NaN"%v)
+            else:
+                self.assertAlmostEqual(v, e)
+
+    def test_empty(self):
+        rates, utilisation = self.compute([], [], [], [], [])
+        self.assertEqual((rates, utilisation), ([], []))
+
+    def test_rates_and_utilisation(self):
+        # in_pkts, out_pkts, in_bytes, out_bytes, in_errors, out_errors
+        previous = [100, 200, 1000, 2000, 0, 0] + [0, 0, 0, 0, 0, 0]
+        current = [200, 400, 126000, 2000, 0, 5] + [10, 10, 10, 10, 10, 10]
+        rates, utilisation = self.compute(previous, current, [0, 0], [10, 5], [0.1, 0])
+        self.assertValues(rates, [10, 20, 12500, 0, 0, 0.5] + [2] * WIDTH)
+        # 12500 bytes/s out of 100 kbit/s, no link speed on the second row
+        self.assertValues(utilisation, [1.0, None])
+
+    def test_counter_reset_and_unknown_rows(self):
+        previous = [100, 100, 100, 100, 100, 100] + [NAN] * WIDTH + [0] * WIDTH
+        current = [50, 200, 100, 300, 100, 100] + [1] * WIDTH + [1] * WIDTH
+        rates, utilisation = self.compute(previous, current, [0, NAN, 10], [1, 1, 10], [1000, 1000, 1000])
+        self.assertValues(rates, [None, 100, 0, 200, 0, 0] + [None] * WIDTH + [None] * WIDTH)
+        self.assertValues(utilisation[1:], [None, None])
+        self.assertAlmostEqual(utilisation[0], 200 * 8 / 1e9)
+
+    def test_large_counters(self):
+        base = float(2 ** 60)
+        previous = [0, 0, base, base, 0, 0]
+        current = [0, 0, base + 10 * 2 ** 10, base, 0, 0]
+        rates, utilisation = self.compute(previous, current, [0], [10], [0])
+        self.assertValues(rates[:4], [0, 0, 2 ** 10, 0])
+
+class NumpyComputeRatesTest(ComputeRatesTest):
+    use_numpy = True
+
+if __name__ == "__main__":
+    unittest.main()
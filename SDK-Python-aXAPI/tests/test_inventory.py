@@ -0,0 +1,64 @@
+# -*- encoding: utf8 -*-
+
+import unittest
+
+import gslb
+import inventory
+import method_call
+import mock_server
+import session
+from inventory import Inventory, KIND_GSLB_SERVICE_IP, KIND_VIRTUAL_SERVER
+
+class InventoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scheme = method_call.AXAPI_SCHEME
+        method_call.AXAPI_SCHEME = "http"
+        self.getAll = gslb.GslbServiceIP.__dict__["getAll"]
+        self.device = mock_server.MockDevice(store=mock_server.seed(mock_server.MockStore(), virtual_servers=5,
+                                                                    zones=3)).start()
+        gsips = set(g["ip_address"] for g in self.device.store.objects("gslb.service_ip").itervalues())
+        self.vip = [v for v in self.device.store.objects("slb.virtual_server").itervalues() if v["address"] in gsips][-1]
+        self.inventory = Inventory([(self.device.address, "admin", "a10")], workers=2)
+
+    def tearDown(self):
+        gslb.GslbServiceIP.getAll = self.getAll
+        self.inventory.close()
+        self.device.stop()
+        session.close_pools()
+        method_call.AXAPI_SCHEME = self.scheme
+
+    def kinds(self, records):
+        return sorted(set(r.kind for r in records))
+
+    def test_sync(self):
+        self.assertEqual(self.inventory.sync(), 1)
+        self.assertEqual(self.kinds(self.inventory.whereUsed(self.vip["address"])),
+                         [KIND_GSLB_SERVICE_IP, KIND_VIRTUAL_SERVER])
+        status = self.inventory.status()[self.device.address]
+        self.assertEqual((status["error"], status["errors"]), (None, {}))
+
+    def test_kind_failure_keeps_the_other_kinds(self):
+        gslb.GslbServiceIP.getAll = staticmethod(lambda fields=None: None)
+        self.assertEqual(self.inventory.sync(), 1)
+        self.assertEqual(self.kinds(self.inventory.whereUsed(self.vip["address"])), [KIND_VIRTUAL_SERVER])
+        status = self.inventory.status()[self.device.address]
+        self.assertEqual(status["errors"].keys(), [KIND_GSLB_SERVICE_IP])
+        self.assertTrue(status["synced"])
+
+    def test_kind_failure_keeps_its_previous_records(self):
+        self.inventory.sync()
+        gslb.GslbServiceIP.getAll = staticmethod(lambda fields=None: {}["service_ip_list"])
+        self.inventory.sync()
+        self.assertEqual(self.kinds(self.inventory.whereUsed(self.vip["address"])),
+                         [KIND_GSLB_SERVICE_IP, KIND_VIRTUAL_SERVER])
+        self.assertEqual(self.inventory.status()[self.device.address]["errors"],
+                         {KIND_GSLB_SERVICE_IP: "KeyError: 'service_ip_list'"})
+
+    def test_device_failure(self):
+        self.device.store.credentials = {"admin": "other"}
+        self.assertEqual(self.inventory.sync(), 0)
+        self.assertTrue(self.inventory.status()[self.device.address]["error"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+# -*- encoding: utf8 -*-
+
+import unittest
+
+import method_call
+import mock_server
+import network
+import network_snapshot
+import session
+from executor import Executor
+
+class SnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scheme = method_call.AXAPI_SCHEME
+        method_call.AXAPI_SCHEME = "http"
+        self.getAll = network.VirtualInterface.__dict__["getAll"]
+        self.device = mock_server.MockDevice(store=mock_server.seed(mock_server.MockStore(), virtual_servers=1,
+                                                                    interfaces=4, ves=3)).start()
+        self.executor = Executor(4, per_device=2)
+        self.executor.addDevice(self.device.address, "admin", "a10")
+
+    def tearDown(self):
+        network.VirtualInterface.getAll = self.getAll
+        self.executor.shutdown()
+        self.device.stop()
+        session.close_pools()
+        method_call.AXAPI_SCHEME = self.scheme
+
+    def snapshot(self):
+        return network_snapshot.snapshot(self.executor, [self.device.address])[self.device.address]
+
+    def test_all_kinds(self):
+        snap = self.snapshot()
+        self.assertTrue(snap.complete())
+        self.assertEqual(sorted(snap.get("interface", 1)["ipv4_addr_list"][0].items()),
+                         [("ipv4_addr", "10.255.1.1"), ("ipv4_mask", "255.255.255.0")])
+        self.assertEqual(snap.get("gateway")["ipv4_gateway"], "10.255.1.254")
+        self.assertEqual(snap.get("route", ("10.100.1.0", "255.255.255.0", "10.254.1.254"))["distance"], 1)
+        self.assertEqual(snap.addresses()["192.168.0.10"], [("management", None)])
+
+    def test_failed_read_is_recorded(self):
+        network.VirtualInterface.getAll = staticmethod(lambda fields=None: None)
+        snap = self.snapshot()
+        self.assertEqual(snap.errors, {"ve": "VirtualInterface.getAll failed"})
+        self.assertEqual(len(snap.objects["interface"]), 4)
+
+    def test_any_exception_is_recorded(self):
+        def broken(fields=None):
+            raise KeyError("ve_list")
+        network.VirtualInterface.getAll = staticmethod(broken)
+        snap = self.snapshot()
+        self.assertEqual(snap.errors, {"ve": "KeyError: 've_list'"})
+        self.assertEqual(snap.get("dns")["dns_suffix"], "example.com")
+
+if __name__ == "__main__":
+    unittest.main()
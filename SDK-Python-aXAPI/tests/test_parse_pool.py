@@ -0,0 +1,85 @@
+# -*- encoding: utf8 -*-
+
+import json
+import unittest
+
+import method_call
+import mock_server
+import parse_pool
+from parse_pool import ParsePool
+from slb import VirtualServer
+
+BODY = json.dumps({"virtual_server_list": [{"name": u"vs%d"%i, "address": "10.0.0.%d"%i} for i in xrange(20)]})
+FAIL = json.dumps({"response": {"status": "fail", "err": {"code": 67174402, "msg": "Invalid session"}}})
+
+class ParsePoolTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # forked before the mock device threads start
+        cls.pool = ParsePool(processes=1, threshold=len(BODY))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def setUp(self):
+        self.applied = []
+        apply = self.pool._pool.apply
+        def counting(func, args):
+            self.applied.append(func)
+            return apply(func, args)
+        self.pool._pool.apply = counting
+
+    def tearDown(self):
+        del self.pool._pool.apply
+        parse_pool.uninstall()
+
+    def decode(self, body):
+        return self.pool.decode(body, "json", VirtualServer.__xml_convrt__)
+
+    def test_threshold(self):
+        large = self.decode(BODY)
+        self.assertEqual(len(self.applied), 1)
+        self.pool.threshold = len(BODY) + 1
+        try:
+            small = self.decode(BODY)
+        finally:
+            self.pool.threshold = len(BODY)
+        self.assertEqual(len(self.applied), 1)
+        self.assertEqual(small.data, large.data)
+        self.assertEqual(large.data, json.loads(BODY))
+        self.assertIs(type(large.data["virtual_server_list"][0]["name"]), str)
+        self.assertIs(type(small.data["virtual_server_list"][0]["name"]), str)
+
+    def test_failure(self):
+        self.pool.threshold = 0
+        try:
+            resp = self.decode(FAIL)
+        finally:
+            self.pool.threshold = len(BODY)
+        self.assertEqual(len(self.applied), 1)
+        self.assertEqual((resp.data, resp.error.code), (None, 67174402))
+        self.assertEqual(self.decode(FAIL).error.code, 67174402)
+
+    def test_install_and_fallback(self):
+        scheme = method_call.AXAPI_SCHEME
+        method_call.AXAPI_SCHEME = "http"
+        device = mock_server.MockDevice(store=mock_server.seed(mock_server.MockStore(), virtual_servers=30)).start()
+        try:
+            method_call.AxApiContext(device.address, "admin", "a10").authentication()
+            expected = [v.getObjectDict() for v in VirtualServer.getAll()]
+            self.pool.threshold = 0
+            self.assertIs(parse_pool.install(self.pool), self.pool)
+            self.assertEqual([v.getObjectDict() for v in VirtualServer.getAll()], expected)
+            self.assertEqual(len(self.applied), 1)
+            parse_pool.uninstall()
+            self.assertEqual([v.getObjectDict() for v in VirtualServer.getAll()], expected)
+            self.assertEqual(len(self.applied), 1)
+        finally:
+            self.pool.threshold = len(BODY)
+            device.stop()
+            method_call.AXAPI_SCHEME = scheme
+
+if __name__ == "__main__":
+    unittest.main()
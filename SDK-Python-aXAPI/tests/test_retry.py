@@ -0,0 +1,202 @@
+# -*- encoding: utf8 -*-
+
+import os
+import random
+import shutil
+import ssl
+import subprocess
+import tempfile
+import unittest
+from distutils.spawn import find_executable
+
+import method_call
+import mock_server
+import retry
+from base import AxCertificateError, AxCircuitOpenError, AxHttpError, AxTransportError
+from retry import CircuitBreaker, RetryPolicy
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.breaker = CircuitBreaker("10.0.0.1", failure_threshold=3, reset_timeout=30.0)
+
+    def expire(self):
+        self.breaker.opened_at -= self.breaker.reset_timeout
+
+    def test_opens_after_threshold(self):
+        for i in range(2):
+            self.breaker.recordFailure()
+            self.breaker.allow()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.breaker.recordFailure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertRaises(AxCircuitOpenError, self.breaker.allow)
+
+    def test_success_resets_failures(self):
+        self.breaker.recordFailure()
+        self.breaker.recordFailure()
+        self.breaker.recordSuccess()
+        self.breaker.recordFailure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.breaker.failures, 1)
+
+    def test_trial_call_after_reset_timeout(self):
+        for i in range(3):
+            self.breaker.recordFailure()
+        self.expire()
+        self.breaker.allow()
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        # a single trial at a time
+        self.assertRaises(AxCircuitOpenError, self.breaker.allow)
+        self.breaker.recordSuccess()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.breaker.allow()
+
+    def test_failed_trial_opens_again(self):
+        for i in range(3):
+            self.breaker.recordFailure()
+        self.expire()
+        self.breaker.allow()
+        self.breaker.recordFailure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertRaises(AxCircuitOpenError, self.breaker.allow)
+
+class RetryPolicyTest(unittest.TestCase):
+
+    def test_backoff_bounds(self):
+        policy = RetryPolicy(backoff_base=0.5, backoff_max=3.0)
+        random.seed(1)
+        for attempt, bound in enumerate((0.5, 1.0, 2.0, 3.0, 3.0)):
+            delays = [policy.backoff(attempt) for i in range(200)]
+            self.assertTrue(all(0 <= d <= bound for d in delays))
+            self.assertTrue(max(delays) > bound / 2)
+
+    def test_should_retry(self):
+        policy = RetryPolicy(max_retries=2)
+        sent = AxTransportError("reset", sent=True)
+        not_sent = AxTransportError("refused", sent=False)
+        self.assertTrue(policy.shouldRetry(sent, 0, True))
+        self.assertFalse(policy.shouldRetry(sent, 0, False))
+        self.assertTrue(policy.shouldRetry(not_sent, 1, False))
+        self.assertFalse(policy.shouldRetry(not_sent, 2, False))
+        self.assertTrue(policy.shouldRetry(AxHttpError(503, "busy"), 0, True))
+        self.assertFalse(policy.shouldRetry(AxHttpError(503, "busy"), 0, False))
+        self.assertFalse(policy.shouldRetry(AxHttpError(404, "missing"), 0, True))
+        self.assertFalse(policy.shouldRetry(AxCertificateError("untrusted"), 0, True))
+        self.assertFalse(policy.isDeviceFailure(AxCertificateError("untrusted")))
+
+class SendRequestTest(unittest.TestCase):
+    """
+        _send_request with _http_post and the backoff sleep replaced.
+    """
+    URL = "http://192.0.2.1/services/rest/V2/"
+
+    def setUp(self):
+        self.http_post = method_call._http_post
+        self.sleep = method_call.time.sleep
+        self.delays = []
+        self.outcomes = []
+        method_call._http_post = self.fakePost
+        method_call.time.sleep = self.delays.append
+        retry._breakers.clear()
+
+    def tearDown(self):
+        method_call._http_post = self.http_post
+        method_call.time.sleep = self.sleep
+        retry._breakers.clear()
+
+    def fakePost(self, url, data, connect_timeout, read_timeout, decoder_class):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def test_retries_with_growing_backoff(self):
+        policy = RetryPolicy(max_retries=3, backoff_base=1.0, backoff_max=100.0)
+        self.outcomes = [AxTransportError("reset"), AxTransportError("reset"), "ok"]
+        random.seed(2)
+        self.assertEqual(method_call._send_request(self.URL, "", policy, idempotent=True), "ok")
+        self.assertEqual(len(self.delays), 2)
+        self.assertTrue(0 <= self.delays[0] <= 1.0 and 0 <= self.delays[1] <= 2.0)
+        self.assertEqual(policy.getBreaker("192.0.2.1").failures, 0)
+
+    def test_write_is_not_retried_once_sent(self):
+        policy = RetryPolicy(max_retries=3)
+        self.outcomes = [AxTransportError("reset", sent=True), "ok"]
+        self.assertRaises(AxTransportError, method_call._send_request, self.URL, "", policy, False)
+        self.assertEqual(self.delays, [])
+
+    def test_breaker_opens_and_fails_fast(self):
+        policy = RetryPolicy(max_retries=0, failure_threshold=2)
+        self.outcomes = [AxTransportError("reset"), AxHttpError(502, "bad gateway")]
+        self.assertRaises(AxTransportError, method_call._send_request, self.URL, "", policy, True)
+        self.assertRaises(AxHttpError, method_call._send_request, self.URL, "", policy, True)
+        self.assertRaises(AxCircuitOpenError, method_call._send_request, self.URL, "", policy, True)
+        self.assertEqual(self.outcomes, [])
+
+    def test_client_errors_do_not_open_the_breaker(self):
+        policy = RetryPolicy(max_retries=0, failure_threshold=1)
+        self.outcomes = [AxHttpError(404, "missing"), "ok"]
+        self.assertRaises(AxHttpError, method_call._send_request, self.URL, "", policy, True)
+        self.assertEqual(method_call._send_request(self.URL, "", policy, True), "ok")
+
+    def test_certificate_error_is_not_retried(self):
+        policy = RetryPolicy(max_retries=3, failure_threshold=1)
+        self.outcomes = [AxCertificateError("untrusted"), "ok"]
+        self.assertRaises(AxCertificateError, method_call._send_request, self.URL, "", policy, True)
+        self.assertEqual(self.delays, [])
+        self.assertEqual(policy.getBreaker("192.0.2.1").state, CircuitBreaker.CLOSED)
+        self.assertEqual(method_call._send_request(self.URL, "", policy, True), "ok")
+
+class CertificateTest(unittest.TestCase):
+    """
+        HTTPS to a mock device serving a self-signed certificate for localhost.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        if find_executable("openssl") is None:
+            raise unittest.SkipTest("openssl is not installed")
+        cls.directory = tempfile.mkdtemp()
+        cls.certfile = os.path.join(cls.directory, "cert.pem")
+        cls.keyfile = os.path.join(cls.directory, "key.pem")
+        with open(os.devnull, "w") as devnull:
+            subprocess.check_call(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                                   "-subj", "/CN=localhost", "-keyout", cls.keyfile, "-out", cls.certfile],
+                                  stdout=devnull, stderr=devnull)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def setUp(self):
+        self.scheme = method_call.AXAPI_SCHEME
+        self.ssl_context = method_call.AXAPI_SSL_CONTEXT
+        method_call.AXAPI_SCHEME = "https"
+        self.device = mock_server.MockDevice(certfile=self.certfile, keyfile=self.keyfile).start()
+        self.url = method_call._get_request_url(self.device.address)
+        retry._breakers.clear()
+
+    def tearDown(self):
+        self.device.stop()
+        method_call.AXAPI_SCHEME = self.scheme
+        method_call.AXAPI_SSL_CONTEXT = self.ssl_context
+        retry._breakers.clear()
+
+    def send(self):
+        return method_call._send_request(self.url, "method=authenticate&username=admin&password=a10",
+                                         RetryPolicy(max_retries=3, failure_threshold=1), idempotent=True)
+
+    def test_untrusted_certificate(self):
+        self.assertRaises(AxCertificateError, self.send)
+        self.assertEqual(retry.get_breaker(self.device.address).state, CircuitBreaker.CLOSED)
+
+    def test_hostname_mismatch(self):
+        context = ssl.create_default_context(cafile=self.certfile)
+        method_call.AXAPI_SSL_CONTEXT = context
+        self.assertRaises(AxCertificateError, self.send)
+        context.check_hostname = False
+        self.assertTrue("session_id" in self.send())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+# -*- encoding: utf8 -*-
+
+import threading
+import unittest
+
+import method_call
+import mock_server
+from base import AxError
+from session import SessionPool
+from slb import VirtualServer
+
+class SessionPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scheme = method_call.AXAPI_SCHEME
+        method_call.AXAPI_SCHEME = "http"
+        store = mock_server.seed(mock_server.MockStore(credentials={"admin": "a10"}), virtual_servers=3)
+        self.device = mock_server.MockDevice(store=store).start()
+        self.pool = SessionPool(self.device.address, "admin", "a10", max_sessions=2)
+
+    def tearDown(self):
+        self.pool.close()
+        self.device.stop()
+        method_call.AXAPI_SCHEME = self.scheme
+
+    def test_session_is_reused(self):
+        with self.pool.session() as context:
+            self.assertIs(method_call.current_context(), context)
+            self.assertEqual(len(VirtualServer.getAll()), 3)
+        with self.pool.session() as again:
+            self.assertIs(again, context)
+        self.assertEqual(len(self.device.store.sessions), 1)
+        self.assertIsNot(method_call.current_context(), context)
+
+    def test_expired_session_is_renewed(self):
+        with self.pool.session() as context:
+            first = context.session_id
+            self.device.store.sessions.clear()
+            self.assertEqual(len(VirtualServer.getAll()), 3)
+            self.assertNotEqual(context.session_id, first)
+            self.assertTrue(context.session_id in self.device.store.sessions)
+
+    def test_cap_and_release(self):
+        held = [self.pool.acquire(), self.pool.acquire()]
+        self.assertRaises(AxError, self.pool.acquire, 0.05)
+        threading.Timer(0.05, self.pool.release, [held[0]]).start()
+        self.assertIs(self.pool.acquire(5), held[0])
+
+    def test_failed_login_frees_its_slot(self):
+        pool = SessionPool(self.device.address, "admin", "wrong", max_sessions=1)
+        for i in range(2):
+            with self.assertRaises(AxError):
+                with pool.session():
+                    pass
+        self.assertEqual(pool._opened, 0)
+
+    def test_close_logs_out_idle_sessions(self):
+        with self.pool.session():
+            pass
+        self.pool.close()
+        self.assertEqual(self.device.store.sessions, {})
+        with self.pool.session():
+            self.assertEqual(len(VirtualServer.getAll()), 3)
+
+if __name__ == "__main__":
+    unittest.main()
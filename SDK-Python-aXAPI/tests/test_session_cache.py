@@ -0,0 +1,111 @@
+# -*- encoding: utf8 -*-
+
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+import method_call
+import mock_server
+import session_cache
+from session_cache import SessionCache
+
+KEY = "Nyu9HoYtfkexIH-J8TaLFOcTZBpqE_3nqO2C78xXWN4="
+
+class SessionCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        if session_cache.Fernet is None:
+            self.skipTest("cryptography is not installed")
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "axapi", "sessions")
+        self.env_key = os.environ.pop("AXAPI_CACHE_KEY", None)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        if self.env_key is not None:
+            os.environ["AXAPI_CACHE_KEY"] = self.env_key
+
+    def test_round_trip_is_encrypted(self):
+        cache = SessionCache(self.path, key=KEY)
+        cache.put("10.0.0.1", "admin", "a10", "session-0123")
+        self.assertEqual(cache.get("10.0.0.1", "admin", "a10"), "session-0123")
+        self.assertEqual(cache.get("10.0.0.1", "admin", "other"), None)
+        with open(self.path, "rb") as f:
+            data = f.read()
+        self.assertFalse("session-0123" in data or "10.0.0.1" in data)
+        self.assertEqual(SessionCache(self.path, key=session_cache.Fernet.generate_key()).get("10.0.0.1", "admin", "a10"),
+                         None)
+
+    def test_expiry_and_remove(self):
+        SessionCache(self.path, key=KEY, ttl=0).put("10.0.0.1", "admin", "a10", "old")
+        cache = SessionCache(self.path, key=KEY)
+        self.assertEqual(cache.get("10.0.0.1", "admin", "a10"), None)
+        cache.put("10.0.0.2", "admin", "a10", "new")
+        cache.remove("10.0.0.2", "admin", "a10")
+        self.assertEqual(cache.get("10.0.0.2", "admin", "a10"), None)
+
+    def test_private_key_file(self):
+        cache = SessionCache(self.path)
+        cache.put("10.0.0.1", "admin", "a10", "session")
+        for path in (self.path, self.path + ".key"):
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0600)
+        self.assertEqual(SessionCache(self.path).get("10.0.0.1", "admin", "a10"), "session")
+
+    def test_atomic_write(self):
+        cache = SessionCache(self.path, key=KEY)
+        cache.put("10.0.0.1", "admin", "a10", "first")
+        rename = os.rename
+        def failing(src, dst):
+            raise OSError("disk full")
+        os.rename = failing
+        try:
+            self.assertRaises(OSError, cache.put, "10.0.0.1", "admin", "a10", "second")
+        finally:
+            os.rename = rename
+        self.assertEqual(cache.get("10.0.0.1", "admin", "a10"), "first")
+        cache.put("10.0.0.2", "admin", "a10", "third")
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["sessions"])
+
+    def test_login_reuses_the_cached_session(self):
+        scheme = method_call.AXAPI_SCHEME
+        method_call.AXAPI_SCHEME = "http"
+        device = mock_server.MockDevice().start()
+        try:
+            cache = SessionCache(self.path, key=KEY)
+            first = method_call.AxApiContext(device.address, "admin", "a10", cache=cache).authentication()
+            second = method_call.AxApiContext(device.address, "admin", "a10", cache=cache).authentication()
+            self.assertEqual(second.session_id, first.session_id)
+            self.assertEqual(len(device.store.sessions), 1)
+            first.logout()
+            self.assertEqual(cache.get(device.address, "admin", "a10"), None)
+        finally:
+            device.stop()
+            method_call.AXAPI_SCHEME = scheme
+
+class DisabledSessionCacheTest(unittest.TestCase):
+    """
+        The cache without the cryptography package.
+    """
+
+    def setUp(self):
+        self.fernet = session_cache.Fernet
+        session_cache.Fernet = None
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "sessions")
+
+    def tearDown(self):
+        session_cache.Fernet = self.fernet
+        shutil.rmtree(self.directory)
+
+    def test_disabled(self):
+        cache = SessionCache(self.path, key=KEY)
+        self.assertFalse(cache.isEnabled())
+        cache.put("10.0.0.1", "admin", "a10", "session")
+        self.assertEqual(cache.get("10.0.0.1", "admin", "a10"), None)
+        cache.remove("10.0.0.1", "admin", "a10")
+        self.assertEqual(os.listdir(self.directory), [])
+
+if __name__ == "__main__":
+    unittest.main()